@@ -91,6 +91,11 @@ notes:
   PostgreSQL must also be installed on the remote host.
 - For Ubuntu-based systems, install the C(postgresql), C(libpq-dev), and C(python3-psycopg2) packages
   on the remote host before using this module.
+- Every task opens its own database connection and closes it when the module exits,
+  connections are not kept between tasks. When connection establishment dominates the run time,
+  for example, with many tasks against a remote server using TLS and SCRAM authentication,
+  consider connecting through a connection pooler such as PgBouncer in session pooling mode
+  by pointing I(login_host) and I(login_port) to it.
 
 requirements: [ 'psycopg2 >= 2.5.1' ]
 '''
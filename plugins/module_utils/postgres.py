@@ -13,12 +13,24 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import hmac
+import itertools
+import json
+import os
+import re
+import tempfile
+import time
+from base64 import b64decode
+from collections import OrderedDict
 from datetime import timedelta, datetime
 from decimal import Decimal
+from hashlib import md5, sha256
 from os import environ
 
-from ansible.module_utils.common.text.converters import to_native
+from ansible.module_utils.common.text.converters import to_bytes, to_native, to_text
 from ansible.module_utils.basic import missing_required_lib
+from ansible_collections.community.postgresql.plugins.module_utils import \
+    saslprep
 from ansible_collections.community.postgresql.plugins.module_utils.version import \
     LooseVersion
 
@@ -27,6 +39,14 @@ psycopg2 = None  # This line is needed for unit tests
 pg_cursor_args = None  # This line is needed for unit tests
 PSYCOPG_VERSION = LooseVersion("0.0")  # This line is needed for unit tests
 
+try:
+    # pbkdf2_hmac is missing on python 2.6, we can safely assume,
+    # that postresql 10 capable instance have at least python 2.7 installed
+    from hashlib import pbkdf2_hmac
+    HAS_PBKDF2 = True
+except ImportError:
+    HAS_PBKDF2 = False
+
 try:
     import psycopg
     from psycopg import ClientCursor
@@ -54,6 +74,30 @@ except ImportError:
 
 TYPES_NEED_TO_CONVERT = (Decimal, timedelta)
 
+# OIDs of the types the values of which are fetched
+# as TYPES_NEED_TO_CONVERT: money, interval, numeric
+TYPE_OIDS_NEED_TO_CONVERT = frozenset((790, 1186, 1700))
+
+FLAGS = ('SUPERUSER', 'CREATEROLE', 'CREATEDB', 'INHERIT', 'LOGIN', 'REPLICATION')
+FLAGS_BY_VERSION = {'BYPASSRLS': 90500}
+
+# map to cope with idiosyncrasies of SUPERUSER and LOGIN
+PRIV_TO_AUTHID_COLUMN = dict(SUPERUSER='rolsuper', CREATEROLE='rolcreaterole',
+                             CREATEDB='rolcreatedb', INHERIT='rolinherit', LOGIN='rolcanlogin',
+                             REPLICATION='rolreplication', BYPASSRLS='rolbypassrls')
+
+SCRAM_SHA256_REGEX = r'^SCRAM-SHA-256\$(\d+):([A-Za-z0-9+\/=]+)\$([A-Za-z0-9+\/=]+):([A-Za-z0-9+\/=]+)$'
+
+# Maximum number of entries kept in a SCRAM verifier cache file
+SCRAM_CACHE_SIZE = 10000
+
+# Errors of connection poolers that reject the "options" startup parameter, PgBouncer
+# says "unsupported startup parameter: options" or, since 1.20, when it supports
+# the parameter partially, "unsupported startup parameter in options: role"
+# or "unsupported options startup parameter: ..."
+STARTUP_OPTIONS_REJECTED_REGEX = (r'unsupported startup parameter(: options\b| in options)'
+                                  r'|unsupported options startup parameter')
+
 
 if PSYCOPG_VERSION >= LooseVersion("3"):
     class InfTimestamptzLoader(TimestamptzLoader):
@@ -145,11 +189,16 @@ def ensure_required_libs(module):
         module.fail_json(msg='psycopg2 must be at least 2.4.3 in order to use the ca_cert parameter')
 
 
-def connect_to_db(module, conn_params, autocommit=False, fail_on_conn=True):
+def connect_to_db(module, conn_params, autocommit=False, fail_on_conn=True, session_stats=None):
     """Connect to a PostgreSQL database.
 
     Return a tuple containing a psycopg connection object and error message / None.
 
+    The session is initialized (session_role, datestyle) through libpq startup
+    options, so it does not cost additional round trips. If a connection
+    pooler in front of the server rejects the options, the function
+    reconnects and initializes the session with one batched statement.
+
     Args:
         module (AnsibleModule) -- object of ansible.module_utils.basic.AnsibleModule class
         conn_params (dict) -- dictionary with connection parameters
@@ -157,47 +206,26 @@ def connect_to_db(module, conn_params, autocommit=False, fail_on_conn=True):
     Kwargs:
         autocommit (bool) -- commit automatically (default False)
         fail_on_conn (bool) -- fail if connection failed or just warn and return None (default True)
+        session_stats (dict) -- if passed, it is filled in with the session initialization
+            method ('startup_options', 'statement' or None when nothing to initialize)
+            and the number of round trips it took (default None)
     """
 
     db_connection = None
     conn_err = None
-    try:
-        if PSYCOPG_VERSION >= LooseVersion("3.0"):
-            conn_params["autocommit"] = autocommit
-            conn_params["cursor_factory"] = ClientCursor
-            conn_params["row_factory"] = dict_row
-            db_connection = psycopg.connect(**conn_params)
-        else:
-            db_connection = psycopg2.connect(**conn_params)
-            if autocommit:
-                if PSYCOPG_VERSION >= LooseVersion("2.4.2"):
-                    db_connection.set_session(autocommit=True)
-                else:
-                    db_connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
 
-        # Switch role, if specified:
-        if module.params.get('session_role'):
-            if PSYCOPG_VERSION >= LooseVersion("3.0"):
-                cursor = db_connection.cursor(row_factory=psycopg.rows.dict_row)
-            else:
-                cursor = db_connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    if session_stats is not None:
+        # Nothing is initialized if the connection fails
+        session_stats['method'] = None
+        session_stats['round_trips'] = 0
 
-            try:
-                cursor.execute('SET ROLE "%s"' % module.params['session_role'])
-            except Exception as e:
-                module.fail_json(msg="Could not switch role: %s" % to_native(e))
-            finally:
-                cursor.close()
+    try:
+        db_connection = open_connection(conn_params, autocommit=autocommit,
+                                        session_role=module.params.get('session_role'),
+                                        session_stats=session_stats)
 
-        # Ensure proper datestyle, only supported in psycopg 3
-        if PSYCOPG_VERSION >= LooseVersion("3.0"):
-            cursor = db_connection.cursor(row_factory=psycopg.rows.dict_row)
-            try:
-                cursor.execute('SET datestyle TO iso')
-            except Exception as e:
-                module.fail_json(msg="Could not set date style: %s" % to_native(e))
-            finally:
-                cursor.close()
+    except SessionInitError as e:
+        module.fail_json(msg=to_native(e))
 
     except TypeError as e:
         if 'sslrootcert' in e.args[0]:
@@ -219,6 +247,176 @@ def connect_to_db(module, conn_params, autocommit=False, fail_on_conn=True):
     return db_connection, conn_err
 
 
+class SessionInitError(Exception):
+    """Raised when the session cannot be initialized after connecting."""
+    pass
+
+
+def open_connection(conn_params, autocommit=False, session_role=None, session_stats=None):
+    """Connect to a PostgreSQL database and initialize the session.
+
+    Unlike connect_to_db(), it never fails the module and raises
+    exceptions instead, so it is safe to call from concurrent threads.
+
+    Args:
+        conn_params (dict) -- dictionary with connection parameters
+
+    Kwargs:
+        autocommit (bool) -- commit automatically (default False)
+        session_role (str) -- role to switch to after connecting (default None)
+        session_stats (dict) -- see connect_to_db() (default None)
+
+    Raises SessionInitError if the session cannot be initialized,
+    the psycopg exceptions if the connection fails.
+
+    Returns a psycopg connection object.
+    """
+    db_connection = None
+    init_method = None
+    init_round_trips = 0
+
+    startup_options = get_session_startup_options(session_role)
+
+    if startup_options:
+        try:
+            db_connection = _connect(conn_params, autocommit, startup_options)
+            init_method = 'startup_options'
+        except Exception as e:
+            if not _startup_options_rejected(e):
+                raise
+            # Probably, a connection pooler that does not support
+            # the "options" startup parameter, try without it
+
+    if db_connection is None:
+        db_connection = _connect(conn_params, autocommit)
+
+        init_queries = get_session_init_queries(session_role)
+        if init_queries:
+            cursor = db_connection.cursor(**pg_cursor_args)
+            try:
+                cursor.execute('; '.join(init_queries))
+            except Exception as e:
+                db_connection.close()
+                if session_role:
+                    raise SessionInitError("Could not switch role: %s" % to_native(e))
+                raise SessionInitError("Could not set date style: %s" % to_native(e))
+            finally:
+                cursor.close()
+
+            init_method = 'statement'
+            init_round_trips = 1
+
+    if session_stats is not None:
+        session_stats['method'] = init_method
+        session_stats['round_trips'] = init_round_trips
+
+    return db_connection
+
+
+def _connect(conn_params, autocommit, startup_options=None):
+    """Open a psycopg connection.
+
+    Args:
+        conn_params (dict) -- dictionary with connection parameters
+        autocommit (bool) -- commit automatically
+
+    Kwargs:
+        startup_options (list) -- libpq command-line options to append
+            to the "options" connection parameter (default None)
+
+    Returns a psycopg connection object.
+    """
+    # Copy the dict as the callers can reuse it to reconnect
+    conn_params = dict(conn_params)
+
+    if startup_options:
+        if conn_params.get('options'):
+            startup_options = [conn_params['options']] + startup_options
+        conn_params['options'] = ' '.join(startup_options)
+
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        conn_params["autocommit"] = autocommit
+        conn_params["cursor_factory"] = ClientCursor
+        conn_params["row_factory"] = dict_row
+        return psycopg.connect(**conn_params)
+
+    db_connection = psycopg2.connect(**conn_params)
+    if autocommit:
+        if PSYCOPG_VERSION >= LooseVersion("2.4.2"):
+            db_connection.set_session(autocommit=True)
+        else:
+            db_connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+
+    return db_connection
+
+
+def _startup_options_rejected(err):
+    """Check if a connection error can be caused by the session startup options.
+
+    Args:
+        err (Exception) -- exception raised on connect
+
+    Only the errors of connection poolers are matched, other errors,
+    for example, authentication ones, must not cause a reconnect.
+
+    Returns True if it makes sense to reconnect without startup options.
+    """
+    return re.search(STARTUP_OPTIONS_REJECTED_REGEX, to_native(err), re.IGNORECASE) is not None
+
+
+def get_session_startup_options(session_role=None):
+    """Get libpq command-line options that initialize the session.
+
+    Kwargs:
+        session_role (str) -- role to switch to after connecting (default None)
+
+    Returns a list of "-c name=value" strings.
+    """
+    options = []
+    if session_role:
+        options.append('-c role=%s' % escape_startup_option(session_role))
+
+    # Ensure proper datestyle, only supported in psycopg 3
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        options.append('-c datestyle=iso')
+
+    return options
+
+
+def get_session_init_queries(session_role=None):
+    """Get statements that initialize the session.
+
+    Used when the session cannot be initialized through startup options.
+
+    Kwargs:
+        session_role (str) -- role to switch to after connecting (default None)
+
+    Returns a list of SQL statements.
+    """
+    queries = []
+    if session_role:
+        queries.append('SET ROLE "%s"' % session_role)
+
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        queries.append('SET datestyle TO iso')
+
+    return queries
+
+
+def escape_startup_option(value):
+    """Escape a value for the libpq "options" connection parameter.
+
+    Spaces separate command-line arguments there,
+    so they and backslashes must be escaped with a backslash.
+
+    Args:
+        value (str) -- value to escape
+
+    Returns the escaped value (str).
+    """
+    return value.replace('\\', '\\\\').replace(' ', '\\ ')
+
+
 def exec_sql(obj, query, query_params=None, return_bool=False, add_to_executed=True, dont_exec=False):
     """Execute SQL.
 
@@ -340,6 +538,314 @@ def get_conn_params(module, params_dict, warn_db_default=True):
     return kw
 
 
+class InvalidFlagsError(Exception):
+    pass
+
+
+def parse_role_attrs(role_attr_flags, srv_version):
+    """
+    Parse role attributes string for user creation.
+    Format:
+
+        attributes[,attributes,...]
+
+    Where:
+
+        attributes := CREATEDB,CREATEROLE,NOSUPERUSER,...
+        [ "[NO]SUPERUSER","[NO]CREATEROLE", "[NO]CREATEDB",
+                            "[NO]INHERIT", "[NO]LOGIN", "[NO]REPLICATION",
+                            "[NO]BYPASSRLS" ]
+
+    Note: "[NO]BYPASSRLS" role attribute introduced in 9.5
+    Note: "[NO]CREATEUSER" role attribute is deprecated.
+
+    """
+    flags = frozenset(role.upper() for role in role_attr_flags.split(',') if role)
+
+    valid_flags = frozenset(itertools.chain(FLAGS, get_valid_flags_by_version(srv_version)))
+    valid_flags = frozenset(itertools.chain(valid_flags, ('NO%s' % flag for flag in valid_flags)))
+
+    if not flags.issubset(valid_flags):
+        raise InvalidFlagsError('Invalid role_attr_flags specified: %s' %
+                                ' '.join(flags.difference(valid_flags)))
+
+    return ' '.join(flags)
+
+
+def get_valid_flags_by_version(srv_version):
+    """
+    Some role attributes were introduced after certain versions. We want to
+    compile a list of valid flags against the current Postgres version.
+    """
+    return [
+        flag
+        for flag, version_introduced in FLAGS_BY_VERSION.items()
+        if srv_version >= version_introduced
+    ]
+
+
+def need_to_change_role_attr_flags(role_attr_flags, current_role_attrs):
+    # Compare the desired role_attr_flags and current ones.
+    # If they don't match, return True which means
+    # they need to be updated, False otherwise.
+
+    role_attr_flags_changing = False
+    if role_attr_flags:
+        role_attr_flags_dict = {}
+        for r in role_attr_flags.split(' '):
+            if r.startswith('NO'):
+                role_attr_flags_dict[r.replace('NO', '', 1)] = False
+            else:
+                role_attr_flags_dict[r] = True
+
+        for role_attr_name, role_attr_value in role_attr_flags_dict.items():
+            if current_role_attrs[PRIV_TO_AUTHID_COLUMN[role_attr_name]] != role_attr_value:
+                role_attr_flags_changing = True
+
+    return role_attr_flags_changing
+
+
+def compare_user_configurations(current, desired, reset_unspec_config):
+    """Compares two configurations and returns a list of values to reset as well as a dict of parameters to update."""
+    reset = []
+    update = desired.copy()
+
+    # check each item in the current configuration
+    for key, value in current.items():
+        # we already have the correct setting
+        if key in desired and value == desired[key]:
+            # so we can remove it from the list
+            del update[key]
+        # if the key is not in the list of settings we want, and we reset unspecified parameters
+        elif key not in desired and reset_unspec_config:
+            # we will reset it on the database
+            reset.append(key)
+        # if the setting is not in the db or has the wrong value, it will get updated
+
+    return {"reset": reset, "update": update}
+
+
+def parse_user_configuration(module, configs):
+    """Parses configuration from a list of 'key=value' strings like returned from the database to a dict."""
+    if configs is not None:
+        try:
+            # parses a list of "key=value" strings to a dict
+            return {t[0]: t[1] for t in map(lambda s: s.split("=", 1), configs)}
+        except IndexError:
+            module.fail_json(
+                msg="Expecting a list of strings where each string has the format 'key=value'.")
+    else:
+        return {}
+
+
+class ScramVerifier(object):
+    """Check plain text passwords against SCRAM-SHA-256 verifiers.
+
+    Computing the ServerKey takes one PBKDF2 run with the verifier's
+    iteration count (4096 by default) per check. When cache_path is set,
+    successful checks are remembered in a local file, so passwords that
+    have not changed since the last run are checked without PBKDF2.
+
+    The cache keys are SHA-256 hashes of the role name, the verifier
+    and the password, the file is created with 0600 permissions
+    and the least recently used entries are evicted when it is full.
+    """
+
+    def __init__(self, module, cache_path=None, cache_size=SCRAM_CACHE_SIZE):
+        self.module = module
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_modified = False
+        self.stats = dict(checked=0, cache_hits=0, duration_ms=0.0)
+        if cache_path:
+            self.__load_cache()
+
+    def matches(self, role, password, verifier):
+        """Check if the password matches the verifier stored for the role.
+
+        Raises ValueError if the verifier is not a SCRAM-SHA-256 one.
+        """
+        r = re.match(SCRAM_SHA256_REGEX, verifier)
+        if not r:
+            raise ValueError('Not a SCRAM-SHA-256 verifier')
+
+        start = time.time()
+        self.stats['checked'] += 1
+        try:
+            key = None
+            if self.cache_path:
+                key = self.__cache_key(role, password, verifier)
+                if key in self.cache:
+                    # Move the entry to the end, so it is evicted last.
+                    # Hits alone do not rewrite the file, the new order
+                    # is saved only with added or evicted entries:
+                    del self.cache[key]
+                    self.cache[key] = True
+                    self.stats['cache_hits'] += 1
+                    return True
+
+            # extract SCRAM params from rolpassword
+            it = int(r.group(1))
+            salt = b64decode(r.group(2))
+            server_key = b64decode(r.group(4))
+            # we'll never need `storedKey` as it is only used for server auth in SCRAM
+            # storedKey = b64decode(r.group(3))
+
+            # from RFC5802 https://tools.ietf.org/html/rfc5802#section-3
+            # SaltedPassword  := Hi(Normalize(password), salt, i)
+            # ServerKey       := HMAC(SaltedPassword, "Server Key")
+            normalized_password = saslprep.saslprep(to_text(password))
+            salted_password = pbkdf2_hmac('sha256', to_bytes(normalized_password), salt, it)
+
+            server_key_verifier = hmac.new(salted_password, digestmod=sha256)
+            server_key_verifier.update(b'Server Key')
+
+            if server_key_verifier.digest() != server_key:
+                return False
+
+            if key is not None:
+                self.cache[key] = True
+                self.cache_modified = True
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+            return True
+        finally:
+            self.stats['duration_ms'] = round(self.stats['duration_ms'] + (time.time() - start) * 1000, 3)
+
+    def save(self):
+        """Write the cache file if the cache has changed. Does nothing in check mode."""
+        if not self.cache_path or not self.cache_modified or self.module.check_mode:
+            return
+
+        cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.scram_cache')
+            # Set the permissions before writing anything. The file is renamed
+            # rather than moved with atomic_move(), which would apply the umask
+            # or the permissions of the replaced file:
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(version=1, entries=list(self.cache)), f)
+            os.rename(tmp_path, self.cache_path)
+        except (IOError, OSError) as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.module.warn("Cannot write SCRAM verifier cache %s: %s" % (self.cache_path, to_native(e)))
+
+    @staticmethod
+    def __cache_key(role, password, verifier):
+        h = sha256()
+        for part in (role, verifier, password):
+            h.update(to_bytes(part, errors='surrogate_or_strict'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def __load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            for key in data['entries'][-self.cache_size:]:
+                self.cache[key] = True
+        except (IOError, OSError, ValueError, KeyError, TypeError) as e:
+            self.module.warn("Cannot read SCRAM verifier cache %s, "
+                             "starting with an empty one: %s" % (self.cache_path, to_native(e)))
+            self.cache = OrderedDict()
+
+
+def get_passwd_encryption(cursor):
+    cursor.execute("SHOW password_encryption")
+    return cursor.fetchone()["password_encryption"]
+
+
+def user_should_we_change_password(cursor, current_role_attrs, user, password, encrypted, scram_verifier=None,
+                                   passwd_encryption=None):
+    """Check if we should change the user's password.
+
+    Compare the proposed password with the existing one, comparing
+    hashes if encrypted. If we can't access it assume yes.
+    SCRAM verifiers are checked with scram_verifier (a ScramVerifier object)
+    when it is passed. passwd_encryption is the value of the password_encryption
+    setting, it is read from the server when it is not passed.
+    """
+
+    if current_role_attrs is None:
+        # on some databases, E.g. AWS RDS instances, there is no access to
+        # the pg_authid relation to check the pre-existing password, so we
+        # just assume password is different
+        return True
+
+    # Do we actually need to do anything?
+    pwchanging = False
+    if password is not None:
+        current_password = current_role_attrs['rolpassword']
+        # Handle SQL_ASCII encoded databases
+        if isinstance(current_password, bytes):
+            current_password = current_password.decode('ascii')
+
+        # Empty password means that the role shouldn't have a password, which
+        # means we need to check if the current password is None.
+        if password == '':
+            if current_password is not None:
+                pwchanging = True
+        # If the provided password is a SCRAM hash, compare it directly to the current password
+        elif re.match(SCRAM_SHA256_REGEX, password):
+            if password != current_password:
+                pwchanging = True
+
+        # SCRAM hashes are represented as a special object, containing hash data:
+        # `SCRAM-SHA-256$<iteration count>:<salt>$<StoredKey>:<ServerKey>`
+        # for reference, see https://www.postgresql.org/docs/current/catalog-pg-authid.html
+        elif current_password is not None \
+                and HAS_PBKDF2 \
+                and re.match(SCRAM_SHA256_REGEX, current_password):
+
+            if scram_verifier is None:
+                scram_verifier = ScramVerifier(None)
+
+            try:
+                if not scram_verifier.matches(user, password, current_password):
+                    pwchanging = True
+            except Exception:
+                # We assume the password is not scram encrypted
+                # or we cannot check it properly, e.g. due to missing dependencies
+                pwchanging = True
+
+        # When the provided password looks like a MD5-hash, value of
+        # 'encrypted' is ignored.
+        elif is_pg_passwd_md5(password) or encrypted == 'UNENCRYPTED':
+            if password != current_password:
+                pwchanging = True
+        elif encrypted == 'ENCRYPTED':
+            default_pw_encryption = passwd_encryption or get_passwd_encryption(cursor)
+
+            if default_pw_encryption == 'md5':
+                hashed_password = 'md5{0}'.format(md5(to_bytes(password) + to_bytes(user)).hexdigest())
+                if hashed_password != current_password:
+                    pwchanging = True
+            elif default_pw_encryption == 'scram-sha-256':
+                # https://github.com/ansible-collections/community.postgresql/issues/688
+                # When the current password is not none and is not
+                # hashed as scram-sha-256 / not explicitly declared as plain text
+                # (if we are here, these conditions should be met)
+                # but the default password encryption is scram-sha-256, update the password.
+                # Can be relevant when migrating from older version of postgres.
+                pwchanging = True
+
+    return pwchanging
+
+
+def is_pg_passwd_md5(password):
+    # 32: MD5 hashes are represented as a sequence of 32 hexadecimal digits
+    #  3: The size of the 'md5' prefix
+    return True if password.startswith('md5') and len(password) == 32 + 3 else False
+
+
 class PgRole():
     def __init__(self, module, cursor, name):
         self.module = module
@@ -376,22 +882,19 @@ class PgMembership(object):
         self.non_existent_roles = []
         self.changed = False
         self.__check_roles_exist()
+        self.memberof = self.__fetch_memberships()
 
     def grant(self):
         for group in self.groups:
             self.granted[group] = []
 
-            for role in self.target_roles:
-                role_obj = PgRole(self.module, self.cursor, role)
-                # If role is in a group now, pass:
-                if group in role_obj.memberof:
-                    continue
+        to_grant = dict((role, [g for g in self.groups if g not in self.memberof[role]])
+                        for role in self.target_roles)
 
-                query = 'GRANT "%s" TO "%s"' % (group, role)
-                self.changed = exec_sql(self, query, return_bool=True)
+        done = self.__exec_batches('GRANT', to_grant)
 
-                if self.changed:
-                    self.granted[group].append(role)
+        for group in self.groups:
+            self.granted[group] = [r for r in self.__unique_roles() if group in done[r]]
 
         return self.changed
 
@@ -399,49 +902,118 @@ class PgMembership(object):
         for group in self.groups:
             self.revoked[group] = []
 
-            for role in self.target_roles:
-                role_obj = PgRole(self.module, self.cursor, role)
-                # If role is not in a group now, pass:
-                if group not in role_obj.memberof:
-                    continue
+        to_revoke = dict((role, [g for g in self.groups if g in self.memberof[role]])
+                         for role in self.target_roles)
 
-                query = 'REVOKE "%s" FROM "%s"' % (group, role)
-                self.changed = exec_sql(self, query, return_bool=True)
+        done = self.__exec_batches('REVOKE', to_revoke)
 
-                if self.changed:
-                    self.revoked[group].append(role)
+        for group in self.groups:
+            self.revoked[group] = [r for r in self.__unique_roles() if group in done[r]]
 
         return self.changed
 
     def match(self):
+        return self.match_roles(dict((role, self.groups) for role in self.target_roles))
+
+    def match_roles(self, role_groups):
+        """Make every target role a member of exactly its desired groups.
+
+        Args:
+            role_groups (dict) -- role name: list of desired group names,
+                target roles that are not in the dict are left untouched
+
+        Returns True if anything has been changed, False otherwise.
+        """
+        to_revoke = {}
+        to_grant = {}
         for role in self.target_roles:
-            role_obj = PgRole(self.module, self.cursor, role)
-
-            desired_groups = set(self.groups)
-            current_groups = set(role_obj.memberof)
-            # 1. Get groups that the role is member of but not in self.groups and revoke them
-            groups_to_revoke = current_groups - desired_groups
-            for group in groups_to_revoke:
-                query = 'REVOKE "%s" FROM "%s"' % (group, role)
-                self.changed = exec_sql(self, query, return_bool=True)
-                if group in self.revoked:
-                    self.revoked[group].append(role)
-                else:
-                    self.revoked[group] = [role]
-
-            # 2. Filter out groups that in self.groups and
-            # the role is already member of and grant the rest
-            groups_to_grant = desired_groups - current_groups
-            for group in groups_to_grant:
-                query = 'GRANT "%s" TO "%s"' % (group, role)
-                self.changed = exec_sql(self, query, return_bool=True)
-                if group in self.granted:
-                    self.granted[group].append(role)
-                else:
-                    self.granted[group] = [role]
+            desired = role_groups.get(role)
+            if desired is None:
+                to_revoke[role] = []
+                to_grant[role] = []
+                continue
+
+            # 1. Get groups that the role is member of but not desired and revoke them
+            to_revoke[role] = sorted(self.memberof[role] - set(desired))
+            # 2. Filter out desired groups the role is already member of and grant the rest
+            to_grant[role] = [g for g in desired if g not in self.memberof[role]]
+
+        revoked = self.__exec_batches('REVOKE', to_revoke)
+        granted = self.__exec_batches('GRANT', to_grant)
+
+        for role in self.__unique_roles():
+            for group in revoked[role]:
+                self.revoked.setdefault(group, []).append(role)
+
+            for group in granted[role]:
+                self.granted.setdefault(group, []).append(role)
 
         return self.changed
 
+    def __exec_batches(self, action, role_groups):
+        """Grant or revoke groups using as few statements as possible.
+
+        Roles that need the same list of groups are handled
+        by one GRANT / REVOKE statement.
+
+        Args:
+            action (str) -- GRANT or REVOKE
+            role_groups (dict) -- role name: list of group names
+
+        Returns a dict with the role names as keys and lists of groups as values.
+        """
+        batches = []
+        batch_idx = {}
+        for role in self.__unique_roles():
+            groups = tuple(role_groups[role])
+            if not groups:
+                continue
+
+            if groups not in batch_idx:
+                batch_idx[groups] = len(batches)
+                batches.append((groups, []))
+
+            batches[batch_idx[groups]][1].append(role)
+
+        done = dict((role, []) for role in self.target_roles)
+        for groups, roles in batches:
+            query = '%s %s %s %s' % (action, ', '.join('"%s"' % g for g in groups),
+                                     'TO' if action == 'GRANT' else 'FROM',
+                                     ', '.join('"%s"' % r for r in roles))
+            if exec_sql(self, query, return_bool=True):
+                self.changed = True
+                for role in roles:
+                    done[role].extend(groups)
+
+        return done
+
+    def __unique_roles(self):
+        """Return target roles without duplicates keeping their order."""
+        seen = set()
+        return [r for r in self.target_roles if not (r in seen or seen.add(r))]
+
+    def __fetch_memberships(self):
+        """Get groups of all target roles in one query.
+
+        Returns a dict with the role names as keys and sets of groups as values.
+        """
+        memberof = dict((role, set()) for role in self.target_roles)
+        if not self.target_roles:
+            return memberof
+
+        query = ("SELECT r.rolname AS member, b.rolname AS groupname "
+                 "FROM pg_catalog.pg_auth_members m "
+                 "JOIN pg_catalog.pg_roles b ON (m.roleid = b.oid) "
+                 "JOIN pg_catalog.pg_roles r ON (m.member = r.oid) "
+                 "WHERE r.rolname = ANY(%(roles)s)")
+
+        res = exec_sql(self, query, query_params={'roles': self.target_roles},
+                       add_to_executed=False)
+        for row in res:
+            memberof[row["member"]].add(row["groupname"])
+
+        return memberof
+
     def __check_roles_exist(self):
         if self.groups:
             existent_groups = self.__roles_exist(self.groups)
@@ -478,9 +1050,9 @@ class PgMembership(object):
         self.target_roles = [r for r in self.target_roles if r not in self.non_existent_roles]
 
     def __roles_exist(self, roles):
-        tmp = ["'" + x + "'" for x in roles]
-        query = "SELECT rolname FROM pg_roles WHERE rolname IN (%s)" % ','.join(tmp)
-        return [x["rolname"] for x in exec_sql(self, query, add_to_executed=False)]
+        query = "SELECT rolname FROM pg_roles WHERE rolname = ANY(%(roles)s)"
+        return [x["rolname"] for x in exec_sql(self, query, query_params={'roles': list(roles)},
+                                               add_to_executed=False)]
 
 
 def set_search_path(cursor, search_path):
@@ -546,6 +1118,131 @@ def convert_to_supported(val):
     return val  # By default returns the same value
 
 
+class RowConverter(object):
+    """Convert rows fetched from a cursor to types supported by Ansible.
+
+    Columns that need conversion are determined once by their type OIDs
+    from the cursor description, not by checking every fetched value.
+
+    Args:
+        cursor (Psycopg cursor) -- cursor the rows are fetched from.
+
+    Kwargs:
+        compact (bool) -- return rows as lists of values instead of
+            dictionaries in column:value form (default False).
+    """
+
+    def __init__(self, cursor, compact=False):
+        self.cursor = cursor
+        self.compact = compact
+        self.columns = None
+        self.convert_idx = None
+        self.convert_keys = None
+
+    def _init_columns(self):
+        # The description of named cursors is available
+        # only after the first fetch, so it's done lazily
+        description = self.cursor.description or []
+        self.columns = [col[0] for col in description]
+        self.convert_idx = [i for i, col in enumerate(description)
+                            if col[1] in TYPE_OIDS_NEED_TO_CONVERT]
+        self.convert_keys = [self.columns[i] for i in self.convert_idx]
+
+    def get_columns(self):
+        """Return the column names, or None if the query does not return rows."""
+        if self.cursor.description is None:
+            return None
+
+        if self.columns is None:
+            self._init_columns()
+
+        return self.columns
+
+    def convert(self, row):
+        """Convert one row.
+
+        Args:
+            row (dict or DictRow) -- row fetched from the cursor.
+
+        Returns a dict or, if compact, a list.
+        """
+        if self.columns is None:
+            self._init_columns()
+
+        if self.compact:
+            row = list(row.values())
+            for i in self.convert_idx:
+                row[i] = convert_to_supported(row[i])
+        else:
+            row = dict(row)
+            for key in self.convert_keys:
+                row[key] = convert_to_supported(row[key])
+
+        return row
+
+
+class _ChunkReader(object):
+    """File-like object reading from an iterable of chunks.
+
+    Used to feed psycopg2's copy_expert() that needs an object with read().
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buf) < size:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                break
+
+            if not self.buf:
+                self.buf = chunk
+            else:
+                self.buf += chunk
+
+        if size < 0 or size >= len(self.buf):
+            data, self.buf = self.buf, self.buf[:0]
+        else:
+            data, self.buf = self.buf[:size], self.buf[size:]
+
+        return data
+
+
+def copy_from_stdin(cursor, query, chunks):
+    """Run COPY ... FROM STDIN sending data chunk by chunk.
+
+    Args:
+        cursor (Psycopg cursor) -- Database cursor object.
+        query (str) -- COPY ... FROM STDIN statement.
+        chunks (iterable) -- Data chunks (str or bytes).
+    """
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        with cursor.copy(query) as copy:
+            for chunk in chunks:
+                copy.write(chunk)
+    else:
+        cursor.copy_expert(query, _ChunkReader(chunks))
+
+
+def copy_to_stdout(cursor, query, file_obj):
+    """Run COPY ... TO STDOUT writing data chunk by chunk.
+
+    Args:
+        cursor (Psycopg cursor) -- Database cursor object.
+        query (str) -- COPY ... TO STDOUT statement.
+        file_obj (file-like object) -- Object with write() accepting bytes.
+    """
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        with cursor.copy(query) as copy:
+            for chunk in copy:
+                file_obj.write(chunk)
+    else:
+        cursor.copy_expert(query, file_obj)
+
+
 def get_server_version(conn):
     """Get server version.
 
@@ -17,6 +17,7 @@ description:
   - Allows to change a PostgreSQL server configuration parameter.
   - The module uses ALTER SYSTEM command and applies changes by reload server configuration.
   - Some parameters require PostgreSQL to restart. See the RV(restart_required) return value.
+  - Several parameters can be changed at once with O(params), the configuration is reloaded only once then.
 
 version_added: '3.13.0'
 
@@ -24,8 +25,8 @@ options:
   param:
     description:
     - Name of PostgreSQL server parameter.
+    - Required unless O(params) is used, mutually exclusive with O(params).
     type: str
-    required: true
 
   value:
     description:
@@ -35,8 +36,19 @@ options:
     - Use V(_RESET) to run the C(ALTER SYSTEM RESET param) which will remove
       a corresponding entry from C(postgresql.auto.conf). Always returns C(changed=True).
     - For boolean parameters, pass the V("on") or V("off") string.
+    - Required with O(param), mutually exclusive with O(params).
     type: str
-    required: true
+
+  params:
+    description:
+    - Dictionary of parameter names and values to set, see O(param) and O(value).
+    - The C(pg_catalog.pg_settings) entries of all the parameters are fetched with one query,
+      all the values are checked before changing any parameter, only the parameters whose
+      values differ are set, and the configuration is reloaded once.
+    - List values are joined with commas, for example for C(shared_preload_libraries).
+    - See the RV(params_results), RV(reload_params), and RV(restart_params) return values.
+    type: dict
+    version_added: '4.3.0'
 
   session_role:
     description:
@@ -103,6 +115,26 @@ EXAMPLES = r'''
     param: work_mem
     value: _RESET
 
+- name: Tune a fresh instance with one task
+  community.postgresql.postgresql_alter_system:
+    params:
+      shared_buffers: 4GB
+      effective_cache_size: 12GB
+      work_mem: 64MB
+      maintenance_work_mem: 1GB
+      random_page_cost: 1.1
+      log_min_duration_statement: 1s
+      wal_compression: 'on'
+      shared_preload_libraries:
+        - pg_stat_statements
+  register: tuning
+
+- name: Restart PostgreSQL if one of the parameters requires it
+  ansible.builtin.service:
+    name: postgresql
+    state: restarted
+  when: tuning.restart_required
+
 - name: Set TimeZone parameter (careful, case sensitive)
   community.postgresql.postgresql_alter_system:
     param: TimeZone
@@ -114,7 +146,7 @@ attrs:
   description:
   - Parameter attributes from C(pg_catalog.pg_settings)
     that do not change.
-  returned: success
+  returned: success and O(param) is used
   type: dict
   sample: {
     'unit': 'kB',
@@ -130,7 +162,7 @@ diff:
   - Each key contains a dictionary of key-value pairs
     representing changeable columns and values for the parameter
     obtained from the pg_catalog.pg_settings relation.
-  returned: success
+  returned: success and O(param) is used
   type: dict
   sample: {
     'before': {
@@ -158,9 +190,49 @@ restart_required:
   - Indicates if restart of PostgreSQL is required or not.
   - Added here for convenience. Can be also determined from
     the diff["after"]["pending_restart"] return value.
+  - With O(params), it is true if any of the parameters requires a restart.
   returned: success
   type: bool
   sample: true
+
+params_results:
+  description:
+  - Results by parameter name when O(params) is used.
+  - Every result contains C(changed), C(attrs) and C(diff) like the RV(attrs) and RV(diff)
+    return values, and C(restart_required).
+  - In the check mode, C(restart_required) is true for the changed parameters
+    of the C(postmaster) context.
+  returned: success and O(params) is used
+  type: dict
+  version_added: '4.3.0'
+  sample: {
+    'work_mem': {
+      'changed': true,
+      'attrs': {'unit': 'kB', 'context': 'user', 'vartype': 'integer',
+                'min_val': 64, 'max_val': 2147483647, 'boot_val': 4096, 'enumvals': null},
+      'diff': {'before': {'setting': 4096, 'pending_restart': false},
+               'after': {'setting': 65536, 'pending_restart': false}},
+      'restart_required': false,
+    }
+  }
+
+reload_params:
+  description:
+  - Names of the changed parameters that took effect with the configuration reload.
+  returned: success and O(params) is used
+  type: list
+  elements: str
+  version_added: '4.3.0'
+  sample: ['work_mem']
+
+restart_params:
+  description:
+  - Names of the parameters that require a restart of PostgreSQL to take effect.
+  returned: success and O(params) is used
+  type: list
+  elements: str
+  version_added: '4.3.0'
+  sample: ['shared_buffers']
 '''
 
 from ansible.module_utils.basic import AnsibleModule
@@ -616,13 +688,15 @@ class PgParam():
     some kind of normalization of the values that we
     do in the value classes (not for every kind of parameter).
     """
-    def __init__(self, module, cursor, name, pg_ver):
+    def __init__(self, module, cursor, name, pg_ver, attrs=None):
         self.module = module
         self.cursor = cursor
         self.name = name
         self.pg_ver = pg_ver
 
-        self.attrs = self.get_attrs()
+        # The attrs can be passed when they were fetched
+        # for several parameters at once by get_settings
+        self.attrs = attrs if attrs is not None else self.get_attrs()
         # For some type of context it's impossible
         # to change settings with ALTER SYSTEM and
         # for some service restart is required
@@ -639,7 +713,15 @@ class PgParam():
         # the desired and the current values
         self.desired_value = None
 
-    def set(self, value):
+    def set(self, value, reload=True):
+        if self.needs_change(value):
+            query = self.__construct_alter_system_query(value)
+            self.__exec_set_sql(query, reload)
+            return True
+
+        return False
+
+    def needs_change(self, value):
         self.desired_value = build_value_class(self.module, self.name,
                                                value,
                                                self.attrs["unit"],
@@ -648,14 +730,9 @@ class PgParam():
 
         # Compare normalized values of the desired and the current
         # values to decide whether we need to do any real job
-        if self.desired_value.normalized != self.init_value.normalized:
-            query = self.__construct_alter_system_query(value)
-            self.__exec_set_sql(query)
-            return True
-
-        return False
+        return self.desired_value.normalized != self.init_value.normalized
 
-    def reset(self):
+    def reset(self, reload=True):
         # As the value is "_RESET", i.e. a string, and
         # the module always return changed=true, we just instantiate
         # the desired value as if it would be a value of string type
@@ -668,7 +745,7 @@ class PgParam():
         # this will always run the command to ensure the removal
         # and report changed=true
         query = "ALTER SYSTEM RESET %s" % self.name
-        self.__exec_set_sql(query)
+        self.__exec_set_sql(query, reload)
         return True
 
     def get_attrs(self):
@@ -735,7 +812,7 @@ class PgParam():
             self.cursor.close()
         return None
 
-    def __exec_set_sql(self, query):
+    def __exec_set_sql(self, query, reload=True):
         """Execute ALTER SYSTEM kind of queries."""
         try:
             executed_queries.append(query)
@@ -744,13 +821,92 @@ class PgParam():
         except Exception as e:
             self.module.fail_json(msg="Cannot set %s: %s" % (self.name, to_native(e)))
 
-        try:
-            query = "SELECT pg_reload_conf()"
-            executed_queries.append(query)
-            if not self.module.check_mode:
-                self.cursor.execute(query)
-        except Exception as e:
-            self.module.fail_json(msg="Cannot run 'SELECT pg_reload_conf()': %s" % to_native(e))
+        if reload:
+            reload_conf(self.module, self.cursor)
+
+
+def reload_conf(module, cursor):
+    """Reload the server configuration."""
+    try:
+        query = "SELECT pg_reload_conf()"
+        executed_queries.append(query)
+        if not module.check_mode:
+            cursor.execute(query)
+    except Exception as e:
+        module.fail_json(msg="Cannot run 'SELECT pg_reload_conf()': %s" % to_native(e))
+
+
+def get_settings(module, cursor, names):
+    """Fetch the pg_catalog.pg_settings entries of all
+    the parameters with a single query.
+
+    Returns a dictionary of the entries by parameter name.
+    """
+    query = ("SELECT name, setting, unit, context, vartype, enumvals, "
+             "boot_val, min_val, max_val, pending_restart "
+             "FROM pg_catalog.pg_settings WHERE name = ANY(%s)")
+    try:
+        cursor.execute(query, (list(names),))
+        res = cursor.fetchall()
+    except Exception as e:
+        module.fail_json(msg="Cannot execute SQL '%s': %s" % (query, to_native(e)))
+
+    settings = {}
+    for row in res:
+        attrs = dict(row)
+        settings[attrs.pop("name")] = attrs
+
+    missing = [name for name in names if name not in settings]
+    if missing:
+        module.fail_json(msg="Parameters %s do not exist" % ', '.join(missing))
+
+    return settings
+
+
+def set_params(module, cursor, params, pg_ver):
+    """Set or reset several parameters and reload
+    the configuration once if any of them changed.
+
+    All the values are normalized and compared before
+    running any ALTER SYSTEM, so an invalid value fails
+    the module without changing anything.
+
+    Returns a tuple of the PgParam objects by parameter name
+    and the list of the names of the changed parameters.
+    """
+    settings = get_settings(module, cursor, params)
+
+    pg_params = {}
+    to_change = []
+    for name, value in params.items():
+        pg_params[name] = PgParam(module, cursor, name, pg_ver, attrs=settings[name])
+        if value == "_RESET" or pg_params[name].needs_change(value):
+            to_change.append(name)
+
+    for name in to_change:
+        if params[name] == "_RESET":
+            pg_params[name].reset(reload=False)
+        else:
+            pg_params[name].set(params[name], reload=False)
+
+    if to_change:
+        reload_conf(module, cursor)
+
+    return pg_params, to_change
+
+
+def normalize_params(params):
+    """Convert the values of the params option to strings
+    the way Ansible does it for the value option.
+    Lists are joined like the values of list parameters
+    such as shared_preload_libraries.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, list):
+            value = ', '.join(to_native(elem) for elem in value)
+        normalized[name] = to_native(value)
+    return normalized
 
 
 def build_ret_attrs(param_attrs):
@@ -768,6 +924,41 @@ def build_ret_attrs(param_attrs):
     }
 
 
+def build_params_results(module, pg_params, settings_after, changed_params):
+    """Builds the params_results return value and the lists of the
+    parameters which took effect with the configuration reload
+    and of the ones which require a restart of PostgreSQL.
+    """
+    results = {}
+    reload_params = []
+    restart_params = []
+    for name, pg_param in pg_params.items():
+        attrs_before = convert_ret_vals(dict(pg_param.attrs))
+        attrs_after = convert_ret_vals(dict(settings_after[name]))
+        changed = name in changed_params or attrs_before != attrs_after
+
+        # In the check mode nothing is changed, so pending_restart
+        # cannot tell if a restart would be required
+        if module.check_mode:
+            restart_required = changed and attrs_before["context"] == "postmaster"
+        else:
+            restart_required = attrs_after["pending_restart"]
+
+        if restart_required:
+            restart_params.append(name)
+        elif name in changed_params:
+            reload_params.append(name)
+
+        results[name] = {
+            "changed": changed,
+            "attrs": build_ret_attrs(attrs_before),
+            "diff": build_ret_diff(attrs_before, attrs_after),
+            "restart_required": restart_required,
+        }
+
+    return results, reload_params, restart_params
+
+
 def build_ret_diff(param_attrs_before, param_attrs_after):
     """Extracts and returns mutable attributes
     that we return to users as the diff return value.
@@ -791,30 +982,41 @@ def build_ret_diff(param_attrs_before, param_attrs_after):
 def main():
     argument_spec = postgres_common_argument_spec()
     argument_spec.update(
-        param=dict(type='str', required=True),
+        param=dict(type='str'),
         login_db=dict(type='str'),
-        value=dict(type='str', required=True),
+        value=dict(type='str'),
+        params=dict(type='dict'),
         session_role=dict(type='str'),
         trust_input=dict(type='bool', default=True),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
+        mutually_exclusive=[('param', 'params'), ('value', 'params')],
+        required_together=[('param', 'value')],
+        required_one_of=[('param', 'params')],
         supports_check_mode=True,
     )
 
     param = module.params['param']
     value = module.params['value']
+    params = module.params['params']
     session_role = module.params['session_role']
     trust_input = module.params['trust_input']
 
-    # There's at least one param that doesn't
-    # work well with ALTER SYSTEM SET.
-    # Add more to this function if you see any
-    check_problematic_params(module, param, value)
+    if params is not None:
+        if not params:
+            module.fail_json(msg="The params option must contain at least one parameter")
+        params = normalize_params(params)
 
-    if not trust_input:
-        # Check input for potentially dangerous elements
-        check_input(module, param, value, session_role)
+    for p_name, p_value in (params or {param: value}).items():
+        # There's at least one param that doesn't
+        # work well with ALTER SYSTEM SET.
+        # Add more to this function if you see any
+        check_problematic_params(module, p_name, p_value)
+
+        if not trust_input:
+            # Check input for potentially dangerous elements
+            check_input(module, p_name, p_value, session_role)
 
     # Ensure psycopg libraries are available before connecting to DB
     ensure_required_libs(module)
@@ -826,6 +1028,35 @@ def main():
     pg_ver = get_server_version(db_connection)
     check_pg_version(module, pg_ver)
 
+    if params:
+        # Fetch the settings of all the parameters with one query,
+        # apply the changed ones and reload the configuration once
+        pg_params, changed_params = set_params(module, cursor, params, pg_ver)
+
+        # Fetch info again to get diff.
+        # It doesn't see the changes w/o reconnect
+        cursor.close()
+        db_connection.close()
+        db_connection, dummy = connect_to_db(module, conn_params, autocommit=True)
+        cursor = db_connection.cursor(**pg_cursor_args)
+        settings_after = get_settings(module, cursor, params)
+
+        # Disconnect
+        cursor.close()
+        db_connection.close()
+
+        params_results, reload_params, restart_params = build_params_results(
+            module, pg_params, settings_after, changed_params)
+
+        module.exit_json(
+            changed=any(result["changed"] for result in params_results.values()),
+            executed_queries=executed_queries,
+            params_results=params_results,
+            reload_params=reload_params,
+            restart_params=restart_params,
+            restart_required=bool(restart_params),
+        )
+
     # We assume nothing has changed by default
     changed = False
 
@@ -26,6 +26,8 @@ options:
   copy_from:
     description:
     - Copy data from a file to a table (appending the data to whatever is in the table already).
+    - If I(client_side=true), it can also be a directory, all files in it
+      except hidden ones are loaded, see I(jobs).
     - Mutually exclusive with I(copy_to) and I(src).
     type: path
     aliases: [ from ]
@@ -53,6 +55,55 @@ options:
     - See block Examples and PROGRAM arg description U(https://www.postgresql.org/docs/current/sql-copy.html).
     type: bool
     default: false
+  client_side:
+    description:
+    - If C(true), the file is read or written by the module on the managed host
+      instead of by the PostgreSQL server, the data is streamed over the database
+      connection using C(COPY ... FROM STDIN) or C(COPY ... TO STDOUT).
+    - The data is transferred in fixed-size chunks, so memory usage does not depend on the file size.
+    - Does not require the file to be accessible by the server and the C(pg_read_server_files)
+      or C(pg_write_server_files) privileges.
+    - Mutually exclusive with I(program).
+    type: bool
+    default: false
+    version_added: '4.3.0'
+  compression:
+    description:
+    - Compression of the file when I(client_side=true).
+    - The file is decompressed (for I(copy_from)) or compressed (for I(copy_to)) on the fly.
+    - If C(auto), the compression is detected by the file suffix,
+      C(.gz) for C(gzip) and C(.zst) for C(zstd), otherwise it is C(none).
+    - C(zstd) requires the C(zstd) program to be installed on the managed host.
+    - Used with I(client_side=true) only.
+    type: str
+    choices: [ auto, none, gzip, zstd ]
+    default: auto
+    version_added: '4.3.0'
+  jobs:
+    description:
+    - Number of concurrent C(COPY FROM STDIN) streams, each one uses its own database connection.
+    - If I(copy_from) is a directory, the files are distributed between the streams.
+      If it is an uncompressed file, it is split into I(jobs) segments on line boundaries.
+      A compressed file cannot be split and is loaded using one stream.
+    - Splitting a file is not supported for the C(binary) format and for CSV values containing line breaks.
+      If the C(header) COPY option is set, it is applied to the first segment only.
+    - Every stream commits after loading a file or a segment,
+      so on failure the data loaded by the other streams stays in the table unless I(atomic=true).
+    - Used with I(copy_from) and I(client_side=true) only.
+    type: int
+    default: 1
+    version_added: '4.3.0'
+  atomic:
+    description:
+    - If C(true) and the data is loaded using I(jobs) streams or from a directory,
+      the streams load the data into an unlogged staging table that is then
+      moved to I(dst) and dropped in one transaction, so either all the data is loaded or nothing.
+    - The staging table contains only the loaded columns, that is, I(columns) or all the columns
+      of I(dst) except generated ones. The values of identity columns are loaded as COPY does.
+    - Requires the C(CREATE) privilege on the first schema in the C(search_path).
+    type: bool
+    default: false
+    version_added: '4.3.0'
   options:
     description:
     - Options of COPY command.
@@ -80,7 +131,9 @@ options:
     version_added: '0.2.0'
 notes:
 - Supports PostgreSQL version 9.4+.
-- COPY command is only allowed to database superusers.
+- COPY command is only allowed to database superusers
+  or members of C(pg_read_server_files)/C(pg_write_server_files) roles.
+  This does not apply to I(client_side=true).
 
 attributes:
   check_mode:
@@ -165,6 +218,32 @@ EXAMPLES = r'''
     options:
       delimiter: '|'
       null: 'N'
+
+- name: Load a gzip-compressed CSV file located on the managed host into acme table
+  community.postgresql.postgresql_copy:
+    copy_from: /tmp/data.csv.gz
+    dst: acme
+    client_side: true
+    options:
+      format: csv
+
+- name: Load all files from /tmp/acme_data into acme table using 4 concurrent streams, all or nothing
+  community.postgresql.postgresql_copy:
+    copy_from: /tmp/acme_data
+    dst: acme
+    client_side: true
+    jobs: 4
+    atomic: true
+    options:
+      format: csv
+
+- name: Dump acme table to a zstd-compressed file on the managed host
+  community.postgresql.postgresql_copy:
+    src: acme
+    copy_to: /tmp/data.csv.zst
+    client_side: true
+    options:
+      format: csv
 '''
 
 RETURN = r'''
@@ -183,21 +262,199 @@ dst:
   returned: success
   type: str
   sample: "/tmp/data.csv"
+copy_stats:
+  description:
+  - Statistics of the data transfer.
+  - C(bytes) is the amount of uncompressed data sent to or received from the server.
+  - When the data is loaded using several streams (see I(jobs)), C(workers) contains
+    the number of loaded files or segments (C(units)), rows, bytes, and duration of every stream.
+  returned: success and I(client_side=true)
+  type: dict
+  version_added: '4.3.0'
+  sample: {
+    "bytes": 58890,
+    "duration_ms": 31.8,
+    "rows": 1000,
+    "bytes_per_sec": 1851887.0,
+    "rows_per_sec": 31446.5
+  }
 '''
 
+import gzip
+import os
+import subprocess
+import threading
+import time
+
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_native
+from ansible.module_utils.six.moves import queue
 from ansible_collections.community.postgresql.plugins.module_utils.database import (
     check_input,
     pg_quote_identifier,
 )
 from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
     connect_to_db,
+    copy_from_stdin,
+    copy_to_stdout,
     ensure_required_libs,
     exec_sql, get_conn_params,
+    get_server_version,
     pg_cursor_args,
     postgres_common_argument_spec,
 )
 
+# Size of data chunks read from a file when client_side=true:
+COPY_CHUNK_SIZE = 64 * 1024
+
+COMPRESSION_SUFFIXES = (
+    ('.gz', 'gzip'),
+    ('.zst', 'zstd'),
+)
+
+
+def get_compression(path, compression):
+    """Return compression method of the file.
+
+    Arguments:
+        path (str) -- file path
+        compression (str) -- value of the compression param
+    """
+    if compression != 'auto':
+        return compression
+
+    for suffix, method in COMPRESSION_SUFFIXES:
+        if path.endswith(suffix):
+            return method
+
+    return 'none'
+
+
+def split_file(path, parts):
+    """Split the file into up to parts segments on line boundaries.
+
+    Return a list of (offset, length) tuples.
+
+    Arguments:
+        path (str) -- file path
+        parts (int) -- number of segments
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            pos = size * i // parts
+            if pos <= bounds[-1]:
+                continue
+
+            # Move to the beginning of the next line:
+            f.seek(pos - 1)
+            f.readline()
+            pos = f.tell()
+
+            if pos >= size:
+                break
+
+            if pos > bounds[-1]:
+                bounds.append(pos)
+
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(len(bounds) - 1)]
+
+
+class CopyStream(object):
+
+    """File on the managed host used as a client-side COPY data stream.
+
+    The data is decompressed or compressed on the fly
+    and the amount of uncompressed data is counted.
+
+    Raises IOError / OSError if the file cannot be opened.
+
+    Arguments:
+        path (str) -- file path
+        mode (str) -- 'rb' to read the file, 'wb' to write it
+        compression (str) -- none, gzip or zstd
+        zstd (str) -- path to the zstd program (when compression is zstd)
+        offset (int) -- read the file starting from this position
+            (uncompressed files only)
+        length (int) -- read only this number of bytes, None means till the end
+
+    Attributes:
+        bytes (int) -- amount of uncompressed data read or written
+    """
+
+    def __init__(self, path, mode, compression, zstd=None, offset=0, length=None):
+        self.path = path
+        self.length = length
+        self.bytes = 0
+        self.proc = None
+        self.out_file = None
+
+        if compression == 'gzip':
+            # Use the gzip program default level, 9 is much slower:
+            self.file = gzip.open(path, mode, compresslevel=6)
+
+        elif compression == 'zstd':
+            if mode == 'rb':
+                self.proc = subprocess.Popen([zstd, '-q', '-d', '-c', path],
+                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                self.file = self.proc.stdout
+            else:
+                self.out_file = open(path, 'wb')
+                self.proc = subprocess.Popen([zstd, '-q', '-c'], stdin=subprocess.PIPE,
+                                             stdout=self.out_file, stderr=subprocess.PIPE)
+                self.file = self.proc.stdin
+
+        else:
+            self.file = open(path, mode)
+            if offset:
+                self.file.seek(offset)
+
+    def chunks(self):
+        """Yield data chunks of up to COPY_CHUNK_SIZE bytes."""
+        remaining = self.length
+        while remaining is None or remaining > 0:
+            size = COPY_CHUNK_SIZE if remaining is None else min(COPY_CHUNK_SIZE, remaining)
+            chunk = self.file.read(size)
+            if not chunk:
+                return
+
+            if remaining is not None:
+                remaining -= len(chunk)
+
+            self.bytes += len(chunk)
+            yield chunk
+
+    def write(self, data):
+        """Write a data chunk."""
+        self.bytes += len(data)
+        self.file.write(data)
+
+    def close(self):
+        """Close the file and wait for the (de)compression program to finish.
+
+        Return an error message or None.
+        """
+        err = None
+        try:
+            self.file.close()
+        except (IOError, OSError) as e:
+            err = to_native(e)
+
+        if self.proc:
+            stderr = self.proc.stderr.read()
+            if self.proc.wait() != 0:
+                err = "zstd failed on %s: %s" % (self.path, to_native(stderr).strip())
+
+            self.proc.stderr.close()
+
+        if self.out_file:
+            self.out_file.close()
+
+        return err
+
 
 class PgCopyData(object):
 
@@ -206,6 +463,8 @@ class PgCopyData(object):
     Arguments:
         module (AnsibleModule) -- object of AnsibleModule class
         cursor (cursor) -- cursor object of psycopg library
+        conn_params (dict) -- connection parameters used to open
+            additional connections for parallel COPY FROM
 
     Attributes:
         module (AnsibleModule) -- object of AnsibleModule class
@@ -216,15 +475,18 @@ class PgCopyData(object):
         src (str) -- data source table (when copy_to)
         opt_need_quotes (tuple) -- values of these options must be passed
             to SQL in quotes
+        copy_stats (dict) -- data transfer statistics (when client_side)
     """
 
-    def __init__(self, module, cursor):
+    def __init__(self, module, cursor, conn_params=None):
         self.module = module
         self.cursor = cursor
+        self.conn_params = conn_params
         self.executed_queries = []
         self.changed = False
         self.dst = ''
         self.src = ''
+        self.copy_stats = {}
         self.opt_need_quotes = (
             'DELIMITER',
             'NULL',
@@ -238,30 +500,53 @@ class PgCopyData(object):
         self.src = self.module.params['copy_from']
         self.dst = self.module.params['dst']
 
-        query_fragments = ['COPY %s' % pg_quote_identifier(self.dst, 'table')]
+        query = self.__copy_from_query(self.dst)
 
-        if self.module.params.get('columns'):
-            query_fragments.append('(%s)' % ','.join(self.module.params['columns']))
+        # Note: check mode is implemented here:
+        if self.module.check_mode:
+            self.changed = self.__check_table(self.dst)
+
+            if self.changed:
+                self.executed_queries.append(query)
+        elif self.module.params.get('client_side') and (
+                self.module.params['jobs'] > 1 or os.path.isdir(self.src)):
+            self.__copy_from_parallel()
+        elif self.module.params.get('client_side'):
+            self.__copy_client_side(query, self.src, 'rb')
+        else:
+            if exec_sql(self, query, return_bool=True):
+                self.changed = True
+
+    def __copy_from_query(self, table, exclude_options=(), columns=None):
+        """Build COPY FROM query.
+
+        Arguments:
+            table (str) -- destination table
+            exclude_options (tuple) -- names of COPY options to omit
+            columns (list) -- columns to load, the columns option by default
+        """
+        query_fragments = ['COPY %s' % pg_quote_identifier(table, 'table')]
+
+        columns = columns or self.module.params.get('columns')
+        if columns:
+            query_fragments.append('(%s)' % ','.join(columns))
 
         query_fragments.append('FROM')
 
         if self.module.params.get('program'):
             query_fragments.append('PROGRAM')
 
-        query_fragments.append("'%s'" % self.src)
+        if self.module.params.get('client_side'):
+            query_fragments.append('STDIN')
+        else:
+            query_fragments.append("'%s'" % self.src)
 
         if self.module.params.get('options'):
-            query_fragments.append(self.__transform_options())
+            options = self.__transform_options(exclude_options)
+            if options:
+                query_fragments.append(options)
 
-        # Note: check mode is implemented here:
-        if self.module.check_mode:
-            self.changed = self.__check_table(self.dst)
-
-            if self.changed:
-                self.executed_queries.append(' '.join(query_fragments))
-        else:
-            if exec_sql(self, ' '.join(query_fragments), return_bool=True):
-                self.changed = True
+        return ' '.join(query_fragments)
 
     def copy_to(self):
         """Implements COPY TO command behavior."""
@@ -283,7 +568,10 @@ class PgCopyData(object):
         if self.module.params.get('program'):
             query_fragments.append('PROGRAM')
 
-        query_fragments.append("'%s'" % self.dst)
+        if self.module.params.get('client_side'):
+            query_fragments.append('STDOUT')
+        else:
+            query_fragments.append("'%s'" % self.dst)
 
         if self.module.params.get('options'):
             query_fragments.append(self.__transform_options())
@@ -294,17 +582,298 @@ class PgCopyData(object):
 
             if self.changed:
                 self.executed_queries.append(' '.join(query_fragments))
+        elif self.module.params.get('client_side'):
+            self.__copy_client_side(' '.join(query_fragments), self.dst, 'wb')
         else:
             if exec_sql(self, ' '.join(query_fragments), return_bool=True):
                 self.changed = True
 
-    def __transform_options(self):
-        """Transform options dict into a suitable string."""
+    def __copy_client_side(self, query, path, mode):
+        """Stream data between the file on the managed host and the server.
+
+        Arguments:
+            query (str) -- COPY ... FROM STDIN or COPY ... TO STDOUT statement
+            path (str) -- file path
+            mode (str) -- 'rb' for COPY FROM, 'wb' for COPY TO
+        """
+        compression = get_compression(path, self.module.params['compression'])
+        zstd = None
+        if compression == 'zstd':
+            zstd = self.module.get_bin_path('zstd', required=True)
+
+        try:
+            stream = CopyStream(path, mode, compression, zstd=zstd)
+        except (IOError, OSError) as e:
+            self.module.fail_json(msg="Cannot open file %s: %s" % (path, to_native(e)))
+
+        start_time = time.time()
+        try:
+            if mode == 'rb':
+                copy_from_stdin(self.cursor, query, stream.chunks())
+            else:
+                copy_to_stdout(self.cursor, query, stream)
+        except Exception as e:
+            stream.close()
+            self.module.fail_json(msg="Cannot execute SQL '%s': %s" % (query, to_native(e)))
+
+        err = stream.close()
+        duration = time.time() - start_time
+        if err:
+            self.module.fail_json(msg="Cannot copy data: %s" % err)
+
+        self.executed_queries.append(query)
+        self.changed = True
+
+        rows = max(self.cursor.rowcount, 0)
+        self.copy_stats = dict(
+            bytes=stream.bytes,
+            rows=rows,
+            duration_ms=round(duration * 1000, 3),
+            bytes_per_sec=round(stream.bytes / duration, 1) if duration else 0,
+            rows_per_sec=round(rows / duration, 1) if duration else 0,
+        )
+
+    def __copy_from_parallel(self):
+        """Load data with several concurrent COPY FROM STDIN streams.
+
+        Each stream uses its own connection and commits
+        after every loaded file or file segment.
+        If atomic is true, the data is loaded into a staging table first
+        and then moved to the destination table in one transaction.
+        """
+        units = self.__get_copy_units()
+        jobs = min(self.module.params['jobs'], len(units))
+
+        zstd = None
+        if any(unit['compression'] == 'zstd' for unit in units):
+            zstd = self.module.get_bin_path('zstd', required=True)
+
+        target = self.dst
+        staging = None
+        columns = None
+        if self.module.params['atomic']:
+            staging = 'ansible_copy_staging_%d' % os.getpid()
+            columns, overriding = self.__get_staging_columns()
+            # The staging table contains only the loaded columns
+            # without constraints, generated and identity columns:
+            exec_sql(self, 'CREATE UNLOGGED TABLE %s AS SELECT %s FROM %s WITH NO DATA' % (
+                pg_quote_identifier(staging, 'table'), ','.join(columns),
+                pg_quote_identifier(self.dst, 'table')), return_bool=True)
+            # Make the table visible to the other connections:
+            self.cursor.connection.commit()
+            target = staging
+
+        queries = {
+            True: self.__copy_from_query(target, columns=columns),
+            False: self.__copy_from_query(target, exclude_options=('header',), columns=columns),
+        }
+        self.executed_queries.append(queries[True])
+
+        units_queue = queue.Queue()
+        for unit in units:
+            units_queue.put(unit)
+
+        connections = []
+        moved = False
+        try:
+            workers = []
+            for i in range(jobs):
+                db_connection, dummy = connect_to_db(self.module, self.conn_params, autocommit=False)
+                connections.append(db_connection)
+                workers.append(dict(worker=i, units=0, rows=0, bytes=0, duration_ms=0))
+
+            abort = threading.Event()
+            threads = [threading.Thread(target=self.__copy_worker,
+                                        args=(connections[i], queries, units_queue, zstd, abort, workers[i]))
+                       for i in range(jobs)]
+
+            start_time = time.time()
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+            duration = time.time() - start_time
+
+            errors = [w.pop('error') for w in workers if 'error' in w]
+            self.copy_stats = self.__get_parallel_stats(workers, duration)
+
+            if errors:
+                self.module.fail_json(msg="Cannot copy data: %s" % '; '.join(errors),
+                                      copy_stats=self.copy_stats)
+
+            if staging:
+                move_query = 'INSERT INTO %s (%s)%s SELECT %s FROM %s' % (
+                    pg_quote_identifier(self.dst, 'table'), ','.join(columns),
+                    ' OVERRIDING SYSTEM VALUE' if overriding else '',
+                    ','.join(columns), pg_quote_identifier(staging, 'table'))
+                drop_query = 'DROP TABLE %s' % pg_quote_identifier(staging, 'table')
+                try:
+                    self.cursor.execute(move_query)
+                    self.cursor.execute(drop_query)
+                except Exception as e:
+                    self.module.fail_json(msg="Cannot execute SQL '%s': %s" % (move_query, to_native(e)),
+                                          copy_stats=self.copy_stats)
+
+                moved = True
+                self.executed_queries.extend([move_query, drop_query])
+
+        finally:
+            for db_connection in connections:
+                db_connection.close()
+
+            # The staging table has been committed before loading,
+            # so it must be dropped whatever happens, even if the module fails:
+            if staging and not moved:
+                self.__drop_staging_table(staging)
+
+        self.changed = True
+
+    def __get_staging_columns(self):
+        """Return a tuple of the list of columns loaded through the staging table
+        and whether the destination table has GENERATED ALWAYS identity columns.
+
+        If the columns option is not passed, these are all the columns
+        of the destination table except generated ones, as COPY does.
+        Identity columns are loaded like COPY does, so the values of
+        GENERATED ALWAYS ones must be inserted with OVERRIDING SYSTEM VALUE.
+        """
+        srv_version = get_server_version(self.cursor.connection)
+        query = ("SELECT attname, %s AS attidentity, %s AS attgenerated "
+                 "FROM pg_catalog.pg_attribute "
+                 "WHERE attrelid = %%(table)s::regclass AND attnum > 0 AND NOT attisdropped "
+                 "ORDER BY attnum" % ('attidentity' if srv_version >= 100000 else "''",
+                                      'attgenerated' if srv_version >= 120000 else "''"))
+        res = exec_sql(self, query, query_params={'table': pg_quote_identifier(self.dst, 'table')},
+                       add_to_executed=False)
+
+        overriding = any(row['attidentity'] == 'a' for row in res)
+        if self.module.params['columns']:
+            return self.module.params['columns'], overriding
+
+        return ['"%s"' % row['attname'].replace('"', '""') for row in res
+                if not row['attgenerated']], overriding
+
+    def __drop_staging_table(self, staging):
+        """Roll back the current transaction and drop the staging table."""
+        try:
+            self.cursor.connection.rollback()
+            self.cursor.execute('DROP TABLE IF EXISTS %s' % pg_quote_identifier(staging, 'table'))
+            self.cursor.connection.commit()
+        except Exception as e:
+            self.module.warn("Cannot drop the staging table %s: %s" % (staging, to_native(e)))
+
+    def __copy_worker(self, db_connection, queries, units_queue, zstd, abort, stats):
+        """Take files or file segments from the queue and load them.
+
+        Runs in a separate thread. Errors are put into stats['error'].
+        """
+        cursor = db_connection.cursor(**pg_cursor_args)
+        start_time = time.time()
+
+        while not abort.is_set():
+            try:
+                unit = units_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                stream = CopyStream(unit['path'], 'rb', unit['compression'], zstd=zstd,
+                                    offset=unit['offset'], length=unit['length'])
+            except (IOError, OSError) as e:
+                stats['error'] = "Cannot open file %s: %s" % (unit['path'], to_native(e))
+                abort.set()
+                break
+
+            try:
+                copy_from_stdin(cursor, queries[unit['offset'] == 0], stream.chunks())
+                err = stream.close()
+            except Exception as e:
+                stream.close()
+                err = to_native(e)
+
+            if err:
+                db_connection.rollback()
+                stats['error'] = "%s: %s" % (unit['path'], err)
+                abort.set()
+                break
+
+            db_connection.commit()
+            stats['units'] += 1
+            stats['rows'] += max(cursor.rowcount, 0)
+            stats['bytes'] += stream.bytes
+
+        stats['duration_ms'] = round((time.time() - start_time) * 1000, 3)
+        cursor.close()
+
+    def __get_copy_units(self):
+        """Return a list of files or file segments to load."""
+        compression = self.module.params['compression']
+
+        if os.path.isdir(self.src):
+            paths = sorted(os.path.join(self.src, name) for name in os.listdir(self.src)
+                           if not name.startswith('.') and os.path.isfile(os.path.join(self.src, name)))
+            if not paths:
+                self.module.fail_json(msg="Directory %s does not contain files" % self.src)
+
+            return [dict(path=path, offset=0, length=None,
+                         compression=get_compression(path, compression)) for path in paths]
+
+        compression = get_compression(self.src, compression)
+        if compression != 'none':
+            self.module.warn("Compressed file %s cannot be split, "
+                             "it is loaded using one stream" % self.src)
+            return [dict(path=self.src, offset=0, length=None, compression=compression)]
+
+        options = dict((key.lower(), str(val).lower()) for (key, val)
+                       in (self.module.params.get('options') or {}).items())
+        if options.get('format') == 'binary':
+            self.module.fail_json(msg="A file in binary format cannot be split, "
+                                      "pass a directory with several files instead")
+
+        try:
+            segments = split_file(self.src, self.module.params['jobs'])
+        except (IOError, OSError) as e:
+            self.module.fail_json(msg="Cannot open file %s: %s" % (self.src, to_native(e)))
+
+        return [dict(path=self.src, offset=offset, length=length, compression='none')
+                for (offset, length) in segments]
+
+    @staticmethod
+    def __get_parallel_stats(workers, duration):
+        """Summarize statistics of parallel COPY workers."""
+        rows = sum(w['rows'] for w in workers)
+        total_bytes = sum(w['bytes'] for w in workers)
+
+        return dict(
+            bytes=total_bytes,
+            rows=rows,
+            duration_ms=round(duration * 1000, 3),
+            bytes_per_sec=round(total_bytes / duration, 1) if duration else 0,
+            rows_per_sec=round(rows / duration, 1) if duration else 0,
+            workers=workers,
+        )
+
+    def __transform_options(self, exclude=()):
+        """Transform options dict into a suitable string.
+
+        Arguments:
+            exclude (tuple) -- names of options to omit (lowercase)
+        """
+        opt = []
         for (key, val) in self.module.params['options'].items():
+            if key.lower() in exclude:
+                continue
+
             if key.upper() in self.opt_need_quotes:
-                self.module.params['options'][key] = "'%s'" % val
+                val = "'%s'" % val
+
+            opt.append('%s %s' % (key, val))
+
+        if not opt:
+            return ''
 
-        opt = ['%s %s' % (key, val) for (key, val) in self.module.params['options'].items()]
         return '(%s)' % ', '.join(opt)
 
     def __check_table(self, table):
@@ -345,6 +914,10 @@ def main():
         columns=dict(type='list', elements='str', aliases=['column']),
         options=dict(type='dict'),
         program=dict(type='bool', default=False),
+        client_side=dict(type='bool', default=False),
+        compression=dict(type='str', default='auto', choices=['auto', 'none', 'gzip', 'zstd']),
+        jobs=dict(type='int', default=1),
+        atomic=dict(type='bool', default=False),
         login_db=dict(type='str', aliases=['db'], deprecated_aliases=[
             {
                 'name': 'db',
@@ -388,6 +961,15 @@ def main():
     elif module.params.get('copy_to') and not module.params.get('src'):
         module.fail_json(msg='src param is necessary with copy_to')
 
+    if module.params['client_side'] and module.params['program']:
+        module.fail_json(msg='client_side and program params are mutually exclusive')
+
+    if module.params['jobs'] < 1:
+        module.fail_json(msg='jobs must be greater than zero')
+
+    if module.params['jobs'] > 1 and not (module.params['client_side'] and module.params['copy_from']):
+        module.fail_json(msg='jobs is supported with copy_from and client_side=true only')
+
     # Ensure psycopg libraries are available before connecting to DB:
     ensure_required_libs(module)
     # Connect to DB and make cursor object:
@@ -397,7 +979,7 @@ def main():
 
     ##############
     # Create the object and do main job:
-    data = PgCopyData(module, cursor)
+    data = PgCopyData(module, cursor, conn_params)
 
     # Note: parameters like dst, src, etc. are got
     # from module object into data object of PgCopyData class.
@@ -420,12 +1002,16 @@ def main():
     db_connection.close()
 
     # Return some values:
-    module.exit_json(
+    kw = dict(
         changed=data.changed,
         queries=data.executed_queries,
         src=data.src,
         dst=data.dst,
     )
+    if module.params['client_side']:
+        kw['copy_stats'] = data.copy_stats
+
+    module.exit_json(**kw)
 
 
 if __name__ == '__main__':
@@ -82,10 +82,12 @@ options:
       pg_dump returns rc 1 in this case.
     - C(restore) also requires a target definition from which the database will be restored. (Added in Ansible 2.4).
     - The format of the backup will be detected based on the target name.
-    - Supported compression formats for dump and restore determined by target file format C(.pgc) (custom), C(.bz2) (bzip2), C(.gz) (gzip/pigz) and C(.xz) (xz).
+    - Supported compression formats for dump and restore determined by target file format C(.pgc) (custom), C(.bz2) (bzip2), C(.gz) (gzip/pigz),
+      C(.xz) (xz), C(.zst) (zstd/pzstd) and C(.lz4) (lz4). See I(compression) to select the compression program explicitly.
     - Supported formats for dump and restore determined by target file format C(.sql) (plain), C(.tar) (tar), C(.pgc) (custom) and C(.dir) (directory)
       For the directory format which is supported since collection version 1.4.0.
     - "Restore program is selected by target file format: C(.tar), C(.pgc), and C(.dir) are handled by pg_restore, other with pgsql."
+    - See I(jobs) for dumping and restoring in parallel.
     - "."
     - DEPRECATED (see the L(discussion,https://github.com/ansible-collections/community.postgresql/issues/820)).
       C(rename) is used to rename the database C(name) to C(target).
@@ -134,6 +136,127 @@ options:
       - Cannot be used with dump-file-format-related arguments like ``--format=d``.
     type: str
     version_added: '0.2.0'
+  jobs:
+    description:
+    - Number of parallel jobs to dump or restore the database with, passed to pg_dump or pg_restore as C(--jobs).
+    - Used when I(state) is C(dump) or C(restore) and greater than C(1).
+    - Only the directory format supports parallel dumps. If I(target) has no file extension,
+      the directory format is used. Other target formats cause an error.
+    - Parallel restores support the directory and the custom (C(.pgc)) format, and a I(target) without
+      file extension that is a directory. Other target formats cause an error.
+    - Every job opens its own connection, so the server must allow I(jobs) + 1 connections.
+    type: int
+    default: 1
+    version_added: '4.3.0'
+  compression:
+    description:
+    - Compression program to pipe the dump through, or to decompress the target with on restore.
+    - If not set, the program is selected by the file extension of I(target), see I(state).
+    - For the directory and the custom (C(.pgc)) format, pg_dump compresses the dump itself
+      with the C(--compress) option, so only C(gzip), C(pigz), C(zstd), C(pzstd) and C(lz4) can be used.
+      C(gzip) and C(pigz) select the default gzip compression of pg_dump, supported by all its versions.
+      C(zstd), C(pzstd) and C(lz4) require pg_dump 16 or later. On restore, pg_restore detects the compression
+      of these formats itself and the option is ignored.
+    - Used when I(state) is C(dump) or C(restore).
+    type: str
+    choices: [ bzip2, gzip, lz4, pigz, pzstd, xz, zstd ]
+    version_added: '4.3.0'
+  compression_level:
+    description:
+    - Compression level passed to the compression program, for example C(19) for zstd or C(9) for gzip.
+    - The level must be supported by the compression program, from C(1) to C(9) for gzip and bzip2,
+      C(0) to C(9) for pigz and xz, C(1) to C(22) for zstd and pzstd and C(1) to C(12) for lz4.
+      C(--ultra) is added for the zstd and pzstd levels above C(19).
+    - For the directory and the custom (C(.pgc)) format, it is passed to pg_dump as C(--compress=LEVEL)
+      for the gzip compression, which is the default if I(compression) is not set,
+      and as C(--compress=METHOD:LEVEL) for C(zstd), C(pzstd) and C(lz4).
+    - Used when I(state) is C(dump).
+    type: int
+    version_added: '4.3.0'
+  compression_threads:
+    description:
+    - Number of threads the compression program uses, C(0) means as many threads as CPUs.
+    - Supported by C(pigz), C(pzstd), C(xz) and C(zstd). C(pigz) and C(pzstd) use their own default for C(0).
+    - Used when I(state) is C(dump).
+    type: int
+    version_added: '4.3.0'
+  include_tables:
+    description:
+    - Dump only the tables matching these patterns, passed to pg_dump as C(--table).
+    - The patterns are the ones of pg_dump, for example C(public.orders) or C(sales.*).
+    - Used when I(state) is C(dump).
+    type: list
+    elements: str
+    version_added: '4.3.0'
+  exclude_tables:
+    description:
+    - Do not dump the tables matching these patterns, passed to pg_dump as C(--exclude-table).
+    - Used when I(state) is C(dump).
+    type: list
+    elements: str
+    version_added: '4.3.0'
+  include_schemas:
+    description:
+    - Dump only the schemas matching these patterns, passed to pg_dump as C(--schema).
+    - Used when I(state) is C(dump).
+    type: list
+    elements: str
+    version_added: '4.3.0'
+  exclude_schemas:
+    description:
+    - Do not dump the schemas matching these patterns, passed to pg_dump as C(--exclude-schema).
+    - Used when I(state) is C(dump).
+    type: list
+    elements: str
+    version_added: '4.3.0'
+  shards:
+    description:
+    - Split the dump into at most this number of archives in the custom format, dumped at the same time.
+    - The schemas or tables to dump, see I(shard_by), are read from the catalog once and
+      distributed over the shards by their size. The shards are consistent with each other,
+      all pg_dump processes share one exported snapshot.
+    - I(target) is a directory that must not exist or be empty. It gets one C(shard_NNN.pgc) file per shard
+      and a C(manifest.json) file listing the objects of every shard, see the I(manifest) return value.
+    - With I(shard_by=schema), the objects outside schemas, for example extensions, large objects,
+      event triggers, publications, foreign data wrappers and servers, are dumped at the same time
+      into one more archive C(others.pgc), unless I(include_schemas) is set, like with the pg_dump C(--schema) option.
+    - When I(state) is C(restore) and I(target) is a directory with a C(manifest.json) file,
+      all the shards are restored at the same time, each with its own pg_restore. I(jobs) is passed to every pg_restore.
+      Objects depending on objects of other shards, for example foreign keys, can fail to restore.
+      The creation of the C(public) schema is skipped, it exists in the database to restore to.
+    - With C(others.pgc), the schemas are created first, then the extensions, procedural languages,
+      foreign data wrappers, servers and user mappings of C(others.pgc) are restored, then the shards,
+      and the rest of C(others.pgc) last.
+    - The tables of publications created C(FOR TABLE) are not dumped, pg_dump dumps them neither
+      with the schemas nor with the objects outside schemas. Publications C(FOR ALL TABLES) are kept.
+    - Cannot be used with I(jobs) when I(state) is C(dump).
+    - Used when I(state) is C(dump).
+    type: int
+    version_added: '4.3.0'
+  shard_by:
+    description:
+    - Objects distributed over the shards, see I(shards).
+    - C(schema) dumps every schema completely in one shard, and the objects outside schemas
+      into C(others.pgc), see I(shards). I(include_tables) cannot be used.
+    - C(table) dumps every table in one shard. Like with the pg_dump C(--table) option, only the tables are dumped,
+      not the schemas or other objects, so the schemas must exist when restoring.
+    - Used when I(shards) is set.
+    type: str
+    choices: [ schema, table ]
+    default: schema
+    version_added: '4.3.0'
+  checkpoint_file:
+    description:
+    - Path of a local file recording the TOC entries restored so far, to resume a failed restore.
+    - pg_restore restores the entries of the archive which are not recorded in the file, with C(--use-list),
+      and every entry is recorded as soon as it is restored. The file is removed when the restore succeeds.
+    - pg_restore runs in the parallel mode with at least two jobs, see I(jobs), and with C(--exit-on-error),
+      the only mode in which it reports the restored entries.
+    - The restore fails if the file was written for an archive with other TOC entries.
+    - The restored entries and their durations are returned in I(checkpoint).
+    - Used when I(state) is C(restore) and I(target) is in the directory or the custom (C(.pgc)) format.
+    type: path
+    version_added: '4.3.0'
   trust_input:
     description:
     - If C(false), check whether values of parameters I(owner), I(conn_limit), I(encoding),
@@ -255,6 +378,67 @@ EXAMPLES = r'''
     state: dump
     target: /tmp/acme.pgc
 
+- name: Dump an existing database with 8 parallel jobs in the directory format
+  community.postgresql.postgresql_db:
+    name: acme
+    state: dump
+    target: /tmp/acme
+    jobs: 8
+
+- name: Restore the database with 8 parallel jobs
+  community.postgresql.postgresql_db:
+    name: acme
+    state: restore
+    target: /tmp/acme
+    jobs: 8
+
+- name: Dump only the hot tables of an existing database
+  community.postgresql.postgresql_db:
+    name: acme
+    state: dump
+    target: /tmp/acme_hot.pgc
+    include_tables:
+      - public.orders
+      - public.order_lines
+      - 'sales.*'
+
+- name: Dump the schemas of an existing database into 4 archives at the same time
+  community.postgresql.postgresql_db:
+    name: acme
+    state: dump
+    target: /tmp/acme_shards
+    shards: 4
+    exclude_schemas:
+      - archive
+
+- name: Restore the 4 archives at the same time
+  community.postgresql.postgresql_db:
+    name: acme
+    state: restore
+    target: /tmp/acme_shards
+
+- name: Restore a big archive, resuming from the last restored TOC entry if a previous run failed
+  community.postgresql.postgresql_db:
+    name: acme
+    state: restore
+    target: /tmp/acme.pgc
+    jobs: 8
+    checkpoint_file: /var/tmp/acme_restore.checkpoint
+
+- name: Dump an existing database with zstd at level 19 using all CPUs
+  community.postgresql.postgresql_db:
+    name: acme
+    state: dump
+    target: /tmp/acme.sql.zst
+    compression_level: 19
+    compression_threads: 0
+
+- name: Restore the compressed dump, the decompression program is selected by the file extension
+  community.postgresql.postgresql_db:
+    name: acme
+    state: restore
+    target: /tmp/acme.sql.zst
+
 # name: acme - the name of the database to connect through which the recovery will take place
 - name: Restore database using the tar format
   community.postgresql.postgresql_db:
@@ -278,11 +462,67 @@ executed_commands:
   type: list
   sample: ["CREATE DATABASE acme"]
   version_added: '0.2.0'
+stats:
+  description:
+  - Statistics of the dump or restore.
+  - C(bytes) is the size of I(target) on disk, the sum of the file sizes for the directory format.
+  returned: success and I(state) is C(dump) or C(restore)
+  type: dict
+  version_added: '4.3.0'
+  sample: {
+    "bytes": 104857600,
+    "duration_ms": 2531.4,
+    "bytes_per_sec": 41422455.6,
+    "jobs": 4
+  }
+manifest:
+  description:
+  - Manifest of a sharded dump, see the I(shards) option.
+  - C(relation_bytes) is the total size of the tables of the shard in the database.
+  - C(others) is the archive of the objects outside schemas, C(null) if they are not dumped,
+    see the I(shards) option.
+  returned: success and I(shards) is set or a sharded dump is restored
+  type: dict
+  version_added: '4.3.0'
+  sample: {
+    "version": 1,
+    "database": "acme",
+    "shard_by": "schema",
+    "snapshot": "00000003-0000001B-1",
+    "shards": [
+      {"file": "shard_000.pgc", "objects": ["sales"], "relation_bytes": 73728},
+      {"file": "shard_001.pgc", "objects": ["public", "archive"], "relation_bytes": 65536}
+    ],
+    "others": "others.pgc"
+  }
+checkpoint:
+  description:
+  - Progress of a restore with I(checkpoint_file), also returned when the restore fails.
+  - C(skipped_entries) is the number of TOC entries restored by previous runs.
+  - C(restored_entries) are the TOC entries restored by this run, the slowest first,
+    with their C(pg_restore --list) line and the time between their start and end in milliseconds.
+  returned: I(checkpoint_file) is set
+  type: dict
+  version_added: '4.3.0'
+  sample: {
+    "file": "/var/tmp/acme_restore.checkpoint",
+    "skipped_entries": 2,
+    "restored_entries": [
+      {"id": 2544, "entry": "2544; 0 16795 TABLE DATA public t1 postgres", "duration_ms": 1532.2},
+      {"id": 2398, "entry": "2398; 1259 16798 INDEX public t1_i_idx postgres", "duration_ms": 212.7}
+    ]
+  }
 '''
 
 
+import hashlib
+import heapq
+import json
 import os
+import re
 import subprocess
+import tempfile
+import time
 import traceback
 
 from ansible.module_utils.common.text.converters import to_native
@@ -304,6 +544,52 @@ from ansible_collections.community.postgresql.plugins.module_utils.postgres impo
 
 executed_commands = []
 
+# Target file formats that pg_dump and pg_restore can process with several jobs
+PARALLEL_DUMP_FORMATS = ('.dir',)
+PARALLEL_RESTORE_FORMATS = ('.dir', '.pgc')
+
+# Target file formats that pg_dump compresses itself
+PG_DUMP_COMPRESSED_FORMATS = ('.dir', '.pgc')
+
+# Compression programs the dump is piped through, with the option to set the number of threads
+# and whether 0 threads means all CPUs for that option (otherwise, the option is left out for 0).
+# They all accept -c to write to stdout, -d to decompress and -<level>.
+# levels is the range of the -N option, levels above ultra_level need the --ultra option
+COMPRESSORS = {
+    'gzip': dict(threads=None, zero_threads=False, pg_dump_method='gzip', levels=(1, 9), ultra_level=None),
+    'pigz': dict(threads='--processes {0}', zero_threads=False, pg_dump_method='gzip', levels=(0, 9), ultra_level=None),
+    'bzip2': dict(threads=None, zero_threads=False, pg_dump_method=None, levels=(1, 9), ultra_level=None),
+    'xz': dict(threads='--threads={0}', zero_threads=True, pg_dump_method=None, levels=(0, 9), ultra_level=None),
+    'zstd': dict(threads='--threads={0}', zero_threads=True, pg_dump_method='zstd', levels=(1, 22), ultra_level=19),
+    'pzstd': dict(threads='--processes {0}', zero_threads=False, pg_dump_method='zstd', levels=(1, 22), ultra_level=19),
+    'lz4': dict(threads=None, zero_threads=False, pg_dump_method='lz4', levels=(1, 12), ultra_level=None),
+}
+
+# Compression programs by target file extension, in order of preference
+COMPRESSORS_BY_EXTENSION = {
+    '.gz': ('pigz', 'gzip'),
+    '.bz2': ('bzip2',),
+    '.xz': ('xz',),
+    '.zst': ('zstd', 'pzstd'),
+    '.lz4': ('lz4',),
+}
+
+# Files of a sharded dump in the target directory
+SHARDS_MANIFEST = 'manifest.json'
+SHARD_FILE = 'shard_{0:03d}.pgc'
+SHARD_OTHERS_FILE = 'others.pgc'
+
+# TOC entries of the others archive restored before the shards, the objects of the shards can depend on them
+SHARD_OTHERS_FIRST = (('EXTENSION', None), ('PROCEDURAL LANGUAGE', None), ('FOREIGN DATA WRAPPER', None),
+                      ('SERVER', None), ('USER MAPPING', None))
+
+# Progress messages of pg_restore --verbose in the parallel mode, the only one reporting the TOC entry IDs.
+# Entries before and after the main parallel loop are processed one after the other.
+PG_RESTORE_SERIAL_ITEM_RE = re.compile(r'^pg_restore: processing (?:missed )?item (\d+) ')
+PG_RESTORE_LAUNCHED_ITEM_RE = re.compile(r'^pg_restore: launching item (\d+) ')
+PG_RESTORE_FINISHED_ITEM_RE = re.compile(r'^pg_restore: finished item (\d+) ')
+PG_RESTORE_PARALLEL_LOOP_RE = re.compile(r'^pg_restore: (?:entering|finished) main parallel loop')
+
 
 class NotSupportedError(Exception):
     pass
@@ -538,32 +824,44 @@ def db_dump(module, target, target_opts="",
             host=None,
             port=None,
             session_role=None,
+            jobs=1,
+            compression=None,
+            compression_level=None,
+            compression_threads=None,
+            include_tables=None,
+            exclude_tables=None,
+            include_schemas=None,
+            exclude_schemas=None,
             **kw):
 
     flags = login_flags(db, host, port, user, db_prefix=False)
     cmd = module.get_bin_path('pg_dump', True)
-    comp_prog_path = None
+    compressor = None
+    target_format = get_target_format(target, jobs)
 
-    if os.path.splitext(target)[-1] == '.tar':
+    if target_format == '.tar':
         flags.append(' --format=t')
-    elif os.path.splitext(target)[-1] == '.pgc':
+    elif target_format == '.pgc':
         flags.append(' --format=c')
-    elif os.path.splitext(target)[-1] == '.dir':
+    elif target_format == '.dir':
         flags.append(' --format=d')
 
-    if os.path.splitext(target)[-1] == '.gz':
-        if module.get_bin_path('pigz'):
-            comp_prog_path = module.get_bin_path('pigz', True)
-        else:
-            comp_prog_path = module.get_bin_path('gzip', True)
-    elif os.path.splitext(target)[-1] == '.bz2':
-        comp_prog_path = module.get_bin_path('bzip2', True)
-    elif os.path.splitext(target)[-1] == '.xz':
-        comp_prog_path = module.get_bin_path('xz', True)
+    if target_format in PG_DUMP_COMPRESSED_FORMATS:
+        pg_dump_compression = get_pg_dump_compression(module, compression, compression_level,
+                                                      compression_threads)
+        if pg_dump_compression is not None:
+            flags.append(' --compress={0}'.format(pg_dump_compression))
+    else:
+        compressor = get_compressor(module, target_format, compression)
 
     if session_role:
         flags.append(' --role={0}'.format(shlex_quote(session_role)))
 
+    if jobs > 1:
+        flags.append(' --jobs={0}'.format(jobs))
+
+    flags.extend(filter_flags(include_tables, exclude_tables, include_schemas, exclude_schemas))
+
     cmd += "".join(flags)
 
     if dump_extra_args:
@@ -572,18 +870,14 @@ def db_dump(module, target, target_opts="",
     if target_opts:
         cmd += " {0} ".format(target_opts)
 
-    if comp_prog_path:
-        # Use a fifo to be notified of an error in pg_dump
-        # Using shell pipe has no way to return the code of the first command
-        # in a portable way.
-        fifo = os.path.join(module.tmpdir, 'pg_fifo')
-        os.mkfifo(fifo)
-        cmd = '{1} <{3} > {2} & {0} >{3}'.format(cmd, comp_prog_path, shlex_quote(target), fifo)
+    if compressor:
+        compress_cmd = get_compress_cmd(module, compressor, compression_level, compression_threads)
+        return do_pipeline_with_password(module, [cmd, compress_cmd], password, stdout_path=target)
+
+    if ' --format=d' in cmd:
+        cmd = '{0} -f {1}'.format(cmd, shlex_quote(target))
     else:
-        if ' --format=d' in cmd:
-            cmd = '{0} -f {1}'.format(cmd, shlex_quote(target))
-        else:
-            cmd = '{0} > {1}'.format(cmd, shlex_quote(target))
+        cmd = '{0} > {1}'.format(cmd, shlex_quote(target))
 
     return do_with_password(module, cmd, password)
 
@@ -595,68 +889,684 @@ def db_restore(module, target, target_opts="",
                host=None,
                port=None,
                session_role=None,
+               jobs=1,
+               compression=None,
                **kw):
 
     flags = login_flags(db, host, port, user)
-    comp_prog_path = None
+    compressor = None
     cmd = module.get_bin_path('psql', True)
     pg_restore = False
+    target_format = get_target_format(target, jobs, restore=True)
 
-    if os.path.splitext(target)[-1] == '.sql':
-        flags.append(' --file={0}'.format(target))
+    # pg_restore detects the compression of the directory and custom formats itself
+    if target_format not in PG_DUMP_COMPRESSED_FORMATS:
+        compressor = get_compressor(module, target_format, compression)
 
-    elif os.path.splitext(target)[-1] == '.tar':
+    if target_format == '.sql':
+        if not compressor:
+            flags.append(' --file={0}'.format(target))
+
+    elif target_format == '.tar':
         flags.append(' --format=Tar')
         cmd = module.get_bin_path('pg_restore', True)
         pg_restore = True
 
-    elif os.path.splitext(target)[-1] == '.pgc':
+    elif target_format == '.pgc':
         flags.append(' --format=Custom')
         cmd = module.get_bin_path('pg_restore', True)
         pg_restore = True
 
-    elif os.path.splitext(target)[-1] == '.dir':
+    elif target_format == '.dir':
         flags.append(' --format=Directory')
         cmd = module.get_bin_path('pg_restore', True)
         pg_restore = True
 
-    elif os.path.splitext(target)[-1] == '.gz':
-        comp_prog_path = module.get_bin_path('zcat', True)
+    if pg_restore and session_role:
+        flags.append(' --role={0}'.format(shlex_quote(session_role)))
 
-    elif os.path.splitext(target)[-1] == '.bz2':
-        comp_prog_path = module.get_bin_path('bzcat', True)
+    if pg_restore and jobs > 1:
+        flags.append(' --jobs={0}'.format(jobs))
 
-    elif os.path.splitext(target)[-1] == '.xz':
-        comp_prog_path = module.get_bin_path('xzcat', True)
+    cmd += "".join(flags)
+    if target_opts:
+        cmd += " {0} ".format(target_opts)
 
-    if pg_restore and session_role:
+    if compressor:
+        decompress_cmd = '{0} -d -c {1}'.format(shlex_quote(compressor[1]), shlex_quote(target))
+        return do_pipeline_with_password(module, [decompress_cmd, cmd], password)
+
+    if any(substring in cmd for substring in ['--format=Directory', '--format=Custom']):
+        cmd = '{0} {1}'.format(cmd, shlex_quote(target))
+    elif '--file=' not in cmd:
+        cmd = '{0} < {1}'.format(cmd, shlex_quote(target))
+
+    return do_with_password(module, cmd, password)
+
+
+def db_dump_shards(module, target, target_opts="",
+                   db=None,
+                   dump_extra_args=None,
+                   user=None,
+                   password=None,
+                   host=None,
+                   port=None,
+                   session_role=None,
+                   shard_by='schema',
+                   shards=None,
+                   snapshot=None,
+                   compression=None,
+                   compression_level=None,
+                   exclude_tables=None,
+                   include_schemas=None,
+                   exclude_schemas=None,
+                   **kw):
+    """
+    dumps the shards returned by assign_shards, each with its own pg_dump
+    in the custom format, all pg_dump processes run at the same time
+    and share the exported snapshot, so the shards are consistent.
+
+    pg_dump --schema dumps nothing outside the schemas, so with shard_by schema
+    one more pg_dump excluding the sharded schemas dumps the extensions,
+    large objects, event triggers and other objects outside schemas.
+    Like pg_dump, nothing outside schemas is dumped with include_schemas.
+
+    The manifest describing the shards is written last,
+    so a failed dump cannot be restored by mistake.
+    """
+    flags = login_flags(db, host, port, user, db_prefix=False)
+    flags.append(' --format=c')
+    if snapshot:
+        flags.append(' --snapshot={0}'.format(shlex_quote(snapshot)))
+    pg_dump_compression = get_pg_dump_compression(module, compression, compression_level)
+    if pg_dump_compression is not None:
+        flags.append(' --compress={0}'.format(pg_dump_compression))
+    if session_role:
         flags.append(' --role={0}'.format(shlex_quote(session_role)))
+    flags.extend(filter_flags(exclude_tables=exclude_tables))
 
-    cmd += "".join(flags)
+    cmd = module.get_bin_path('pg_dump', True) + "".join(flags)
+    if dump_extra_args:
+        cmd += " {0} ".format(dump_extra_args)
+    if target_opts:
+        cmd += " {0} ".format(target_opts)
+
+    if not os.path.isdir(target):
+        os.makedirs(target)
+
+    cmds = []
+    manifest_shards = []
+    for i, shard in enumerate(shards):
+        shard_file = SHARD_FILE.format(i)
+        if shard_by == 'schema':
+            objects_flags = filter_flags(include_schemas=[quote_pattern(schema) for schema, dummy in shard])
+        else:
+            objects_flags = filter_flags(include_tables=[quote_pattern(schema, table) for (schema, table), dummy in shard])
+        cmds.append('{0}{1} --file={2}'.format(cmd, "".join(objects_flags),
+                                               shlex_quote(os.path.join(target, shard_file))))
+        manifest_shards.append(dict(
+            file=shard_file,
+            objects=[name if shard_by == 'schema' else '.'.join(name) for name, dummy in shard],
+            relation_bytes=sum(size for dummy, size in shard),
+        ))
+
+    others_file = None
+    if shard_by == 'schema' and not include_schemas:
+        others_file = SHARD_OTHERS_FILE
+        sharded_schemas = [quote_pattern(schema) for shard in shards for schema, dummy in shard]
+        objects_flags = filter_flags(exclude_schemas=sharded_schemas + (exclude_schemas or []))
+        cmds.append('{0}{1} --file={2}'.format(cmd, "".join(objects_flags),
+                                               shlex_quote(os.path.join(target, others_file))))
+
+    rc, stdout, stderr, cmd = do_parallel_with_password(module, cmds, password)
+    if rc == 0:
+        manifest = dict(version=1, database=db, shard_by=shard_by,
+                        snapshot=snapshot, shards=manifest_shards, others=others_file)
+        with open(os.path.join(target, SHARDS_MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+    return rc, stdout, stderr, cmd
+
+
+def db_restore_shards(module, target, target_opts="",
+                      db=None,
+                      user=None,
+                      password=None,
+                      host=None,
+                      port=None,
+                      session_role=None,
+                      jobs=1,
+                      manifest=None,
+                      **kw):
+    """
+    restores the shards listed in the manifest of a sharded dump,
+    every shard with its own pg_restore, all at the same time.
+
+    With an others archive, the restore runs in steps: the schemas of the shards,
+    the extensions, languages and foreign servers the shards can depend on,
+    the shards, then the remaining objects outside schemas,
+    for example event triggers depending on functions of the shards.
+    """
+    pg_restore = module.get_bin_path('pg_restore', True)
+    flags = login_flags(db, host, port, user)
+    flags.append(' --format=Custom')
+    if session_role:
+        flags.append(' --role={0}'.format(shlex_quote(session_role)))
+    if jobs > 1:
+        flags.append(' --jobs={0}'.format(jobs))
+
+    cmd = pg_restore + "".join(flags)
+    if target_opts:
+        cmd += " {0} ".format(target_opts)
+
+    def restore_cmd(archive, include=None, exclude=()):
+        restore_list = ''
+        if include is not None or exclude:
+            restore_list = ' --use-list={0}'.format(shlex_quote(
+                get_restore_list(module, pg_restore, archive, include=include, exclude=exclude)))
+        return '{0}{1} {2}'.format(cmd, restore_list, shlex_quote(archive))
+
+    others_path = os.path.join(target, manifest['others']) if manifest.get('others') else None
+    schema_cmds = []
+    cmds = []
+    for shard in manifest['shards']:
+        shard_path = os.path.join(target, shard['file'])
+        if others_path:
+            schema_cmds.append(restore_cmd(shard_path, include=(('SCHEMA', None),), exclude=(('SCHEMA', 'public'),)))
+            cmds.append(restore_cmd(shard_path, exclude=(('SCHEMA', None),)))
+        elif manifest['shard_by'] == 'schema' and 'public' in shard['objects']:
+            cmds.append(restore_cmd(shard_path, exclude=(('SCHEMA', 'public'),)))
+        else:
+            cmds.append(restore_cmd(shard_path))
+    if not others_path:
+        return do_parallel_with_password(module, cmds, password)
+
+    steps = [
+        schema_cmds,
+        [restore_cmd(others_path, include=SHARD_OTHERS_FIRST)],
+        cmds,
+        [restore_cmd(others_path, exclude=SHARD_OTHERS_FIRST)],
+    ]
+    stdout = stderr = ''
+    step_cmds = []
+    for step in steps:
+        rc, step_stdout, step_stderr, step_cmd = do_parallel_with_password(module, step, password)
+        stdout += step_stdout
+        stderr += step_stderr
+        step_cmds.append(step_cmd)
+        if rc != 0:
+            break
+    return rc, stdout, stderr, ' && '.join(step_cmds)
+
+
+def get_restore_list(module, pg_restore, archive, include=None, exclude=()):
+    """
+    writes the table of contents of the archive to a temporary file
+    for the pg_restore --use-list option, and returns its path.
+
+    Only the (type, name) entries to include, all if include is None,
+    and not to exclude are written, a name of None matches every entry of the type.
+
+    pg_dump --schema=public dumps the creation of the public schema,
+    which already exists in the database to restore to.
+    """
+    rc, stdout, stderr = module.run_command([pg_restore, '--list', archive])
+    if rc != 0:
+        module.fail_json(msg=stderr, rc=rc)
+    include_re = toc_entries_regex(include) if include is not None else None
+    exclude_re = toc_entries_regex(exclude) if exclude else None
+    fd, list_path = tempfile.mkstemp(dir=module.tmpdir)
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(line + '\n' for line in stdout.splitlines()
+                     if (include_re is None or include_re.match(line))
+                     and (exclude_re is None or not exclude_re.match(line)))
+    return list_path
+
+
+def toc_entries_regex(entries):
+    """
+    returns a regex matching the pg_restore --list lines of the (type, name) entries,
+    a name of None matches every entry of the type.
+    """
+    return re.compile(r'^\d+; \d+ \d+ (?:{0})'.format('|'.join(
+        re.escape('{0} - '.format(obj_type) if name is None else '{0} - {1} '.format(obj_type, name))
+        for obj_type, name in entries)))
+
+
+def db_restore_checkpointed(module, target, target_opts="",
+                            db=None,
+                            user=None,
+                            password=None,
+                            host=None,
+                            port=None,
+                            session_role=None,
+                            jobs=1,
+                            checkpoint_file=None,
+                            checkpoint=None,
+                            **kw):
+    """
+    restores the TOC entries of the archive that are not recorded in the checkpoint file
+    and records every restored entry in it as soon as it is finished, so a failed restore
+    can be resumed. The checkpoint file is removed when the restore succeeds.
+
+    The checkpoint dict is filled in with the number of entries skipped because they were
+    restored before (skipped_entries) and the restored entries with their durations,
+    the slowest first (restored_entries).
+    """
+    pg_restore = module.get_bin_path('pg_restore', True)
+    format_flag = ' --format=Directory' if get_target_format(target, restore=True) in ('.dir', '') else ' --format=Custom'
+
+    rc, toc, stderr = module.run_command('{0}{1} --list {2}'.format(pg_restore, format_flag, shlex_quote(target)))
+    if rc != 0:
+        return rc, toc, stderr, None
+    entries = parse_toc(toc)
+    toc_sha1 = hashlib.sha1('\n'.join(line for dummy, line in entries).encode('utf-8')).hexdigest()
+
+    done = read_checkpoint(module, checkpoint_file, toc_sha1)
+    remaining = [(entry_id, line) for entry_id, line in entries if entry_id not in done]
+    checkpoint['skipped_entries'] = len(entries) - len(remaining)
+    checkpoint['restored_entries'] = []
+    if not remaining:
+        return 0, '', '', None
+
+    fd, list_path = tempfile.mkstemp(dir=module.tmpdir)
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(line + '\n' for dummy, line in remaining)
+
+    flags = login_flags(db, host, port, user)
+    flags.append(format_flag)
+    # Only the parallel mode reports the TOC entry IDs, and an entry is finished only if it had no error
+    flags.append(' --verbose --exit-on-error --jobs={0}'.format(max(jobs, 2)))
+    flags.append(' --use-list={0}'.format(shlex_quote(list_path)))
+    if session_role:
+        flags.append(' --role={0}'.format(shlex_quote(session_role)))
+
+    cmd = pg_restore + "".join(flags)
     if target_opts:
         cmd += " {0} ".format(target_opts)
+    cmd = '{0} {1}'.format(cmd, shlex_quote(target))
+    executed_commands.append(cmd)
+
+    env = os.environ.copy()
+    if password:
+        env["PGPASSWORD"] = password
+
+    lines = dict(remaining)
+    started = {}
+    serial_item = None
+    errors = []
+    checkpoint_existed = os.path.exists(checkpoint_file)
+    with open(checkpoint_file, 'a') as f:
+        if not checkpoint_existed:
+            f.write(json.dumps(dict(toc_sha1=toc_sha1, target=target)) + '\n')
+            f.flush()
+
+        stdout_file = tempfile.TemporaryFile(dir=module.tmpdir)
+        process = subprocess.Popen(cmd, shell=True, env=env, stdout=stdout_file, stderr=subprocess.PIPE)
+        for line in iter(process.stderr.readline, b''):
+            line = to_native(line).rstrip('\n')
+            now = time.time()
+            finished = []
+            serial_match = PG_RESTORE_SERIAL_ITEM_RE.match(line)
+            launched_match = PG_RESTORE_LAUNCHED_ITEM_RE.match(line)
+            finished_match = PG_RESTORE_FINISHED_ITEM_RE.match(line)
+            if serial_item is not None and (serial_match or PG_RESTORE_PARALLEL_LOOP_RE.match(line)):
+                finished.append(serial_item)
+                serial_item = None
+            if serial_match:
+                serial_item = int(serial_match.group(1))
+                started[serial_item] = now
+            elif launched_match:
+                started[int(launched_match.group(1))] = now
+            elif finished_match:
+                finished.append(int(finished_match.group(1)))
+            elif not line.startswith('pg_restore: ') or line.startswith(('pg_restore: error', 'pg_restore: warning')):
+                errors.append(line)
+            for entry_id in finished:
+                record_checkpoint_entry(f, checkpoint, entry_id, lines.get(entry_id), now - started.pop(entry_id))
+        process.stderr.close()
+        rc = process.wait()
+        if rc == 0 and serial_item is not None:
+            record_checkpoint_entry(f, checkpoint, serial_item, lines.get(serial_item),
+                                    time.time() - started.pop(serial_item))
+
+    stdout_file.seek(0)
+    stdout = to_native(stdout_file.read())
+    stdout_file.close()
+
+    checkpoint['restored_entries'].sort(key=lambda entry: -entry['duration_ms'])
+    if rc == 0:
+        os.remove(checkpoint_file)
+    return rc, stdout, '\n'.join(errors), cmd
+
+
+def record_checkpoint_entry(f, checkpoint, entry_id, line, duration):
+    """
+    appends the restored TOC entry to the open checkpoint file and to the checkpoint dict,
+    entries that are not listed in the TOC, like ENCODING, are restored every time and ignored.
+    """
+    if line is None:
+        return
+    entry = dict(id=entry_id, entry=line, duration_ms=round(duration * 1000, 3))
+    f.write(json.dumps(entry) + '\n')
+    f.flush()
+    checkpoint['restored_entries'].append(entry)
+
+
+def parse_toc(toc):
+    """
+    returns a list of (ID, line) tuples of the entries
+    in the output of pg_restore --list, without the comments.
+    """
+    entries = []
+    for line in toc.splitlines():
+        if line and not line.startswith(';'):
+            entries.append((int(line.split(';', 1)[0]), line))
+    return entries
 
-    if comp_prog_path:
-        env = os.environ.copy()
-        if password:
-            env = {"PGPASSWORD": password}
-        p1 = subprocess.Popen([comp_prog_path, target], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        p2 = subprocess.Popen(cmd, stdin=p1.stdout, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True, env=env)
-        (stdout2, stderr2) = p2.communicate()
-        p1.stdout.close()
-        p1.wait()
-        if p1.returncode != 0:
-            stderr1 = p1.stderr.read()
-            return p1.returncode, '', stderr1, 'cmd: ****'
+
+def read_checkpoint(module, checkpoint_file, toc_sha1):
+    """
+    returns the set of the IDs of the TOC entries recorded in the checkpoint file,
+    fails if the checkpoint file was written for another archive.
+    """
+    if not os.path.exists(checkpoint_file):
+        return set()
+    with open(checkpoint_file) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records or records[0].get('toc_sha1') != toc_sha1:
+        module.fail_json(msg='The checkpoint file "{0}" was not written for the TOC of the target, '
+                             'remove it to restore the target from the beginning.'.format(checkpoint_file))
+    return set(record['id'] for record in records[1:])
+
+
+def filter_flags(include_tables=None, exclude_tables=None, include_schemas=None, exclude_schemas=None):
+    """
+    returns a list of pg_dump arguments selecting the tables and schemas
+    to dump, each prefixed with a space like login_flags.
+    """
+    flags = []
+    for option, patterns in (('table', include_tables), ('exclude-table', exclude_tables),
+                             ('schema', include_schemas), ('exclude-schema', exclude_schemas)):
+        for pattern in patterns or []:
+            flags.append(' --{0}={1}'.format(option, shlex_quote(pattern)))
+    return flags
+
+
+def quote_pattern(*names):
+    """
+    returns a pg_dump pattern matching exactly the (qualified) name.
+    """
+    return '.'.join('"{0}"'.format(name.replace('"', '""')) for name in names)
+
+
+def pattern_to_regex(pattern):
+    """
+    converts a pg_dump pattern to a tuple of compiled regular expressions,
+    one per dot-separated part of the pattern.
+
+    Like in pg_dump, * matches any sequence of characters and ? any character,
+    names are folded to lower case unless they are double-quoted.
+    """
+    parts = [[]]
+    in_quotes = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '"':
+            if in_quotes and pattern[i + 1:i + 2] == '"':
+                parts[-1].append(re.escape('"'))
+                i += 1
+            else:
+                in_quotes = not in_quotes
+        elif in_quotes:
+            parts[-1].append(re.escape(char))
+        elif char == '.':
+            parts.append([])
+        elif char == '*':
+            parts[-1].append('.*')
+        elif char == '?':
+            parts[-1].append('.')
         else:
-            return p2.returncode, '', stderr2, 'cmd: ****'
+            parts[-1].append(re.escape(char.lower()))
+        i += 1
+    return tuple(re.compile(''.join(part) + r'\Z') for part in parts)
+
+
+def pattern_matches(regexes, schema, name=None):
+    """
+    returns True if the regular expressions returned by pattern_to_regex
+    match the schema (and the table name if passed).
+    """
+    if name is None:
+        return len(regexes) == 1 and bool(regexes[0].match(schema))
+    if len(regexes) == 1:
+        return bool(regexes[0].match(name))
+    return len(regexes) == 2 and bool(regexes[0].match(schema)) and bool(regexes[1].match(name))
+
+
+def get_shard_objects(cursor, shard_by, include_tables=None, exclude_tables=None,
+                      include_schemas=None, exclude_schemas=None):
+    """
+    returns a list of ((schema, table) or schema, size) tuples of the objects to shard,
+    resolved from the catalog with the same patterns as pg_dump.
+
+    The size of a schema is the total size of its tables.
+    """
+    cursor.execute("SELECT n.nspname, c.relname, "
+                   "CASE WHEN c.oid IS NULL THEN 0 ELSE pg_total_relation_size(c.oid) END AS size "
+                   "FROM pg_catalog.pg_namespace AS n "
+                   "LEFT JOIN pg_catalog.pg_class AS c ON c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'm') "
+                   "WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') "
+                   "AND n.nspname !~ '^pg_(toast|temp_|toast_temp_)' "
+                   "ORDER BY n.nspname, c.relname")
+    rows = cursor.fetchall()
+
+    include_tables = [pattern_to_regex(pattern) for pattern in include_tables or []]
+    exclude_tables = [pattern_to_regex(pattern) for pattern in exclude_tables or []]
+    include_schemas = [pattern_to_regex(pattern) for pattern in include_schemas or []]
+    exclude_schemas = [pattern_to_regex(pattern) for pattern in exclude_schemas or []]
+
+    objects = {}
+    for row in rows:
+        schema, table, size = row['nspname'], row['relname'], row['size']
+        if include_schemas and not any(pattern_matches(regexes, schema) for regexes in include_schemas):
+            continue
+        if any(pattern_matches(regexes, schema) for regexes in exclude_schemas):
+            continue
+        if shard_by == 'schema':
+            objects[schema] = objects.get(schema, 0) + size
+            continue
+        if table is None:
+            continue
+        if include_tables and not any(pattern_matches(regexes, schema, table) for regexes in include_tables):
+            continue
+        if any(pattern_matches(regexes, schema, table) for regexes in exclude_tables):
+            continue
+        objects[(schema, table)] = size
+    return list(objects.items())
+
+
+def assign_shards(objects, shards):
+    """
+    distributes the (name, size) tuples returned by get_shard_objects
+    over at most the given number of shards with similar total sizes,
+    the biggest objects first, each to the smallest shard so far.
+    """
+    heap = [(0, i, []) for i in range(min(shards, len(objects)))]
+    for name, size in sorted(objects, key=lambda obj: (-obj[1], obj[0])):
+        total, i, shard = heapq.heappop(heap)
+        shard.append((name, size))
+        heapq.heappush(heap, (total + size, i, shard))
+    return [shard for dummy, dummy, shard in sorted(heap, key=lambda item: item[1])]
+
+
+def read_shards_manifest(target):
+    """
+    returns the manifest of a sharded dump in the target directory,
+    or None if the target is not a sharded dump.
+    """
+    manifest_path = os.path.join(target, SHARDS_MANIFEST)
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def get_compressor(module, target_format, compression=None):
+    """
+    returns a tuple of the name and the path of the compression program
+    for the target, or None if the target is not compressed.
+
+    The compression program is selected by the compression argument if it is
+    set, otherwise by the file extension of the target.
+    """
+    if compression:
+        candidates = (compression,)
+    elif target_format in COMPRESSORS_BY_EXTENSION:
+        candidates = COMPRESSORS_BY_EXTENSION[target_format]
     else:
-        if any(substring in cmd for substring in ['--format=Directory', '--format=Custom']):
-            cmd = '{0} {1}'.format(cmd, shlex_quote(target))
-        elif '--file=' not in cmd:
-            cmd = '{0} < {1}'.format(cmd, shlex_quote(target))
+        return None
+
+    for name in candidates:
+        path = module.get_bin_path(name)
+        if path:
+            return name, path
+    module.fail_json(msg='Cannot find the compression program {0} in PATH.'.format(' or '.join(candidates)))
+
+
+def get_compress_cmd(module, compressor, level=None, threads=None):
+    """
+    returns the shell command to compress stdin to stdout
+    with the compression program returned by get_compressor.
+    """
+    name, path = compressor
+    cmd = '{0} -c'.format(shlex_quote(path))
+    if level is not None:
+        min_level, max_level = COMPRESSORS[name]['levels']
+        if not min_level <= level <= max_level:
+            module.fail_json(msg='{0} does not support the compression level {1}, '
+                                 'use a level from {2} to {3}.'.format(name, level, min_level, max_level))
+        ultra_level = COMPRESSORS[name]['ultra_level']
+        if ultra_level is not None and level > ultra_level:
+            cmd += ' --ultra'
+        cmd += ' -{0}'.format(level)
+    if threads is not None:
+        threads_option = COMPRESSORS[name]['threads']
+        if threads_option is None:
+            module.warn('{0} does not support several threads, the "compression_threads" option is ignored.'.format(name))
+        elif threads or COMPRESSORS[name]['zero_threads']:
+            cmd += ' ' + threads_option.format(threads)
+    return cmd
+
+
+def get_pg_dump_compression(module, compression=None, level=None, threads=None):
+    """
+    returns the value of the pg_dump --compress option
+    for the directory and custom formats or None if the option is not needed.
+
+    pg_dump before 16 accepts only an integer level of the gzip compression,
+    so the method:level form is used only for the methods added in 16.
+    """
+    if threads is not None:
+        module.warn('pg_dump compresses the directory and custom formats itself, '
+                    'the "compression_threads" option is ignored, use the "jobs" option instead.')
+
+    method = 'gzip'
+    if compression:
+        method = COMPRESSORS[compression]['pg_dump_method']
+        if method is None:
+            module.fail_json(msg='pg_dump cannot compress the directory and custom formats with {0}, '
+                                 'use gzip, zstd or lz4.'.format(compression))
+
+    if method == 'gzip':
+        # gzip is the default method, the level is enough
+        return None if level is None else str(level)
+    if level is not None:
+        return '{0}:{1}'.format(method, level)
+    return method
+
+
+def get_target_format(target, jobs=1, restore=False):
+    """
+    returns the format of the target, which is its file extension.
+
+    When several jobs are requested, a target without file extension
+    is dumped in the directory format, the only format pg_dump can write
+    in parallel, and restored in the directory format if it is a directory.
+    """
+    target_format = os.path.splitext(target)[-1]
+    if jobs > 1 and target_format == '' and (not restore or os.path.isdir(target)):
+        target_format = '.dir'
+    return target_format
 
-    return do_with_password(module, cmd, password)
+
+def check_jobs(module, state, target, jobs):
+    """
+    fails if the format of the target can't be dumped or restored
+    with the requested number of jobs.
+    """
+    if jobs < 1:
+        module.fail_json(msg='The "jobs" option must be at least 1.')
+    if jobs == 1:
+        return
+
+    if state == 'dump':
+        parallel_formats = PARALLEL_DUMP_FORMATS
+    else:
+        parallel_formats = PARALLEL_RESTORE_FORMATS
+    target_format = get_target_format(target, jobs, restore=state == 'restore')
+    if target_format not in parallel_formats:
+        module.fail_json(msg='The target format "{0}" does not support parallel {1}s with the "jobs" option, '
+                             'supported formats: {2}.'.format(target_format, state, ', '.join(parallel_formats)))
+
+
+def check_shards(module, target, shards, shard_by, jobs, include_tables):
+    """
+    fails if a sharded dump cannot be done with the options.
+    """
+    if shards < 1:
+        module.fail_json(msg='The "shards" option must be at least 1.')
+    if jobs > 1:
+        module.fail_json(msg='The "jobs" option cannot be used with the "shards" option, '
+                             'every shard is dumped by its own pg_dump.')
+    if shard_by == 'schema' and include_tables:
+        module.fail_json(msg='The "include_tables" option requires "shard_by: table" with the "shards" option.')
+    if os.path.exists(target) and (not os.path.isdir(target) or os.listdir(target)):
+        module.fail_json(msg='The target "{0}" of a sharded dump must be an empty or nonexistent directory.'.format(target))
+
+
+def check_checkpoint(module, target, shards_manifest):
+    """
+    fails if the target cannot be restored with a checkpoint file.
+    """
+    if shards_manifest:
+        module.fail_json(msg='The "checkpoint_file" option cannot be used to restore a sharded dump.')
+    if get_target_format(target, restore=True) not in ('.dir', '.pgc') and not os.path.isdir(target):
+        module.fail_json(msg='The "checkpoint_file" option requires a target in the directory or the custom (.pgc) format.')
+
+
+def export_snapshot(cursor):
+    """
+    starts a repeatable read transaction on the cursor and returns the name
+    of its exported snapshot, which stays valid until the transaction ends.
+    """
+    cursor.execute("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    cursor.execute("SELECT pg_catalog.pg_export_snapshot() AS snapshot")
+    return cursor.fetchone()['snapshot']
+
+
+def get_target_size(target):
+    """
+    returns the size of the target file in bytes,
+    or the sum of the file sizes if the target is a directory.
+    """
+    if not os.path.isdir(target):
+        return os.path.getsize(target) if os.path.exists(target) else 0
+    size = 0
+    for dirpath, dummy, filenames in os.walk(target):
+        for filename in filenames:
+            size += os.path.getsize(os.path.join(dirpath, filename))
+    return size
 
 
 def login_flags(db, host, port, user, db_prefix=True):
@@ -683,6 +1593,97 @@ def login_flags(db, host, port, user, db_prefix=True):
     return flags
 
 
+def do_pipeline_with_password(module, cmds, password, stdout_path=None):
+    """
+    runs the shell commands as a pipeline, the output of the last command
+    is written to stdout_path if it is set.
+
+    Like with "set -o pipefail" in a shell, the exit code is the one of the
+    last command that failed, and stderr contains the stderr of every command.
+    """
+    env = os.environ.copy()
+    if password:
+        env["PGPASSWORD"] = password
+    pipeline = ' | '.join(cmds)
+    if stdout_path:
+        pipeline = '{0} > {1}'.format(pipeline, shlex_quote(stdout_path))
+    executed_commands.append(pipeline)
+
+    stdout_file = open(stdout_path, 'wb') if stdout_path else subprocess.PIPE
+    processes = []
+    stderr_files = []
+    try:
+        stdin = None
+        for i, cmd in enumerate(cmds):
+            # stderr goes to files, so that no command blocks on a full stderr pipe
+            stderr_file = tempfile.TemporaryFile(dir=module.tmpdir)
+            stderr_files.append(stderr_file)
+            last = i == len(cmds) - 1
+            process = subprocess.Popen(cmd, shell=True, env=env, stdin=stdin, stderr=stderr_file,
+                                       stdout=stdout_file if last else subprocess.PIPE)
+            if stdin is not None:
+                # close the parent's copy, so the previous command gets SIGPIPE if this one exits early
+                stdin.close()
+            stdin = process.stdout
+            processes.append(process)
+
+        stdout = processes[-1].communicate()[0] or b''
+        for process in processes[:-1]:
+            process.wait()
+    finally:
+        if stdout_path:
+            stdout_file.close()
+
+    rc = 0
+    for process in processes:
+        if process.returncode != 0:
+            rc = process.returncode
+    stderr = b''
+    for stderr_file in stderr_files:
+        stderr_file.seek(0)
+        stderr += stderr_file.read()
+        stderr_file.close()
+
+    return rc, to_native(stdout), to_native(stderr), pipeline
+
+
+def do_parallel_with_password(module, cmds, password):
+    """
+    runs the shell commands at the same time and waits for all of them.
+
+    The exit code is the one of the last command that failed,
+    stdout and stderr contain the output of every command.
+    """
+    env = os.environ.copy()
+    if password:
+        env["PGPASSWORD"] = password
+    executed_commands.extend(cmds)
+
+    processes = []
+    output_files = []
+    for cmd in cmds:
+        # the output goes to files, so that no command blocks on a full pipe
+        stdout_file = tempfile.TemporaryFile(dir=module.tmpdir)
+        stderr_file = tempfile.TemporaryFile(dir=module.tmpdir)
+        output_files.append((stdout_file, stderr_file))
+        processes.append(subprocess.Popen(cmd, shell=True, env=env, stdout=stdout_file, stderr=stderr_file))
+
+    rc = 0
+    stdout = b''
+    stderr = b''
+    for process, (stdout_file, stderr_file) in zip(processes, output_files):
+        if process.wait() != 0:
+            rc = process.returncode
+        for output_file in (stdout_file, stderr_file):
+            output_file.seek(0)
+        stdout += stdout_file.read()
+        stderr += stderr_file.read()
+        stdout_file.close()
+        stderr_file.close()
+
+    return rc, to_native(stdout), to_native(stderr), ' & '.join(cmds)
+
+
 def do_with_password(module, cmd, password):
     env = {}
     if password:
@@ -753,6 +1754,17 @@ def main():
         trust_input=dict(type='bool', default=True),
         force=dict(type='bool', default=False),
         comment=dict(type='str', default=None),
+        jobs=dict(type='int', default=1),
+        compression=dict(type='str', choices=['bzip2', 'gzip', 'lz4', 'pigz', 'pzstd', 'xz', 'zstd']),
+        compression_level=dict(type='int'),
+        compression_threads=dict(type='int'),
+        include_tables=dict(type='list', elements='str'),
+        exclude_tables=dict(type='list', elements='str'),
+        include_schemas=dict(type='list', elements='str'),
+        exclude_schemas=dict(type='list', elements='str'),
+        shards=dict(type='int'),
+        shard_by=dict(type='str', default='schema', choices=['schema', 'table']),
+        checkpoint_file=dict(type='path'),
     )
 
     module = AnsibleModule(
@@ -780,6 +1792,17 @@ def main():
     trust_input = module.params['trust_input']
     force = module.params['force']
     comment = module.params['comment']
+    jobs = module.params['jobs']
+    compression = module.params['compression']
+    compression_level = module.params['compression_level']
+    compression_threads = module.params['compression_threads']
+    include_tables = module.params['include_tables']
+    exclude_tables = module.params['exclude_tables']
+    include_schemas = module.params['include_schemas']
+    exclude_schemas = module.params['exclude_schemas']
+    shards = module.params['shards'] if state == 'dump' else None
+    shard_by = module.params['shard_by']
+    checkpoint_file = module.params['checkpoint_file'] if state == 'restore' else None
 
     if state == 'rename':
         module.warn('The rename choice of the state option is deprecated and will be removed '
@@ -802,13 +1825,27 @@ def main():
 
     raw_connection = state in ("dump", "restore")
 
-    if not raw_connection:
+    # The objects of a sharded dump are resolved from the catalog
+    if not raw_connection or shards:
         ensure_required_libs(module)
 
     if target == "":
-        target = "{0}/{1}.sql".format(os.getcwd(), db)
+        target = "{0}/{1}{2}".format(os.getcwd(), db, "" if shards else ".sql")
         target = os.path.expanduser(target)
 
+    shards_manifest = read_shards_manifest(target) if state == 'restore' and os.path.isdir(target) else None
+
+    if shards is not None:
+        check_shards(module, target, shards, shard_by, jobs, include_tables)
+    elif raw_connection and not shards_manifest:
+        check_jobs(module, state, target, jobs)
+
+    if checkpoint_file:
+        check_checkpoint(module, target, shards_manifest)
+
+    if compression_threads is not None and compression_threads < 0:
+        module.fail_json(msg='The "compression_threads" option must be at least 0.')
+
     # Such a transformation is used, since the connection should go to 'maintenance_db'
     params_dict = module.params
     params_dict["db"] = module.params["maintenance_db"]
@@ -861,20 +1898,76 @@ def main():
 
             method = state == "dump" and db_dump or db_restore
 
-            if state == 'dump':
+            start_time = time.time()
+            if shards:
+                shard_conn_params = get_conn_params(module, dict(module.params, db=db), warn_db_default=False)
+                shard_connection, dummy = connect_to_db(module, shard_conn_params, autocommit=True)
+                shard_cursor = shard_connection.cursor(**pg_cursor_args)
+                try:
+                    # The catalog is read and every pg_dump runs in the same snapshot
+                    snapshot = export_snapshot(shard_cursor)
+                    objects = get_shard_objects(shard_cursor, shard_by, include_tables, exclude_tables,
+                                                include_schemas, exclude_schemas)
+                    if not objects:
+                        module.fail_json(msg='No {0} to dump matches the include and exclude options.'.format(shard_by))
+                    rc, stdout, stderr, cmd = db_dump_shards(
+                        module, target, target_opts, db, dump_extra_args, session_role=session_role,
+                        shard_by=shard_by, shards=assign_shards(objects, shards), snapshot=snapshot,
+                        compression=compression, compression_level=compression_level,
+                        exclude_tables=exclude_tables, include_schemas=include_schemas,
+                        exclude_schemas=exclude_schemas, **conn_params
+                    )
+                finally:
+                    shard_cursor.close()
+                    shard_connection.close()
+                shards_manifest = read_shards_manifest(target)
+            elif checkpoint_file:
+                checkpoint = dict(file=checkpoint_file)
+                rc, stdout, stderr, cmd = db_restore_checkpointed(
+                    module, target, target_opts, db, session_role=session_role, jobs=jobs,
+                    checkpoint_file=checkpoint_file, checkpoint=checkpoint, **conn_params
+                )
+            elif shards_manifest:
+                rc, stdout, stderr, cmd = db_restore_shards(
+                    module, target, target_opts, db, session_role=session_role, jobs=jobs,
+                    manifest=shards_manifest, **conn_params
+                )
+            elif state == 'dump':
                 rc, stdout, stderr, cmd = method(
-                    module, target, target_opts, db, dump_extra_args, session_role=session_role, **conn_params
+                    module, target, target_opts, db, dump_extra_args, session_role=session_role, jobs=jobs,
+                    compression=compression, compression_level=compression_level,
+                    compression_threads=compression_threads, include_tables=include_tables,
+                    exclude_tables=exclude_tables, include_schemas=include_schemas,
+                    exclude_schemas=exclude_schemas, **conn_params
                 )
             else:
                 rc, stdout, stderr, cmd = method(
-                    module, target, target_opts, db, session_role=session_role, **conn_params
+                    module, target, target_opts, db, session_role=session_role, jobs=jobs,
+                    compression=compression, **conn_params
                 )
+            duration = time.time() - start_time
 
             if rc != 0:
+                if checkpoint_file:
+                    module.fail_json(msg=stderr, stdout=stdout, rc=rc, cmd=cmd, checkpoint=checkpoint)
                 module.fail_json(msg=stderr, stdout=stdout, rc=rc, cmd=cmd)
             else:
-                module.exit_json(changed=True, msg=stdout, stderr=stderr, rc=rc, cmd=cmd,
-                                 executed_commands=executed_commands)
+                size = get_target_size(target)
+                stats = dict(
+                    bytes=size,
+                    duration_ms=round(duration * 1000, 3),
+                    bytes_per_sec=round(size / duration, 1) if duration else 0,
+                    jobs=jobs,
+                )
+                result = dict(changed=True, msg=stdout, stderr=stderr, rc=rc, cmd=cmd,
+                              executed_commands=executed_commands, stats=stats)
+                if shards_manifest:
+                    result['manifest'] = shards_manifest
+                if checkpoint_file:
+                    # Nothing is restored if the checkpoint file already records every entry
+                    result['changed'] = cmd is not None
+                    result['checkpoint'] = checkpoint
+                module.exit_json(**result)
 
         elif state == 'rename':
             changed = rename_db(module, cursor, db, target)
@@ -46,6 +46,18 @@ options:
     type: bool
     default: true
     version_added: '0.2.0'
+  max_parallel:
+    description:
+    - Maximum number of databases whose namespaces, extensions, languages,
+      publications and subscriptions are collected concurrently
+      when the C(databases) subset is collected.
+    - Each database is processed using its own connection,
+      so up to I(max_parallel) additional connections are opened at the same time.
+    - Connection errors are reported per database in the C(error) key
+      and do not affect other databases.
+    type: int
+    default: 1
+    version_added: '4.3.0'
 
 attributes:
   check_mode:
@@ -88,6 +100,13 @@ EXAMPLES = r'''
   community.postgresql.postgresql_info:
     filter: "!settings,!roles"
 
+- name: Collect databases info processing up to 8 databases concurrently
+  become: true
+  become_user: postgres
+  community.postgresql.postgresql_info:
+    filter: databases
+    max_parallel: 8
+
 # On FreeBSD with PostgreSQL 9.5 version and lower use pgsql user to become
 # and pass "postgres" as a database to connect to
 - name: Collect tablespaces and repl_slots info
@@ -154,10 +173,12 @@ settings:
 '''
 
 import re
+import threading
 from fnmatch import fnmatch
 
 from ansible.module_utils.common.text.converters import to_native
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves import queue
 from ansible_collections.community.postgresql.plugins.module_utils.database import \
     check_input
 from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
@@ -165,8 +186,10 @@ from ansible_collections.community.postgresql.plugins.module_utils.postgres impo
     ensure_required_libs,
     get_conn_params,
     get_server_version,
+    open_connection,
     pg_cursor_args,
     postgres_common_argument_spec,
+    SessionInitError,
 )
 
 # ===========================================
@@ -201,20 +224,28 @@ class PgDbConn(object):
             return None
         return self.db_conn.cursor(**pg_cursor_args)
 
-    def reconnect(self, dbname):
-        """Reconnect to another database and return a PostgreSQL cursor object.
+    def connect_db(self, dbname):
+        """Open an additional connection to another database.
+
+        Unlike connect(), it neither replaces the current connection,
+        nor modifies the module parameters, nor fails the module,
+        so it is safe to call from concurrent threads.
+
+        Return a connection object or None if the server is unavailable.
+        Raise SessionInitError if the session cannot be initialized.
 
         Arguments:
             dbname (string): Database name to connect to.
         """
-        if self.db_conn is not None:
-            self.db_conn.close()
-
-        # the lines below seem redundant but they are actually needed for connect to work as expected
-        self.module.params['db'] = dbname
-        self.module.params['database'] = dbname
-        self.module.params['login_db'] = dbname
-        return self.connect(fail_on_conn=False)
+        params = dict(self.module.params, db=dbname, database=dbname, login_db=dbname)
+        conn_params = get_conn_params(self.module, params, warn_db_default=False)
+        try:
+            return open_connection(conn_params, session_role=self.module.params.get('session_role'))
+        except SessionInitError:
+            raise
+        except Exception as e:
+            self.module.warn("PostgreSQL server is unavailable: %s" % to_native(e))
+            return None
 
 
 class PgClusterInfo(object):
@@ -229,7 +260,6 @@ class PgClusterInfo(object):
         self.module = module
         self.db_obj = db_conn_obj
         self.cursor = db_conn_obj.connect()
-        self.default_db = self.__get_current_db()
         self.pg_info = {
             "version": {},
             "in_recovery": None,
@@ -298,14 +328,14 @@ class PgClusterInfo(object):
 
         return self.pg_info
 
-    def get_pub_info(self):
+    def get_pub_info(self, cursor=None):
         """Get publication statistics."""
         query = ("SELECT p.*, r.rolname AS ownername "
                  "FROM pg_catalog.pg_publication AS p "
                  "JOIN pg_catalog.pg_roles AS r "
                  "ON p.pubowner = r.oid")
 
-        result = self.__exec_sql(query)
+        result = self.__exec_sql(query, cursor)
 
         if result:
             result = [dict(row) for row in result]
@@ -392,12 +422,12 @@ class PgClusterInfo(object):
 
         self.pg_info["tablespaces"] = ts_dict
 
-    def get_ext_info(self):
+    def get_ext_info(self, cursor=None):
         """Get information about existing extensions."""
         # Check that pg_extension exists:
         res = self.__exec_sql("SELECT EXISTS (SELECT 1 FROM "
                               "information_schema.tables "
-                              "WHERE table_name = 'pg_extension')")
+                              "WHERE table_name = 'pg_extension')", cursor)
         if not res[0]["exists"]:
             return True
 
@@ -408,7 +438,7 @@ class PgClusterInfo(object):
                  "LEFT JOIN pg_catalog.pg_description AS c "
                  "ON c.objoid = e.oid "
                  "AND c.classoid = 'pg_catalog.pg_extension'::pg_catalog.regclass")
-        res = self.__exec_sql(query)
+        res = self.__exec_sql(query, cursor)
         ext_dict = {}
         for i in res:
             ext_ver_raw = i["extversion"]
@@ -586,11 +616,11 @@ class PgClusterInfo(object):
 
         self.pg_info["replications"] = repl_dict
 
-    def get_lang_info(self):
+    def get_lang_info(self, cursor=None):
         """Get information about current supported languages."""
         query = ("SELECT l.lanname, pg_catalog.pg_get_userbyid(l.lanowner) AS rolname, l.lanacl::text "
                  "FROM pg_language AS l ")
-        res = self.__exec_sql(query)
+        res = self.__exec_sql(query, cursor)
         lang_dict = {}
         for i in res:
             lang_dict[i["lanname"]] = dict(
@@ -600,11 +630,11 @@ class PgClusterInfo(object):
 
         return lang_dict
 
-    def get_namespaces(self):
+    def get_namespaces(self, cursor=None):
         """Get information about namespaces."""
         query = ("SELECT n.nspname, pg_catalog.pg_get_userbyid(n.nspowner) AS rolname, n.nspacl::text "
                  "FROM pg_catalog.pg_namespace AS n ")
-        res = self.__exec_sql(query)
+        res = self.__exec_sql(query, cursor)
 
         nsp_dict = {}
         for i in res:
@@ -680,35 +710,91 @@ class PgClusterInfo(object):
                 size=i["dbsize"],
             )
 
+        subscr_info = None
         if get_server_version(self.cursor.connection) >= 100000:
             subscr_info = self.get_subscr_info()
 
+        # Every database is processed using its own connection
+        # by up to max_parallel concurrent threads:
+        db_queue = queue.Queue()
         for datname in db_dict:
-            self.cursor = self.db_obj.reconnect(datname)
-            if self.cursor is None:
+            db_queue.put(datname)
+
+        errors = {}
+        max_parallel = min(self.module.params['max_parallel'], len(db_dict))
+        if max_parallel <= 1:
+            self.__db_info_worker(db_queue, db_dict, subscr_info, errors)
+        else:
+            workers = [threading.Thread(target=self.__db_info_worker,
+                                        args=(db_queue, db_dict, subscr_info, errors))
+                       for dummy in range(max_parallel)]
+
+            for worker in workers:
+                worker.start()
+
+            for worker in workers:
+                worker.join()
+
+        if errors:
+            datname = sorted(errors)[0]
+            self.module.fail_json(msg="Cannot get information about database %s: %s" % (datname, errors[datname]))
+
+        self.pg_info["databases"] = db_dict
+
+    def __db_info_worker(self, db_queue, db_dict, subscr_info, errors):
+        """Collect per-database information for databases taken from the queue.
+
+        Runs in a separate thread when max_parallel is greater than 1,
+        so it must not fail the module. Session initialization
+        and SQL errors are put into the errors dict.
+        """
+        while True:
+            try:
+                datname = db_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                db_conn = self.db_obj.connect_db(datname)
+            except SessionInitError as e:
+                errors[datname] = to_native(e)
+                continue
+
+            if db_conn is None:
                 # that means we don't have permission to access these database
                 db_dict[datname]['namespaces'] = {}
                 db_dict[datname]['extensions'] = {}
                 db_dict[datname]['languages'] = {}
                 db_dict[datname]['error'] = "Could not connect to the database."
                 continue
-            db_dict[datname]['namespaces'] = self.get_namespaces()
-            db_dict[datname]['extensions'] = self.get_ext_info()
-            db_dict[datname]['languages'] = self.get_lang_info()
-            if get_server_version(self.cursor.connection) >= 100000:
-                db_dict[datname]['publications'] = self.get_pub_info()
-                db_dict[datname]['subscriptions'] = subscr_info.get(datname, {})
 
-        self.pg_info["databases"] = db_dict
-        # Reconnect to the default DB after gathering info in other DBs
-        self.cursor = self.db_obj.reconnect(self.default_db)
+            cursor = db_conn.cursor(**pg_cursor_args)
+            try:
+                db_dict[datname]['namespaces'] = self.get_namespaces(cursor)
+                db_dict[datname]['extensions'] = self.get_ext_info(cursor)
+                db_dict[datname]['languages'] = self.get_lang_info(cursor)
+                if subscr_info is not None:
+                    db_dict[datname]['publications'] = self.get_pub_info(cursor)
+                    db_dict[datname]['subscriptions'] = subscr_info.get(datname, {})
+            except Exception as e:
+                errors[datname] = to_native(e)
+            finally:
+                cursor.close()
+                db_conn.close()
 
     def __get_pretty_val(self, setting):
         """Get setting's value represented by SHOW command."""
         return self.__exec_sql('SHOW "%s"' % setting)[0][setting]
 
-    def __exec_sql(self, query):
-        """Execute SQL and return the result."""
+    def __exec_sql(self, query, cursor=None):
+        """Execute SQL and return the result.
+
+        If cursor is passed, errors are raised instead of failing the module.
+        """
+        if cursor is not None:
+            cursor.execute(query)
+            return cursor.fetchall() or False
+
         try:
             self.cursor.execute(query)
             res = self.cursor.fetchall()
@@ -719,13 +805,6 @@ class PgClusterInfo(object):
             self.cursor.close()
         return False
 
-    def __get_current_db(self):
-        """Get current DB"""
-        # The context is to get the user's default database.
-        # Should be executed right after logging in
-        # https://github.com/ansible-collections/community.postgresql/issues/794
-        return self.__exec_sql('SELECT current_database() AS db')[0]['db']
-
 # ===========================================
 # Module execution.
 #
@@ -738,6 +817,7 @@ def main():
         filter=dict(type='list', elements='str'),
         session_role=dict(type='str'),
         trust_input=dict(type='bool', default=True),
+        max_parallel=dict(type='int', default=1),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -746,6 +826,9 @@ def main():
 
     filter_ = module.params['filter']
 
+    if module.params['max_parallel'] < 1:
+        module.fail_json(msg='max_parallel must be greater than zero')
+
     if not module.params['trust_input']:
         # Check input for potentially dangerous elements:
         check_input(module, module.params['session_role'])
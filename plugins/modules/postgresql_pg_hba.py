@@ -20,7 +20,9 @@ description:
    - The lines in the file should be in a typical pg_hba form and lines should be unique per key (type, databases, users, source).
      If they are not unique and the SID is 'the one to change', only one for I(state=present) or
      none for I(state=absent) of the SID's will remain.
-extends_documentation_fragment: files
+extends_documentation_fragment:
+- files
+- community.postgresql.postgres
 options:
   address:
     description:
@@ -86,6 +88,38 @@ options:
       - Ignores all errors in the existing file.
     type: bool
     default: false
+  remove_unlisted_rules:
+    description:
+      - Remove all existing rules that are not specified with I(state=present), either in I(rules) or with the
+        rule-specific arguments. Use this to manage the complete set of rules of a file in one task.
+      - Unlike with I(overwrite), comments and includes are kept and errors in the existing file are not ignored.
+      - Mutually exclusive with I(overwrite).
+    type: bool
+    default: false
+    version_added: '4.3.0'
+  reload:
+    description:
+      - Reload the server configuration with C(pg_reload_conf()) if the C(pg_hba) file has changed.
+      - The connection options are only used with I(reload=true) or I(validate_on_server=true),
+        C(psycopg) is only required then.
+    type: bool
+    default: false
+    version_added: '4.3.0'
+  validate_on_server:
+    description:
+      - After writing the file, check the rules with the C(pg_hba_file_rules) view of the server.
+        If the server reports errors, the previous content of the file is restored and the module fails
+        with the errors in I(validation_errors). The server configuration is not reloaded then.
+      - I(dest) must be the C(pg_hba) file of the server, see the C(hba_file) setting.
+      - Requires PostgreSQL 10 or later. By default, only superusers can read C(pg_hba_file_rules).
+    type: bool
+    default: false
+    version_added: '4.3.0'
+  login_db:
+    description:
+      - Name of the database to connect to when I(reload=true) or I(validate_on_server=true).
+    type: str
+    version_added: '4.3.0'
   keep_comments_at_rules:
     description:
       - This option has been deprecated and doesn't do anything. The module behaves as if this is C(true).
@@ -145,6 +179,8 @@ notes:
      In that situation, the 'ip specific rule' will never hit, it is in the C(pg_hba) file obsolete.
      After the C(pg_hba) file is rewritten by the M(community.postgresql.postgresql_pg_hba) module, the ip specific rule will be sorted above the range rule.
      And then it will hit, which will give unexpected results.
+   - Instead of looping over this module, pass all rules with I(rules).
+     The file is then read, backed up and written only once.
 
 seealso:
 - name: PostgreSQL pg_hba.conf file reference
@@ -232,6 +268,22 @@ EXAMPLES = '''
     - users: user3
       databases: db3
       # contype, address and comment come from custom default
+
+- name: Keep only the listed rules, keep comments and includes, and reload the configuration if the file has changed
+  community.postgresql.postgresql_pg_hba:
+    dest: /var/lib/postgres/data/pg_hba.conf
+    remove_unlisted_rules: true
+    validate_on_server: true
+    reload: true
+    rules:
+    - contype: local
+      users: postgres
+      method: peer
+    - contype: hostssl
+      users: app
+      databases: app
+      address: 10.0.0.0/8
+      method: scram-sha-256
 '''
 
 RETURN = r'''
@@ -269,10 +321,27 @@ pg_hba_string:
     returned: success
     type: str
     sample: "local\tall\tall\tpeer"
+reloaded:
+    description: Whether the server configuration has been reloaded.
+    returned: if I(reload=true)
+    type: bool
+    sample: true
+    version_added: '4.3.0'
+validation_errors:
+    description:
+      - Errors reported by the C(pg_hba_file_rules) view of the server for the written file.
+      - I(line_number) is the line of the error in the written file, I(rule) is the rule written to that line.
+      - I(file_name) is only returned for errors in files included by the C(pg_hba) file, I(rule) is empty then.
+    returned: if I(validate_on_server=true) and the server reports errors
+    type: list
+    elements: dict
+    sample: [{"line_number": 3, "rule": "hostssl\tall\tall\t10.0.0.0/8\tldap", "error": "authentication option not in name=value format: ldap"}]
+    version_added: '4.3.0'
 '''
 
 import copy
 import os
+from bisect import bisect_right
 import re
 import traceback
 import time
@@ -287,8 +356,15 @@ import shutil
 import tempfile
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-
-# from ansible.module_utils.postgres import postgres_common_argument_spec
+from ansible.module_utils.common.text.converters import to_native
+from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
+    connect_to_db,
+    ensure_required_libs,
+    get_conn_params,
+    get_server_version,
+    pg_cursor_args,
+    postgres_common_argument_spec,
+)
 
 PG_HBA_METHODS = ["trust", "reject", "md5", "password", "gss", "sspi", "krb5", "ident", "peer",
                   "ldap", "radius", "cert", "pam", "scram-sha-256"]
@@ -535,6 +611,7 @@ class PgHbaRule:
 
         self._address_type = None
         self._prefix_len = None
+        self._sort_key = None
 
         # includes, comment-only lines and empty lines are special
         self._is_special = False
@@ -660,55 +737,32 @@ class PgHbaRule:
         which corresponds to ipv6 (0-128).
         """
 
-        if self.is_special and other.is_special:
-            myweight = self.special_weight()
-            hisweight = other.special_weight()
-            if myweight != hisweight:
-                return myweight < hisweight
+        return self.sort_key() < other.sort_key()
+
+    def sort_key(self):
+        """
+        Returns the key that decides where this rule is sorted, see __lt__. The key is computed only once, so lists of
+        rules can be sorted with a single `key=` sort instead of comparing the weights of two rules over and over.
+        """
+        if self._sort_key is not None:
+            return self._sort_key
+
+        if self.is_special:
+            # comments go before anything else, includes and empty lines go last
+            group = 0 if self._comment and not self._line.startswith("include") else 2
+            # rules with a line number keep their initial order and are sorted before the rules without one,
+            # like that, new full-line comments are always added after existing ones. Those are ordered alphabetically.
+            if self._line_nr:
+                order = (0, self._line_nr, "")
             else:
-                # if both have a line number, don't change the initial order
-                if self._line_nr and other.line_nr:
-                    return self._line_nr < other.line_nr
-                # if neither has a line number, order alphabetically
-                elif not self._line_nr and not other.line_nr:
-                    return self.line < other.line
-                # if only one of the rules has a line number, that one is sorted before the other
-                # like that, new full-line comments are always added after existing ones
-                else:
-                    return self.line_nr > other.line_nr
-
-        # comments go before anything else, includes go last
-        if self.is_special and not other.is_special:
-            # this line is less than the other if it is not an include and a (full-line) comment
-            return (not self._line.startswith("include")) and bool(self._comment)
-        if not self.is_special and other.is_special:
-            # this line is less than the other if the other is an include and not a comment
-            return other.line.startswith("include") and (not bool(other.comment))
-
-        myweight = self.source_weight()
-        hisweight = other.source_weight()
-        if myweight != hisweight:
-            return myweight > hisweight
-
-        myweight = self.db_weight()
-        hisweight = other.db_weight()
-        if myweight != hisweight:
-            return myweight < hisweight
-
-        myweight = self.user_weight()
-        hisweight = other.user_weight()
-        if myweight != hisweight:
-            return myweight < hisweight
-
-        myweight = self.source_type_weight()
-        hisweight = other.source_type_weight()
-        if myweight != hisweight:
-            return myweight > hisweight
-        elif self.source != other.source:
-            return self.source < other.source
-
-        # When all else fails, just compare the rendered lines
-        return self.serialize() < other.serialize()
+                order = (1, 0, self._line)
+            self._sort_key = (group, self.special_weight()) + order
+        else:
+            # the source type weight is only equal for sources of the same type, so they can be compared directly.
+            # When all else fails, just compare the rendered lines
+            self._sort_key = (1, -self.source_weight(), self.db_weight(), self.user_weight(),
+                              -self.source_type_weight(), self.source, self.serialize())
+        return self._sort_key
 
     def __str__(self):
         return self.serialize()
@@ -1173,13 +1227,28 @@ def search_rule(rules, rule):
     return -1
 
 
-def update_rules(new_rules, existing_rules, prepend_rules=False):
+def index_rules(rules):
+    """
+    Index a list of rules by their key, special rules are not indexed
+    :param rules: The list of rules to index
+    :return: A dict of rule keys to the ascending list of positions of the rules with that key
+    """
+    index = {}
+    for position, rule in enumerate(rules):
+        if not rule.is_special:
+            index.setdefault(rule.key(), []).append(position)
+    return index
+
+
+def update_rules(new_rules, existing_rules, prepend_rules=False, remove_unlisted_rules=False):
     """
     Updates existing rules with new rules. The existing rules are updated in place.
     This method exists to extract this part of the logic for better testability.
     :param new_rules: A list of new rules for updating the existing ones
     :param existing_rules: The list of rules to update
     :param prepend_rules: Add new rules to the top instead of in the end
+    :param remove_unlisted_rules: Remove the existing rules that are not in the new rules with state present,
+                                  comments and includes are kept
     :return: changed, msgs, diff_before, diff_after
     """
     changed = False
@@ -1187,6 +1256,14 @@ def update_rules(new_rules, existing_rules, prepend_rules=False):
     diff_after = []
     diff_before = []
 
+    # The rules are kept by position while updating, so that a lookup by key doesn't have to search the whole list.
+    # New rules get a position before the first or after the last one, so no position changes on inserts and deletes.
+    positions = dict(enumerate(existing_rules))
+    index = index_rules(existing_rules)
+    first = 0
+    last = len(existing_rules) - 1
+    listed_keys = set()
+
     for rule in new_rules:
         if 'contype' in rule and rule['contype']:
             rule['databases'] = handle_db_and_user_strings(rule['databases'])
@@ -1197,32 +1274,59 @@ def update_rules(new_rules, existing_rules, prepend_rules=False):
                 pg_hba_rule = PgHbaRule(tokens="COMMENT", comment=rule['comment'])
             else:
                 continue
-        index = search_rule(existing_rules, pg_hba_rule)
+
+        if pg_hba_rule.is_special:
+            # comments are rare, they are compared with every rule
+            position = next((p for p in sorted(positions) if positions[p] == pg_hba_rule), None)
+        else:
+            position = index.get(pg_hba_rule.key(), [None])[0]
+            if rule['state'] == "present":
+                listed_keys.add(pg_hba_rule.key())
 
         # append rule if it doesn't exist
-        if rule['state'] == "present" and index == -1:
+        if rule['state'] == "present" and position is None:
             msgs.append('Adding rule {0}'.format(pg_hba_rule))
             diff_after.append(str(pg_hba_rule))
             if prepend_rules:
-                existing_rules.insert(0, pg_hba_rule)
+                first -= 1
+                position = first
             else:
-                existing_rules.append(pg_hba_rule)
+                last += 1
+                position = last
+            positions[position] = pg_hba_rule
+            if not pg_hba_rule.is_special:
+                index[pg_hba_rule.key()] = [position]
             changed = True
         # update rule if it exists but is not correct
-        elif rule['state'] == "present" and index > -1:
-            if not existing_rules[index].is_identical(pg_hba_rule):
+        elif rule['state'] == "present" and position is not None:
+            if not positions[position].is_identical(pg_hba_rule):
                 msgs.append('Updating rule {0}'.format(pg_hba_rule))
-                diff_before.append(str(existing_rules[index]))
+                diff_before.append(str(positions[position]))
                 diff_after.append(str(pg_hba_rule))
-                existing_rules[index] = pg_hba_rule
+                positions[position] = pg_hba_rule
                 changed = True
         # delete rule if it exists
-        elif rule['state'] == "absent" and index > -1:
+        elif rule['state'] == "absent" and position is not None:
             msgs.append('Removing rule {0}'.format(pg_hba_rule))
-            diff_before.append(str(existing_rules[index]))
-            del existing_rules[index]
+            diff_before.append(str(positions[position]))
+            del positions[position]
+            if not pg_hba_rule.is_special:
+                key_positions = index[pg_hba_rule.key()]
+                key_positions.pop(0)
+                if not key_positions:
+                    del index[pg_hba_rule.key()]
             changed = True
 
+    if remove_unlisted_rules:
+        for position in sorted(p for key in index if key not in listed_keys for p in index[key]):
+            msgs.append('Removing rule {0}'.format(positions[position]))
+            diff_before.append(str(positions[position]))
+            del positions[position]
+            changed = True
+
+    if changed:
+        existing_rules[:] = [positions[position] for position in sorted(positions)]
+
     return changed, msgs, diff_before, diff_after
 
 
@@ -1232,12 +1336,93 @@ def sort_rules(rules):
     :param rules: A list of rules to sort
     """
     # remove blank lines before sorting
-    index_lst = list(range(0, len(rules)))
-    index_lst.reverse()
-    for i in index_lst:
-        if rules[i].is_special and not rules[i].line and not rules[i].comment:
-            del rules[i]
-    rules.sort()
+    rules[:] = [rule for rule in rules if not (rule.is_special and not rule.line and not rule.comment)]
+    rules.sort(key=PgHbaRule.sort_key)
+
+
+def connect_to_server(module):
+    """
+    Connects to the server for reloading the configuration or validating the file
+    :param module: The module-object
+    :return: A cursor of an autocommit connection
+    """
+    ensure_required_libs(module)
+    conn_params = get_conn_params(module, module.params, warn_db_default=False)
+    db_connection, dummy = connect_to_db(module, conn_params, autocommit=True)
+    return db_connection.cursor(**pg_cursor_args)
+
+
+def check_hba_file(cursor, module, dest):
+    """
+    Fails if the server can't validate the file at dest with the pg_hba_file_rules view
+    :param cursor: A cursor connected to the server
+    :param module: The module-object
+    :param dest: The path to the file to write
+    """
+    if get_server_version(cursor.connection) < 100000:
+        module.fail_json(msg='"validate_on_server" requires PostgreSQL 10 or later')
+    cursor.execute("SELECT current_setting('hba_file') AS hba_file")
+    hba_file = cursor.fetchone()['hba_file']
+    if os.path.realpath(hba_file) != os.path.realpath(dest):
+        module.fail_json(msg='"validate_on_server" only works for the pg_hba file of the server, '
+                             'which is {0}, not {1}'.format(hba_file, dest))
+
+
+def map_hba_file_errors(rule_list, error_rows):
+    """
+    Maps the errors reported by pg_hba_file_rules to the rules of the written file
+    :param rule_list: The list of rules as it has been rendered into the file
+    :param error_rows: A list of rows with the line_number, error and file_name columns, file_name is None
+                       for errors in the file itself
+    :return: A list of dicts with the line number, the rule written to that line and the error
+    """
+    # the line numbers the rules start at, a rule may span several lines
+    line_nrs = []
+    line_nr = 1
+    for rule in rule_list:
+        line_nrs.append(line_nr)
+        line_nr += rule.serialize().count("\n") + 1
+
+    errors = []
+    for row in error_rows:
+        line_number, error, file_name = row['line_number'], row['error'], row['file_name']
+        if file_name:
+            errors.append({'line_number': line_number, 'rule': '', 'error': error, 'file_name': file_name})
+            continue
+        index = bisect_right(line_nrs, line_number) - 1
+        rule = str(rule_list[index]) if index >= 0 else ''
+        errors.append({'line_number': line_number, 'rule': rule, 'error': error})
+    return errors
+
+
+def validate_hba_file(cursor, rule_list):
+    """
+    Checks the written file with the pg_hba_file_rules view
+    :param cursor: A cursor connected to the server
+    :param rule_list: The list of rules as it has been rendered into the file
+    :return: A list of errors, see map_hba_file_errors
+    """
+    # since PostgreSQL 16, pg_hba files can include other files
+    if get_server_version(cursor.connection) >= 160000:
+        cursor.execute("SELECT line_number, error, "
+                       "CASE WHEN file_name = current_setting('hba_file') THEN NULL ELSE file_name END AS file_name "
+                       "FROM pg_hba_file_rules WHERE error IS NOT NULL ORDER BY pg_hba_file_rules.file_name, line_number")
+    else:
+        cursor.execute("SELECT line_number, error, NULL AS file_name FROM pg_hba_file_rules WHERE error IS NOT NULL "
+                       "ORDER BY line_number")
+    return map_hba_file_errors(rule_list, cursor.fetchall())
+
+
+def reload_conf(cursor, module):
+    """
+    Reloads the server configuration
+    :param cursor: A cursor connected to the server
+    :param module: The module-object
+    """
+    try:
+        cursor.execute("SELECT pg_reload_conf()")
+    except Exception as e:
+        module.fail_json(msg="Cannot run 'SELECT pg_reload_conf()': %s" % to_native(e))
 
 
 def rules_are_identical(rule_list_one, rule_list_two):
@@ -1266,8 +1451,7 @@ def main():
     """
     This function is the main function of this module
     """
-    # argument_spec = postgres_common_argument_spec()
-    argument_spec = dict()
+    argument_spec = postgres_common_argument_spec()
     argument_spec.update(
         address=dict(type='str', default='samehost', aliases=['source', 'src']),
         backup=dict(type='bool', default=False),
@@ -1293,10 +1477,15 @@ def main():
         rules_behavior=dict(type='str', default='conflict', choices=['combine', 'conflict']),
         overwrite=dict(type='bool', default=False),
         sort_rules=dict(type='bool', default=True),
+        remove_unlisted_rules=dict(type='bool', default=False),
+        reload=dict(type='bool', default=False),
+        validate_on_server=dict(type='bool', default=False),
+        login_db=dict(type='str'),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
         add_file_common_args=True,
+        mutually_exclusive=[('overwrite', 'remove_unlisted_rules')],
         supports_check_mode=True
     )
     if IPADDRESS_IMP_ERR is not None:
@@ -1314,6 +1503,7 @@ def main():
     rules_behavior = module.params["rules_behavior"]
     overwrite = module.params["overwrite"]
     sorted_rules = module.params["sort_rules"]
+    remove_unlisted_rules = module.params["remove_unlisted_rules"]
 
     ret = {'msgs': []}
     diff = {'before': {'file': dest, 'pg_hba': []},
@@ -1341,6 +1531,8 @@ def main():
     if rules is None or not rules:
         # if both of those aren't set, we just read the rules from the file
         if not module.params['contype'] and not module.params['comment']:
+            if remove_unlisted_rules:
+                module.fail_json(msg='"remove_unlisted_rules" requires "rules" or "contype" to be set')
             new_rules = []
         else:
             single_rule = dict()
@@ -1406,7 +1598,8 @@ def main():
             if changed:
                 pg_hba_rules = new_rules
         else:
-            changed, msgs, diff_before, diff_after = update_rules(rules, pg_hba_rules)
+            changed, msgs, diff_before, diff_after = update_rules(rules, pg_hba_rules,
+                                                                  remove_unlisted_rules=remove_unlisted_rules)
             ret['msgs'] += msgs
             diff['before']['pg_hba'] += diff_before
             diff['after']['pg_hba'] += diff_after
@@ -1424,6 +1617,16 @@ def main():
         # file_args = None
         file_args = module.load_file_common_arguments(module.params)
         if not module.check_mode:
+            cursor = None
+            if module.params['reload'] or module.params['validate_on_server']:
+                cursor = connect_to_server(module)
+            previous_hba_string = None
+            if module.params['validate_on_server']:
+                check_hba_file(cursor, module, dest)
+                if os.path.isfile(dest):
+                    with open(dest, 'r') as file:
+                        previous_hba_string = file.read()
+
             if backup and os.path.exists(dest):
                 ret['msgs'].append('Creating Backup')
                 backup_file_args = module.load_file_common_arguments(module.params)
@@ -1441,11 +1644,33 @@ def main():
             ret['msgs'].append('Writing')
             write_hba_file(dest, hba_string, create, module, file_args, diff)
             ret['diff'] = diff
+
+            if module.params['validate_on_server']:
+                ret['msgs'].append('Validating')
+                errors = validate_hba_file(cursor, pg_hba_rules)
+                if errors:
+                    # restore the previous content, the backup is kept
+                    if previous_hba_string is None:
+                        os.unlink(dest)
+                    else:
+                        write_hba_file(dest, previous_hba_string, create, module, file_args, diff)
+                    module.fail_json(msg='The server reported errors in the pg_hba file, the previous content has '
+                                         'been restored', validation_errors=errors)
+
+            if module.params['reload']:
+                ret['msgs'].append('Reloading')
+                reload_conf(cursor, module)
+
+            if cursor is not None:
+                cursor.close()
+                cursor.connection.close()
         elif not os.path.isfile(dest) and not create:
             module.warn("The file '{}' doesn't exist and `create` is `false`. This will cause the module to fail"
                         "when not running in check-mode. Set `create: true` to prevent this and create the file."
                         .format(dest))
 
+    if module.params['reload']:
+        ret['reloaded'] = changed and not module.check_mode
     ret['pg_hba_string'] = hba_string
     ret['pg_hba'] = rule_list_to_dict_list(pg_hba_rules, header_map=PG_HBA_HDR_MAP)
     module.exit_json(**ret)
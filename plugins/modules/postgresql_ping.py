@@ -94,6 +94,17 @@ conn_err_msg:
   type: str
   sample: ''
   version_added: 1.7.0
+session_init:
+  description:
+  - How the session was initialized after connecting, that is, switching to I(session_role) and setting C(datestyle).
+  - C(method) is C(startup_options) when it was done through libpq startup options without additional round trips,
+    C(statement) when a connection pooler rejected the options and a batched statement was executed instead,
+    or C(null) when there was nothing to initialize.
+  - C(round_trips) is the number of round trips the session initialization took.
+  returned: success
+  type: dict
+  sample: { method: startup_options, round_trips: 0 }
+  version_added: 4.3.0
 '''
 
 import re
@@ -190,12 +201,14 @@ def main():
         is_available=False,
         server_version=dict(),
         conn_err_msg='',
+        session_init=dict(),
     )
 
     # Ensure psycopg libraries are available before connecting to DB:
     ensure_required_libs(module)
     conn_params = get_conn_params(module, module.params, warn_db_default=False)
-    db_connection, err = connect_to_db(module, conn_params, fail_on_conn=False)
+    db_connection, err = connect_to_db(module, conn_params, fail_on_conn=False,
+                                       session_stats=result['session_init'])
     if err:
         result['conn_err_msg'] = err
 
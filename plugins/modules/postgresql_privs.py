@@ -85,8 +85,8 @@ options:
     - Roles C(PUBLIC), C(CURRENT_ROLE), C(CURRENT_USER), C(SESSION_USER) are implicitly defined in PostgreSQL.
     - C(CURRENT_USER) and C(SESSION_USER) implicit roles are supported since collection version 3.1.0 and PostgreSQL 9.5.
     - C(CURRENT_ROLE) implicit role is supported since collection version 3.1.0 and PostgreSQL 14.
+    - Required unless I(plan) is used.
     type: str
-    required: true
     aliases:
     - role
   fail_on_role:
@@ -123,6 +123,64 @@ options:
     type: bool
     default: true
     version_added: '0.2.0'
+  plan:
+    description:
+    - List of privileges to grant or revoke in one connection and one transaction.
+    - Every entry accepts the same options as the module does for a single set of privileges.
+      If any entry fails, nothing is changed.
+    - Objects for C(ALL_IN_SCHEMA) are looked up only once per object type and schema.
+    - Mutually exclusive with I(type), I(objs), I(privs), I(roles), I(schema),
+      I(state), I(target_roles) and I(grant_option).
+    type: list
+    elements: dict
+    version_added: '4.3.0'
+    suboptions:
+      type:
+        description:
+        - Type of database object to set privileges on, see I(type).
+        type: str
+        default: table
+        choices: [ database, default_privs, foreign_data_wrapper, foreign_server, function,
+                   group, language, table, tablespace, schema, sequence, type, procedure, parameter ]
+      objs:
+        description:
+        - Comma separated list of database objects to set privileges on, see I(objs).
+        type: str
+        aliases:
+        - obj
+      privs:
+        description:
+        - Comma separated list of privileges to grant/revoke.
+        type: str
+        aliases:
+        - priv
+      roles:
+        description:
+        - Comma separated list of role (user/group) names to set permissions for, see I(roles).
+        type: str
+        required: true
+        aliases:
+        - role
+      schema:
+        description:
+        - Schema that contains the database objects specified via I(objs), see I(schema).
+        type: str
+      state:
+        description:
+        - If C(present), the specified privileges are granted, if C(absent) they are revoked.
+        type: str
+        default: present
+        choices: [ absent, present ]
+      target_roles:
+        description:
+        - Comma separated list of roles to set default privileges as, see I(target_roles).
+        type: str
+      grant_option:
+        description:
+        - Whether the roles may grant/revoke the specified privileges to others, see I(grant_option).
+        type: bool
+        aliases:
+        - admin_option
 
 notes:
 - Parameters that accept comma separated lists (I(privs), I(objs), I(roles))
@@ -135,6 +193,10 @@ notes:
   specified via I(login_user). If R has been granted the same privileges by
   another user also, R can still access database objects via these privileges.
 - When revoking privileges, C(RESTRICT) is assumed (see PostgreSQL docs).
+- Except for I(type=group), I(type=default_privs) and I(type=parameter), the module
+  compares the current ACLs of the objects with the desired state first and does not run
+  any statement if nothing would change. With I(objs=ALL_IN_SCHEMA), the statement is run
+  only for the objects that need changes when some of them are already in the desired state.
 
 seealso:
 - module: community.postgresql.postgresql_user
@@ -407,6 +469,35 @@ EXAMPLES = r'''
     type: parameter
     objs: primary_conninfo,synchronous_standby_names
     roles: replicamgr
+
+# Available since community.postgresql 4.3.0
+- name: Grant the privileges of the app schema bundle to app_user in one transaction
+  community.postgresql.postgresql_privs:
+    login_db: app
+    plan:
+    - type: schema
+      objs: app
+      privs: USAGE
+      roles: app_user
+    - objs: ALL_IN_SCHEMA
+      schema: app
+      privs: SELECT,INSERT,UPDATE,DELETE
+      roles: app_user
+    - type: sequence
+      objs: ALL_IN_SCHEMA
+      schema: app
+      privs: USAGE,SELECT
+      roles: app_user
+    - type: function
+      objs: ALL_IN_SCHEMA
+      schema: app
+      privs: EXECUTE
+      roles: app_user
+    - type: default_privs
+      objs: TABLES
+      schema: app
+      privs: SELECT,INSERT,UPDATE,DELETE
+      roles: app_user
 '''
 
 RETURN = r'''
@@ -415,6 +506,16 @@ queries:
   returned: success
   type: list
   sample: ['REVOKE GRANT OPTION FOR INSERT ON TABLE "books" FROM "reader";']
+plan_results:
+  description:
+  - Results of the I(plan) entries in the same order.
+  - Every result contains C(changed) and the C(queries) executed for the entry.
+  returned: if I(plan) is specified
+  type: list
+  elements: dict
+  sample: [{"changed": true, "queries": ['GRANT USAGE ON schema "app" TO "app_user";']},
+           {"changed": false, "queries": []}]
+  version_added: '4.3.0'
 '''
 
 import traceback
@@ -457,6 +558,78 @@ VALID_IMPLICIT_ROLES = {'PUBLIC': 0,
                         'SESSION_USER': 95000,
                         'CURRENT_ROLE': 140000, }
 
+OBJ_TYPES = ['table',
+             'sequence',
+             'function',
+             'procedure',
+             'database',
+             'schema',
+             'language',
+             'tablespace',
+             'group',
+             'default_privs',
+             'foreign_data_wrapper',
+             'foreign_server',
+             'type',
+             'parameter', ]
+
+# Privileges that ALL stands for, by object type
+ALL_PRIVS_BY_TYPE = {'table': ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'TRUNCATE', 'REFERENCES', 'TRIGGER'),
+                     'sequence': ('SELECT', 'UPDATE', 'USAGE'),
+                     'function': ('EXECUTE',),
+                     'procedure': ('EXECUTE',),
+                     'schema': ('CREATE', 'USAGE'),
+                     'language': ('USAGE',),
+                     'tablespace': ('CREATE',),
+                     'database': ('CREATE', 'CONNECT', 'TEMPORARY'),
+                     'foreign_data_wrapper': ('USAGE',),
+                     'foreign_server': ('USAGE',),
+                     'type': ('USAGE',), }
+
+# Queries returning ACL entries of objects of a type, one row per entry.
+# Objects without an explicit ACL get the built-in default one from acldefault().
+# Objects that have no entries at all are returned with a NULL privilege_type.
+ACL_ENTRY_COLUMNS = ("pg_catalog.pg_get_userbyid(a.grantor) AS grantor, "
+                     "CASE a.grantee WHEN 0 THEN '' ELSE pg_catalog.pg_get_userbyid(a.grantee) END AS grantee, "
+                     "a.privilege_type, a.is_grantable")
+ACL_QUERIES = {
+    'table': ("SELECT c.relname AS name, {0} FROM pg_catalog.pg_class c "
+              "JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace "
+              "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(c.relacl, acldefault('r', c.relowner))) a ON true "
+              "WHERE n.nspname = %(schema)s AND c.relkind IN ('r', 'p', 'v', 'm', 'f') "
+              "AND c.relname = ANY(%(objs)s)"),
+    'sequence': ("SELECT c.relname AS name, {0} FROM pg_catalog.pg_class c "
+                 "JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace "
+                 "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(c.relacl, acldefault('s', c.relowner))) a ON true "
+                 "WHERE n.nspname = %(schema)s AND c.relkind = 'S' AND c.relname = ANY(%(objs)s)"),
+    'function': ("SELECT x.name, {0} FROM unnest(%(objs)s::text[], %(signatures)s::text[]) AS x(name, signature) "
+                 "JOIN pg_catalog.pg_proc p ON p.oid = pg_catalog.to_regprocedure(x.signature) "
+                 "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(p.proacl, acldefault('f', p.proowner))) a ON true"),
+    'schema': ("SELECT nspname AS name, {0} FROM pg_catalog.pg_namespace "
+               "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(nspacl, acldefault('n', nspowner))) a ON true "
+               "WHERE nspname = ANY(%(objs)s)"),
+    'language': ("SELECT lanname AS name, {0} FROM pg_catalog.pg_language "
+                 "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(lanacl, acldefault('l', lanowner))) a ON true "
+                 "WHERE lanname = ANY(%(objs)s)"),
+    'tablespace': ("SELECT spcname AS name, {0} FROM pg_catalog.pg_tablespace "
+                   "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(spcacl, acldefault('t', spcowner))) a ON true "
+                   "WHERE spcname = ANY(%(objs)s)"),
+    'database': ("SELECT datname AS name, {0} FROM pg_catalog.pg_database "
+                 "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(datacl, acldefault('d', datdba))) a ON true "
+                 "WHERE datname = ANY(%(objs)s)"),
+    'foreign_data_wrapper': ("SELECT fdwname AS name, {0} FROM pg_catalog.pg_foreign_data_wrapper "
+                             "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(fdwacl, acldefault('F', fdwowner))) a "
+                             "ON true WHERE fdwname = ANY(%(objs)s)"),
+    'foreign_server': ("SELECT srvname AS name, {0} FROM pg_catalog.pg_foreign_server "
+                       "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(srvacl, acldefault('S', srvowner))) a ON true "
+                       "WHERE srvname = ANY(%(objs)s)"),
+    'type': ("SELECT t.typname AS name, {0} FROM pg_catalog.pg_type t "
+             "JOIN pg_catalog.pg_namespace n ON n.oid = t.typnamespace "
+             "LEFT JOIN LATERAL pg_catalog.aclexplode(coalesce(t.typacl, acldefault('T', t.typowner))) a ON true "
+             "WHERE n.nspname = %(schema)s AND t.typname = ANY(%(objs)s)"),
+}
+ACL_QUERIES['procedure'] = ACL_QUERIES['function']
+
 executed_queries = []
 
 
@@ -464,6 +637,37 @@ class Error(Exception):
     pass
 
 
+def acl_needs_change(acl, grantees, privs, state, grant_option):
+    """Check if GRANT / REVOKE would change the ACL of an object.
+
+    Privileges are compared regardless of the grantor.
+
+    :param acl: Set of (grantor, grantee, privilege, grantable) tuples,
+                PUBLIC is represented by an empty grantee.
+    :param grantees: List of grantee names.
+    :param privs: List of privilege names.
+    :param state: "present" or "absent".
+    :param grant_option: True, False or None, see manipulate_privs().
+    """
+    held = {}
+    for dummy, grantee, priv, grantable in acl:
+        held[(grantee, priv)] = held.get((grantee, priv), False) or grantable
+
+    for grantee in grantees:
+        for priv in privs:
+            if state == 'absent':
+                if (grantee, priv) in held:
+                    return True
+
+            elif (grantee, priv) not in held:
+                return True
+
+            elif grant_option is not None and held[(grantee, priv)] != grant_option:
+                return True
+
+    return False
+
+
 # We don't have functools.partial in Python < 2.5
 def partial(f, *args, **kwargs):
     """Partial function application"""
@@ -724,6 +928,50 @@ class Connection(object):
             self.execute(query)
         return [t["typacl"] for t in self.cursor.fetchall()]
 
+    def get_acl_snapshot(self, obj_type, schema, objs, signatures=None):
+        """Get parsed ACLs of objects in one query.
+
+        :param obj_type: Type of database objects.
+        :param schema: Schema of the objects for the types that need it.
+        :param objs: List of object names.
+        :param signatures: List of schema-qualified signatures
+                           if obj_type is "function" or "procedure".
+
+        Returns None if ACLs of obj_type cannot be parsed, a dict with the object
+        names as keys and sets of (grantor, grantee, privilege, grantable) tuples
+        as values otherwise. Objects that do not exist are not in the dict.
+        """
+        if obj_type not in ACL_QUERIES:
+            return None
+
+        if obj_type in ('table', 'sequence', 'type') and not schema:
+            return None
+
+        query = ACL_QUERIES[obj_type].format(ACL_ENTRY_COLUMNS)
+        self.execute(query, dict(schema=schema, objs=list(objs), signatures=signatures))
+
+        snapshot = {}
+        for row in self.cursor.fetchall():
+            acl = snapshot.setdefault(row['name'], set())
+            if row['privilege_type'] is not None:
+                acl.add((row['grantor'], row['grantee'], row['privilege_type'], row['is_grantable']))
+
+        return snapshot
+
+    def get_grantee_names(self, roles):
+        """Convert roles as they are used in GRANT / REVOKE into names used in ACLs."""
+        names = []
+        for role in roles:
+            if role.startswith('"'):
+                names.append(role[1:-1].replace('""', '"'))
+            elif role == 'PUBLIC':
+                names.append('')
+            else:
+                self.execute('SELECT %s AS name' % role)
+                names.append(self.cursor.fetchone()['name'])
+
+        return names
+
     def get_parameter_acls(self, parameters):
         if self.pg_version < 150000:
             raise Error("PostgreSQL version must be >= 15 for type=parameter. Exit")
@@ -733,6 +981,21 @@ class Connection(object):
         self.cursor.execute(query, (parameters,))
         return [t["paracl"] for t in self.cursor.fetchall()]
 
+    def expand_privs(self, obj_type, privs):
+        """Get names of privileges as they are shown in ACLs."""
+        expanded = set()
+        for priv in privs:
+            if priv == 'ALL':
+                expanded.update(ALL_PRIVS_BY_TYPE[obj_type])
+                if obj_type == 'table' and self.pg_version >= 170000:
+                    expanded.add('MAINTAIN')
+            elif priv == 'TEMP':
+                expanded.add('TEMPORARY')
+            else:
+                expanded.add(priv.replace('_', ' '))
+
+        return sorted(expanded)
+
     # Manipulating privileges
 
     def manipulate_privs(self, obj_type, privs, objs, orig_objs, roles, target_roles,
@@ -792,6 +1055,35 @@ class Connection(object):
             return False
 
         quoted_schema_qualifier = '"%s"' % schema_qualifier.replace('"', '""') if schema_qualifier else None
+
+        # Compare the current ACLs with the desired state before doing anything,
+        # so that the statement is skipped if nothing would change
+        # and only the objects that need it are touched.
+        # For object types whose ACLs are not parsed,
+        # the ACLs are compared before and after the statement.
+        acls_before = None
+        if roles and privs and obj_type not in ('group', 'default_privs'):
+            signatures = None
+            if obj_type in ('function', 'procedure'):
+                signatures = ['%s."%s"(%s' % ((quoted_schema_qualifier,) + tuple(o.split('(', 1)))
+                              for o in objs if '(' in o]
+
+            if signatures is None or len(signatures) == len(objs):
+                acls_before = self.get_acl_snapshot(obj_type, schema_qualifier, objs, signatures)
+
+        if acls_before is not None:
+            grantees = self.get_grantee_names(roles)
+            privs_to_check = self.expand_privs(obj_type, privs)
+            objs_to_change = [o for o in objs if o not in acls_before
+                              or acl_needs_change(acls_before[o], grantees, privs_to_check, state, grant_option)]
+
+            if not objs_to_change:
+                return False
+
+            if len(objs_to_change) < len(objs):
+                orig_objs = None
+                objs = objs_to_change
+
         # obj_ids: quoted db object identifiers (sometimes schema-qualified)
         if obj_type in ('function', 'procedure'):
             obj_ids = []
@@ -835,7 +1127,8 @@ class Connection(object):
         if target_roles:
             as_who = ','.join('"%s"' % r for r in target_roles)
 
-        status_before = get_status(objs)
+        if acls_before is None:
+            status_before = get_status(objs)
 
         query = QueryBuilder(state) \
             .for_objtype(obj_type) \
@@ -850,6 +1143,12 @@ class Connection(object):
         executed_queries.append(query)
         self.execute(query)
 
+        if acls_before is not None:
+            # The statement can still change nothing, for example,
+            # when the privileges were granted by another grantor
+            acls_after = self.get_acl_snapshot(obj_type, schema_qualifier, objs, signatures)
+            return any(acls_after.get(o) != acls_before.get(o) for o in objs)
+
         status_after = get_status(objs)
 
         def nonesorted(e):
@@ -983,59 +1282,11 @@ class QueryBuilder(object):
             self.query.append('REVOKE {0} FROM {1};'.format(self._set_what, self._for_whom))
 
 
-def main():
-    argument_spec = postgres_common_argument_spec()
-    argument_spec.update(
-        login_db=dict(type='str', required=True, aliases=['db', 'database'], deprecated_aliases=[
-            {
-                'name': 'db',
-                'version': '5.0.0',
-                'collection_name': 'community.postgresql',
-            },
-            {
-                'name': 'database',
-                'version': '5.0.0',
-                'collection_name': 'community.postgresql',
-            }],
-        ),
-        state=dict(default='present', choices=['present', 'absent']),
-        privs=dict(required=False, aliases=['priv']),
-        type=dict(default='table',
-                  choices=['table',
-                           'sequence',
-                           'function',
-                           'procedure',
-                           'database',
-                           'schema',
-                           'language',
-                           'tablespace',
-                           'group',
-                           'default_privs',
-                           'foreign_data_wrapper',
-                           'foreign_server',
-                           'type',
-                           'parameter', ]),
-        objs=dict(required=False, aliases=['obj']),
-        schema=dict(required=False),
-        roles=dict(required=True, aliases=['role']),
-        session_role=dict(required=False),
-        target_roles=dict(required=False),
-        grant_option=dict(required=False, type='bool',
-                          aliases=['admin_option']),
-        fail_on_role=dict(type='bool', default=True),
-        trust_input=dict(type='bool', default=True),
-    )
-
-    module = AnsibleModule(
-        argument_spec=argument_spec,
-        supports_check_mode=True,
-    )
-
-    fail_on_role = module.params['fail_on_role']
-
-    # Create type object as namespace for module params
-    p = type('Params', (), module.params)
+def check_params(module, p):
+    """Check the parameters of a privileges entry and set their defaults.
 
+    :param p: Object with the entry parameters as attributes.
+    """
     # param "schema": default, allowed depends on param "type"
     if p.type in ['table', 'sequence', 'function', 'procedure', 'type', 'default_privs']:
         if p.objs == 'schemas' or p.schema == 'not-specified':
@@ -1074,111 +1325,194 @@ def main():
         # Check input for potentially dangerous elements:
         check_input(module, p.roles, p.target_roles, p.session_role, p.schema)
 
-    # Connect to Database
-    conn = Connection(p, module)
 
-    if p.session_role:
-        try:
-            conn.cursor.execute('SET ROLE "%s"' % p.session_role)
-        except Exception as e:
-            module.fail_json(msg="Could not switch to role %s: %s" % (p.session_role, to_native(e)), exception=traceback.format_exc())
+def apply_privs(module, conn, p, objs_in_schema):
+    """Grant or revoke the privileges of an entry.
 
-    try:
-        # privs
-        if p.privs:
-            privs = frozenset(pr.upper() for pr in p.privs.split(','))
-            if not privs.issubset(VALID_PRIVS):
-                module.fail_json(msg='Invalid privileges specified: %s' % privs.difference(VALID_PRIVS))
-        else:
-            privs = None
-        # objs:
-        orig_objs = None
-        if p.objs == 'ALL_IN_SCHEMA':
+    :param p: Object with the entry parameters as attributes.
+    :param objs_in_schema: Dict used to cache the lists of objects
+                           fetched for ALL_IN_SCHEMA by (type, schema).
+
+    Returns True if something has changed, False otherwise.
+    """
+    fail_on_role = p.fail_on_role
+
+    # privs
+    if p.privs:
+        privs = frozenset(pr.upper() for pr in p.privs.split(','))
+        if not privs.issubset(VALID_PRIVS):
+            module.fail_json(msg='Invalid privileges specified: %s' % privs.difference(VALID_PRIVS))
+    else:
+        privs = None
+    # objs:
+    orig_objs = None
+    if p.objs == 'ALL_IN_SCHEMA':
+        if (p.type, p.schema) not in objs_in_schema:
             if p.type == 'table':
-                objs = conn.get_all_tables_in_schema(p.schema)
+                objs_in_schema[(p.type, p.schema)] = conn.get_all_tables_in_schema(p.schema)
             elif p.type == 'sequence':
-                objs = conn.get_all_sequences_in_schema(p.schema)
+                objs_in_schema[(p.type, p.schema)] = conn.get_all_sequences_in_schema(p.schema)
             elif p.type == 'function':
-                objs = conn.get_all_functions_in_schema(p.schema)
+                objs_in_schema[(p.type, p.schema)] = conn.get_all_functions_in_schema(p.schema)
             elif p.type == 'procedure':
-                objs = conn.get_all_procedures_in_schema(p.schema)
-
-            if conn.pg_version >= 90000:
-                if p.type == 'table':
-                    orig_objs = 'ALL TABLES IN SCHEMA'
-                elif p.type == 'sequence':
-                    orig_objs = 'ALL SEQUENCES IN SCHEMA'
-                elif p.type == 'function':
-                    orig_objs = 'ALL FUNCTIONS IN SCHEMA'
-                elif p.type == 'procedure':
-                    orig_objs = 'ALL PROCEDURES IN SCHEMA'
-
-        elif p.type == 'default_privs':
-            if p.objs == 'ALL_DEFAULT':
-                VALID_DEFAULT_OBJS.pop('SCHEMAS')
-                objs = frozenset(VALID_DEFAULT_OBJS.keys())
-            else:
-                objs = frozenset(obj.upper() for obj in p.objs.split(','))
-                if not objs.issubset(VALID_DEFAULT_OBJS):
-                    module.fail_json(
-                        msg='Invalid Object set specified: %s' % objs.difference(VALID_DEFAULT_OBJS.keys()))
-            # Again, do we have valid privs specified for object type:
-            valid_objects_for_priv = frozenset(obj for obj in objs if privs.issubset(VALID_DEFAULT_OBJS[obj]))
-            if not valid_objects_for_priv == objs:
+                objs_in_schema[(p.type, p.schema)] = conn.get_all_procedures_in_schema(p.schema)
+        objs = objs_in_schema[(p.type, p.schema)]
+
+        if conn.pg_version >= 90000:
+            if p.type == 'table':
+                orig_objs = 'ALL TABLES IN SCHEMA'
+            elif p.type == 'sequence':
+                orig_objs = 'ALL SEQUENCES IN SCHEMA'
+            elif p.type == 'function':
+                orig_objs = 'ALL FUNCTIONS IN SCHEMA'
+            elif p.type == 'procedure':
+                orig_objs = 'ALL PROCEDURES IN SCHEMA'
+
+    elif p.type == 'default_privs':
+        if p.objs == 'ALL_DEFAULT':
+            objs = frozenset(obj for obj in VALID_DEFAULT_OBJS if obj != 'SCHEMAS')
+        else:
+            objs = frozenset(obj.upper() for obj in p.objs.split(','))
+            if not objs.issubset(VALID_DEFAULT_OBJS):
                 module.fail_json(
-                    msg='Invalid priv specified. Valid object for priv: {0}. Objects: {1}'.format(
-                        valid_objects_for_priv, objs))
+                    msg='Invalid Object set specified: %s' % objs.difference(VALID_DEFAULT_OBJS.keys()))
+        # Again, do we have valid privs specified for object type:
+        valid_objects_for_priv = frozenset(obj for obj in objs if privs.issubset(VALID_DEFAULT_OBJS[obj]))
+        if not valid_objects_for_priv == objs:
+            module.fail_json(
+                msg='Invalid priv specified. Valid object for priv: {0}. Objects: {1}'.format(
+                    valid_objects_for_priv, objs))
+    else:
+        objs = p.objs.split(',')
+
+        # function signatures are encoded using ':' to separate args
+        if p.type in ('function', 'procedure'):
+            objs = [obj.replace(':', ',') for obj in objs]
+
+    # roles
+    roles = []
+    roles_raw = p.roles.split(',')
+    for r in roles_raw:
+        if conn.role_exists(r):
+            if conn.is_implicit_role(r):
+                # Some implicit roles (as PUBLIC) works in uppercase without double quotes and in lowercase with double quotes.
+                # Other implicit roles (as SESSION_USER) works only in uppercase without double quotes.
+                # So the approach that works for all implicit roles is uppercase without double quotes.
+                roles.append('%s' % r.upper())
+            else:
+                roles.append('"%s"' % r.replace('"', '""'))
         else:
-            objs = p.objs.split(',')
-
-            # function signatures are encoded using ':' to separate args
-            if p.type in ('function', 'procedure'):
-                objs = [obj.replace(':', ',') for obj in objs]
-
-        # roles
-        roles = []
-        roles_raw = p.roles.split(',')
-        for r in roles_raw:
-            if conn.role_exists(r):
-                if conn.is_implicit_role(r):
-                    # Some implicit roles (as PUBLIC) works in uppercase without double quotes and in lowercase with double quotes.
-                    # Other implicit roles (as SESSION_USER) works only in uppercase without double quotes.
-                    # So the approach that works for all implicit roles is uppercase without double quotes.
-                    roles.append('%s' % r.upper())
-                else:
-                    roles.append('"%s"' % r.replace('"', '""'))
+            if fail_on_role:
+                module.fail_json(msg="Role '%s' does not exist" % r)
             else:
-                if fail_on_role:
-                    module.fail_json(msg="Role '%s' does not exist" % r)
-                else:
-                    module.warn("Role '%s' does not exist, pass it" % r)
-        if not roles:
-            module.warn("No valid roles provided, nothing to do")
-            module.exit_json(changed=False, queries=executed_queries)
+                module.warn("Role '%s' does not exist, pass it" % r)
+    if not roles:
+        module.warn("No valid roles provided, nothing to do")
+        return False
+
+    # check if target_roles is set with type: default_privs
+    if p.target_roles and not p.type == 'default_privs':
+        module.warn('"target_roles" will be ignored '
+                    'Argument "type: default_privs" is required for usage of "target_roles".')
+
+    # target roles
+    if p.target_roles:
+        target_roles = p.target_roles.split(',')
+    else:
+        target_roles = None
+
+    return conn.manipulate_privs(
+        obj_type=p.type,
+        privs=privs,
+        objs=objs,
+        orig_objs=orig_objs,
+        roles=roles,
+        target_roles=target_roles,
+        state=p.state,
+        grant_option=p.grant_option,
+        schema_qualifier=p.schema,
+        fail_on_role=fail_on_role,
+    )
 
-        # check if target_roles is set with type: default_privs
-        if p.target_roles and not p.type == 'default_privs':
-            module.warn('"target_roles" will be ignored '
-                        'Argument "type: default_privs" is required for usage of "target_roles".')
 
-        # target roles
-        if p.target_roles:
-            target_roles = p.target_roles.split(',')
-        else:
-            target_roles = None
-
-        changed = conn.manipulate_privs(
-            obj_type=p.type,
-            privs=privs,
-            objs=objs,
-            orig_objs=orig_objs,
-            roles=roles,
-            target_roles=target_roles,
-            state=p.state,
-            grant_option=p.grant_option,
-            schema_qualifier=p.schema,
-            fail_on_role=fail_on_role,
-        )
+def main():
+    argument_spec = postgres_common_argument_spec()
+    argument_spec.update(
+        login_db=dict(type='str', required=True, aliases=['db', 'database'], deprecated_aliases=[
+            {
+                'name': 'db',
+                'version': '5.0.0',
+                'collection_name': 'community.postgresql',
+            },
+            {
+                'name': 'database',
+                'version': '5.0.0',
+                'collection_name': 'community.postgresql',
+            }],
+        ),
+        state=dict(default='present', choices=['present', 'absent']),
+        privs=dict(required=False, aliases=['priv']),
+        type=dict(default='table', choices=OBJ_TYPES),
+        objs=dict(required=False, aliases=['obj']),
+        schema=dict(required=False),
+        roles=dict(required=False, aliases=['role']),
+        session_role=dict(required=False),
+        target_roles=dict(required=False),
+        grant_option=dict(required=False, type='bool',
+                          aliases=['admin_option']),
+        fail_on_role=dict(type='bool', default=True),
+        trust_input=dict(type='bool', default=True),
+        plan=dict(type='list', elements='dict', options=dict(
+            type=dict(type='str', default='table', choices=OBJ_TYPES),
+            state=dict(type='str', default='present', choices=['present', 'absent']),
+            privs=dict(type='str', aliases=['priv']),
+            objs=dict(type='str', aliases=['obj']),
+            schema=dict(type='str'),
+            roles=dict(type='str', required=True, aliases=['role']),
+            target_roles=dict(type='str'),
+            grant_option=dict(type='bool', aliases=['admin_option']),
+        )),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        mutually_exclusive=[('plan', 'type'), ('plan', 'objs'), ('plan', 'privs'), ('plan', 'roles'),
+                            ('plan', 'schema'), ('plan', 'state'), ('plan', 'target_roles'),
+                            ('plan', 'grant_option')],
+        required_one_of=[('roles', 'plan')],
+        supports_check_mode=True,
+    )
+
+    # Create type object as namespace for module params
+    p = type('Params', (), module.params)
+
+    # Every plan entry gets its own namespace with the module params as defaults
+    if p.plan is not None:
+        entries = [type('Params', (), dict(module.params, **entry)) for entry in p.plan]
+    else:
+        entries = [p]
+
+    for entry in entries:
+        check_params(module, entry)
+
+    # Connect to Database
+    conn = Connection(p, module)
+
+    if p.session_role:
+        try:
+            conn.cursor.execute('SET ROLE "%s"' % p.session_role)
+        except Exception as e:
+            module.fail_json(msg="Could not switch to role %s: %s" % (p.session_role, to_native(e)), exception=traceback.format_exc())
+
+    plan_results = []
+    objs_in_schema = {}
+    try:
+        for entry in entries:
+            queries_before = len(executed_queries)
+            entry_changed = apply_privs(module, conn, entry, objs_in_schema)
+            plan_results.append(dict(changed=entry_changed, queries=executed_queries[queries_before:]))
+
+        changed = any(result['changed'] for result in plan_results)
 
     except Error as e:
         conn.rollback()
@@ -1196,6 +1530,9 @@ def main():
     conn.cursor.close()
     conn.connection.close()
 
+    if p.plan is not None:
+        module.exit_json(changed=changed, queries=executed_queries, plan_results=plan_results)
+
     module.exit_json(changed=changed, queries=executed_queries)
 
 
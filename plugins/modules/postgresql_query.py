@@ -34,6 +34,22 @@ options:
       When the value is a list, it will be converted to PostgreSQL array.
     - Mutually exclusive with I(positional_args).
     type: dict
+  batch_args:
+    description:
+    - List of argument sets to execute the query with, one execution per set.
+      Every set is a list of positional arguments or a dictionary of named arguments
+      as in I(positional_args) and I(named_args).
+    - All the executions are done in one transaction using C(cursor.executemany()).
+      With C(psycopg >= 3.1) built with C(libpq >= 14), they are sent to the server
+      using the pipeline mode without waiting for a round trip each.
+    - I(rowcount) contains the total number of affected rows and I(execution_time_ms)
+      the time of all the executions.
+    - Only for a single query that does not return rows. The module fails and nothing is changed
+      if the query returns rows, for example a C(SELECT) or a statement with C(RETURNING).
+    - Mutually exclusive with I(positional_args), I(named_args), I(fetch_size) and I(pipeline).
+    type: list
+    elements: raw
+    version_added: '4.3.0'
   session_role:
     description:
     - Switch to session_role after connecting. The specified session_role must
@@ -74,6 +90,89 @@ options:
     type: list
     elements: str
     version_added: '1.0.0'
+  fetch_size:
+    description:
+    - If set, the query is executed using a server-side (named) cursor and the rows
+      are fetched from the server in batches of this size instead of all at once.
+    - Only for a single query returning rows (for example, C(SELECT) or C(VALUES)).
+    - Mutually exclusive with I(autocommit).
+    type: int
+    version_added: '4.3.0'
+  max_rows:
+    description:
+    - Maximum number of rows of every query to return or write to I(output_file).
+    - If a query returns more rows, the rest are discarded and C(truncated) is set to C(true).
+      I(rowcount) still counts all the rows, I(returned_rows) only the kept ones.
+    - With I(fetch_size), the discarded rows are skipped on the server without transferring them.
+    type: int
+    version_added: '4.3.0'
+  max_result_bytes:
+    description:
+    - Maximum size in bytes of the rows of every query to return or write to I(output_file).
+    - The size of returned rows is measured as their JSON representation.
+    - If the rows exceed the limit, the rest are discarded and C(truncated) is set to C(true).
+    type: int
+    version_added: '4.3.0'
+  output_file:
+    description:
+    - Path to a file on the managed host to write the returned rows to instead of
+      returning them in I(query_result) and I(query_all_results).
+    - The file is overwritten. It is not written in check mode, and the task is then not reported as changed
+      unless the query changes something.
+    - Only for a single query. Use together with I(fetch_size) to keep
+      the memory consumption constant regardless of the result size.
+    type: path
+    version_added: '4.3.0'
+  output_format:
+    description:
+    - Format of I(output_file).
+    - C(jsonl) writes one JSON object per row.
+      Values of types not supported by JSON are written as strings.
+    - C(csv) writes a header with column names followed by one line per row.
+      The header is written even if the query returns no rows.
+    type: str
+    choices: [ csv, jsonl ]
+    default: jsonl
+    version_added: '4.3.0'
+  result_format:
+    description:
+    - Format of the rows in I(query_result) and I(query_all_results).
+    - C(dict) returns a list of dictionaries in column:value form.
+    - C(compact) returns a dictionary with the C(columns) list of column names and the C(rows) list
+      containing a list of values for every row. It avoids repeating column names in every row
+      and considerably reduces the size of wide result sets.
+    - With I(output_file) in the C(jsonl) format, C(compact) writes every row as a JSON list.
+    type: str
+    choices: [ compact, dict ]
+    default: dict
+    version_added: '4.3.0'
+  return_results:
+    description:
+    - Which return values to fill in with rows.
+    - C(both) fills in I(query_result) with rows of the last query
+      and I(query_all_results) with rows of all queries.
+    - C(last) fills in only I(query_result), I(query_all_results) is an empty list.
+    - C(all) fills in only I(query_all_results), I(query_result) is an empty dictionary.
+    - Use C(last) or C(all) to avoid returning the same rows twice.
+    type: str
+    choices: [ all, both, last ]
+    default: both
+    version_added: '4.3.0'
+  pipeline:
+    description:
+    - If C(true) and I(query) is a list, send all the queries to the server using
+      the libpq pipeline mode before reading any results, so the queries do not
+      wait for a round trip each.
+    - Requires C(psycopg >= 3.1) built with C(libpq >= 14). Otherwise, the module
+      warns and runs the queries one by one.
+    - Every query must be a single statement.
+    - In I(execution_time_ms), the time of every query is measured from receiving
+      the result of the previous query (from sending the first query for the first one)
+      until receiving its own result.
+    - Mutually exclusive with I(autocommit) and I(fetch_size).
+    type: bool
+    default: false
+    version_added: '4.3.0'
 seealso:
 - module: community.postgresql.postgresql_script
 - module: community.postgresql.postgresql_db
@@ -133,6 +232,16 @@ EXAMPLES = r'''
       id_val: 1
       story_val: test
 
+- name: Insert several rows to test_table in one transaction
+  community.postgresql.postgresql_query:
+    login_db: test_db
+    query: INSERT INTO test_table (id, story) VALUES (%(id)s, %(story)s)
+    batch_args:
+    - id: 1
+      story: first
+    - id: 2
+      story: second
+
 - name: Insert query to test_table in db test_db
   community.postgresql.postgresql_query:
     login_db: test_db
@@ -211,6 +320,39 @@ EXAMPLES = r'''
     positional_args:
     - '{{ my_var }}'
 
+# Stream a large result set to a file on the managed host
+# fetching 10000 rows at a time
+- name: Export audit records
+  community.postgresql.postgresql_query:
+    login_db: acme
+    query: SELECT * FROM audit_log WHERE created_at > now() - interval '1 day'
+    fetch_size: 10000
+    output_file: /var/tmp/audit_log.jsonl
+
+- name: Return at most 100 rows and 1 MB of data
+  community.postgresql.postgresql_query:
+    login_db: acme
+    query: SELECT * FROM audit_log
+    max_rows: 100
+    max_result_bytes: 1048576
+
+- name: Return rows of a wide table as lists of values only once
+  community.postgresql.postgresql_query:
+    login_db: acme
+    query: SELECT * FROM wide_table
+    result_format: compact
+    return_results: last
+  register: result
+
+- name: Run many small statements without waiting for a round trip each
+  community.postgresql.postgresql_query:
+    login_db: acme
+    query: "{{ migration_statements }}"
+    pipeline: true
+
+# The first value of the second row is result.query_result.rows[1][0],
+# the corresponding column name is result.query_result.columns[0]
+
 # SSL/TLS certificate configuration example
 - name: Query database with SSL certificate
   community.postgresql.postgresql_query:
@@ -241,9 +383,9 @@ query_result:
     description:
     - List of dictionaries in column:value form representing returned rows.
     - When running queries from a file, returns result of the last query.
+    - If I(result_format=compact), a dictionary with the C(columns) and C(rows) lists.
     returned: success
-    type: list
-    elements: dict
+    type: raw
     sample: [{"Column": "Value1"},{"Column": "Value2"}]
 query_list:
     description:
@@ -255,9 +397,10 @@ query_list:
 query_all_results:
     description:
     - List containing results of all queries executed (one sublist for every query).
+    - If I(result_format=compact), every element is a dictionary with the C(columns) and C(rows) lists.
     returned: success
     type: list
-    elements: list
+    elements: raw
     sample: [[{"Column": "Value1"},{"Column": "Value2"}], [{"Column": "Value1"},{"Column": "Value2"}]]
 rowcount:
     description:
@@ -267,6 +410,15 @@ rowcount:
     returned: changed
     type: int
     sample: 5
+returned_rows:
+    description:
+    - Number of rows returned in I(query_result) and I(query_all_results) or written to I(output_file).
+    - Less than I(rowcount) when rows are discarded because of I(max_rows) or I(max_result_bytes).
+    - When using a script with multiple queries, it contains the total number of returned rows.
+    returned: success
+    type: int
+    sample: 5
+    version_added: '4.3.0'
 execution_time_ms:
     description:
     - A list containing execution time per query in milliseconds.
@@ -276,8 +428,25 @@ execution_time_ms:
     type: list
     sample: [7104]
     version_added: '3.10.0'
+truncated:
+    description:
+    - Whether some rows were discarded because of I(max_rows) or I(max_result_bytes).
+    returned: success
+    type: bool
+    sample: false
+    version_added: '4.3.0'
+output_file:
+    description:
+    - Path to the file the rows were written to.
+    returned: if I(output_file) is passed
+    type: str
+    sample: '/var/tmp/audit_log.jsonl'
+    version_added: '4.3.0'
 '''
 
+import csv
+import io
+import json
 import re
 import time
 
@@ -288,10 +457,10 @@ from ansible_collections.community.postgresql.plugins.module_utils.database impo
 from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
     HAS_PSYCOPG,
     PSYCOPG_VERSION,
-    TYPES_NEED_TO_CONVERT,
+    RowConverter,
+    psycopg,
     connect_to_db,
     convert_elements_to_pg_arrays,
-    convert_to_supported,
     ensure_required_libs,
     get_conn_params,
     pg_cursor_args,
@@ -306,6 +475,9 @@ if HAS_PSYCOPG and PSYCOPG_VERSION < LooseVersion("3.0"):
 elif HAS_PSYCOPG:
     from psycopg import ProgrammingError as PsycopgProgrammingError
 
+# Name of the server-side cursor used with fetch_size
+FETCH_CURSOR_NAME = 'ansible_postgresql_query'
+
 
 # ===========================================
 # Module execution.
@@ -324,6 +496,201 @@ def execute_and_return_time(cursor, query, args):
     return cursor, exec_time_ms
 
 
+class BatchFetcher(object):
+    """Iterate over the rows of a cursor fetched in batches of fetch_size.
+
+    fetched is the number of rows fetched from the server so far,
+    including the rows of the current batch not consumed yet.
+    """
+
+    def __init__(self, cursor, fetch_size):
+        self.cursor = cursor
+        self.fetch_size = fetch_size
+        self.fetched = 0
+
+    def __iter__(self):
+        while True:
+            rows = self.cursor.fetchmany(self.fetch_size)
+            if not rows:
+                return
+
+            self.fetched += len(rows)
+            for row in rows:
+                yield row
+
+
+class RowFileWriter(object):
+    """Write rows to a file as JSON lines or CSV.
+
+    If file_obj is None, rows are only serialized, it's used in check mode.
+    """
+
+    def __init__(self, file_obj, fmt):
+        self.file_obj = file_obj
+        self.fmt = fmt
+        self.columns = None
+
+    def serialize(self, row, columns):
+        if self.fmt == 'jsonl':
+            return json.dumps(row, default=str) + '\n'
+
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if self.columns is None:
+            self.columns = columns
+            writer.writerow(self.columns)
+
+        writer.writerow(row.values() if isinstance(row, dict) else row)
+        return buf.getvalue()
+
+    def write(self, data):
+        if self.file_obj is not None:
+            self.file_obj.write(data)
+
+    def finish(self, columns):
+        """Write the CSV header if no row was written."""
+        if self.fmt == 'csv' and self.columns is None and columns:
+            self.columns = columns
+            buf = io.StringIO()
+            csv.writer(buf).writerow(self.columns)
+            self.write(buf.getvalue())
+
+
+def count_remaining_rows(cursor, name):
+    """Skip the rows left in the named cursor on the server and return their number."""
+    cursor.execute('MOVE FORWARD ALL IN %s' % name)
+    return cursor.rowcount
+
+
+def collect_rows(rows, converter, max_rows=None, max_result_bytes=None, writer=None):
+    """Convert rows with converter and collect them in a list or write them with writer.
+
+    Stops consuming rows when max_rows or max_result_bytes is reached.
+
+    Returns a tuple (list of rows, number of rows, truncated).
+    """
+    result = []
+    n_rows = 0
+    n_bytes = 0
+    truncated = False
+
+    for row in rows:
+        if max_rows is not None and n_rows >= max_rows:
+            truncated = True
+            break
+
+        row = converter.convert(row)
+
+        if writer is not None:
+            data = writer.serialize(row, converter.columns)
+            size = len(data.encode('utf-8'))
+        elif max_result_bytes is not None:
+            size = len(json.dumps(row, default=str))
+        else:
+            size = 0
+
+        if max_result_bytes is not None and n_bytes + size > max_result_bytes:
+            truncated = True
+            break
+
+        n_bytes += size
+        n_rows += 1
+
+        if writer is not None:
+            writer.write(data)
+        else:
+            result.append(row)
+
+    return result, n_rows, truncated
+
+
+def executemany_and_return_time(cursor, query, args_list):
+    """Execute the query once for every set of arguments in args_list.
+
+    Returns a tuple (cursor, execution time in ms, number of affected rows).
+    Raises ValueError if the query returns rows, only the rows
+    of the last execution could be fetched.
+    """
+    returns_rows = False
+    rowcount = 0
+    start_time = time.perf_counter()
+
+    if PSYCOPG_VERSION >= LooseVersion("3.0"):
+        # Without returning=True, psycopg 3 discards the results,
+        # so it can't be checked whether the query returns rows
+        cursor.executemany(query, args_list, returning=True)
+        exec_time_ms = round((time.perf_counter() - start_time) * 1000, 4)
+
+        # Every execution has its own result
+        while True:
+            returns_rows = returns_rows or cursor.description is not None
+            rowcount += max(cursor.rowcount, 0)
+            if not cursor.nextset():
+                break
+
+    else:
+        # psycopg2 executemany() runs the executions one by one too,
+        # but it discards the description of their results
+        for args in args_list:
+            cursor.execute(query, args)
+            returns_rows = returns_rows or cursor.description is not None
+            rowcount += max(cursor.rowcount, 0)
+
+        exec_time_ms = round((time.perf_counter() - start_time) * 1000, 4)
+
+    if returns_rows:
+        raise ValueError("batch_args can only be used with a query that does not return rows")
+
+    return cursor, exec_time_ms, rowcount
+
+
+def execute_in_pipeline(db_connection, query_list, args):
+    """Send all queries in the pipeline mode, then read the results.
+
+    Returns a list containing a tuple (cursor, rows, execution time in ms, error)
+    for every query. If a query fails, the list ends with it.
+    """
+    results = []
+    cursors = []
+    try:
+        with db_connection.pipeline():
+            for query in query_list:
+                pipeline_cursor = db_connection.cursor(**pg_cursor_args)
+                cursors.append(pipeline_cursor)
+                pipeline_cursor.execute(query, args)
+
+            prev_time = time.perf_counter()
+            for pipeline_cursor in cursors:
+                rows = []
+                try:
+                    # Blocks until the result of this query is received
+                    rows = pipeline_cursor.fetchall()
+                except PsycopgProgrammingError as e:
+                    # Errors returned by the server have sqlstate,
+                    # otherwise the query just didn't produce rows
+                    if e.sqlstate is not None:
+                        raise
+
+                cur_time = time.perf_counter()
+                results.append((pipeline_cursor, rows, round((cur_time - prev_time) * 1000, 4), None))
+                prev_time = cur_time
+
+    except Exception as e:
+        # The error can be raised while reading the result of
+        # any of the previous queries, so find the failed query:
+        # it's the first one that has not received a result
+        failed = len(cursors) - 1
+        for i, pipeline_cursor in enumerate(cursors):
+            if pipeline_cursor.pgresult is None:
+                failed = i
+                break
+
+        results = [(c, [], 0, None) for c in cursors[:failed]]
+        results.append((None, [], 0, e))
+
+    return results
+
+
 def insane_query(string):
     for c in string:
         if c not in (' ', '\n', '', '\t'):
@@ -345,27 +712,52 @@ def main():
         ),
         positional_args=dict(type='list', elements='raw'),
         named_args=dict(type='dict'),
+        batch_args=dict(type='list', elements='raw'),
         session_role=dict(type='str'),
         autocommit=dict(type='bool', default=False),
         encoding=dict(type='str'),
         trust_input=dict(type='bool', default=True),
         search_path=dict(type='list', elements='str'),
+        fetch_size=dict(type='int'),
+        max_rows=dict(type='int'),
+        max_result_bytes=dict(type='int'),
+        output_file=dict(type='path'),
+        output_format=dict(type='str', choices=['csv', 'jsonl'], default='jsonl'),
+        result_format=dict(type='str', choices=['compact', 'dict'], default='dict'),
+        return_results=dict(type='str', choices=['all', 'both', 'last'], default='both'),
+        pipeline=dict(type='bool', default=False),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
-        mutually_exclusive=(('positional_args', 'named_args'),),
+        mutually_exclusive=(('positional_args', 'named_args'),
+                            ('fetch_size', 'autocommit'),
+                            ('pipeline', 'autocommit'),
+                            ('pipeline', 'fetch_size'),
+                            ('batch_args', 'positional_args'),
+                            ('batch_args', 'named_args'),
+                            ('batch_args', 'fetch_size'),
+                            ('batch_args', 'pipeline')),
         supports_check_mode=True,
     )
 
     query = module.params["query"]
     positional_args = module.params["positional_args"]
     named_args = module.params["named_args"]
+    batch_args = module.params["batch_args"]
     autocommit = module.params["autocommit"]
     encoding = module.params["encoding"]
     session_role = module.params["session_role"]
     trust_input = module.params["trust_input"]
     search_path = module.params["search_path"]
+    fetch_size = module.params["fetch_size"]
+    max_rows = module.params["max_rows"]
+    max_result_bytes = module.params["max_result_bytes"]
+    output_file = module.params["output_file"]
+    output_format = module.params["output_format"]
+    compact = module.params["result_format"] == 'compact'
+    return_results = module.params["return_results"]
+    pipeline = module.params["pipeline"]
 
     if query and not isinstance(query, (str, list)):
         module.fail_json(msg="query argument must be of type string or list")
@@ -384,6 +776,18 @@ def main():
     else:  # if it's a list
         query_list = query
 
+    if (fetch_size or output_file or batch_args) and len(query_list) != 1:
+        module.fail_json(msg="fetch_size, output_file, and batch_args can be used with a single query only")
+
+    if batch_args:
+        for arg_set in batch_args:
+            if not isinstance(arg_set, (list, dict)):
+                module.fail_json(msg="Every element of batch_args must be a list or a dictionary")
+
+    for opt in ('fetch_size', 'max_rows', 'max_result_bytes'):
+        if module.params[opt] is not None and module.params[opt] < 1:
+            module.fail_json(msg="%s must be a positive number" % opt)
+
     # Ensure psycopg libraries are available before connecting to DB:
     ensure_required_libs(module)
     conn_params = get_conn_params(module, module.params)
@@ -408,38 +812,91 @@ def main():
     if args:
         args = convert_elements_to_pg_arrays(args)
 
+    if batch_args:
+        batch_args = [convert_elements_to_pg_arrays(arg_set) for arg_set in batch_args]
+
     # Set defaults:
     changed = False
 
     query_all_results = []
     execution_time_ms = []
     rowcount = 0
+    returned_rows = 0
     statusmessage = ''
+    truncated = False
+
+    writer = None
+    output_fd = None
+    if output_file:
+        if not module.check_mode:
+            try:
+                output_fd = open(output_file, 'w', newline='', encoding='utf-8')
+            except Exception as e:
+                module.fail_json(msg="Cannot open output file %s: %s" % (output_file, to_native(e)))
+
+        writer = RowFileWriter(output_fd, output_format)
+
+    pipeline_results = None
+    if pipeline:
+        if PSYCOPG_VERSION < LooseVersion("3.1") or not psycopg.Pipeline.is_supported():
+            module.warn("The pipeline mode requires psycopg >= 3.1 built with libpq >= 14, "
+                        "running queries one by one")
+        else:
+            pipeline_results = execute_in_pipeline(db_connection, query_list, args)
 
     # Execute query:
-    for query in query_list:
+    for i, query in enumerate(query_list):
         try:
             current_query_txt = cursor.mogrify(query, args)
 
-            cursor, exec_time_ms = execute_and_return_time(cursor, query, args)
+            if pipeline_results is not None:
+                # The queries have already been executed
+                exec_cursor, rows, exec_time_ms, err = pipeline_results[i]
+                if err is not None:
+                    raise err
+
+            else:
+                if fetch_size:
+                    # A server-side cursor holds the result set on the server,
+                    # the rows are transferred in batches while being consumed
+                    exec_cursor = db_connection.cursor(name=FETCH_CURSOR_NAME, **pg_cursor_args)
+                else:
+                    exec_cursor = cursor
+
+                if batch_args:
+                    exec_cursor, exec_time_ms, batch_rowcount = executemany_and_return_time(exec_cursor, query,
+                                                                                            batch_args)
+                else:
+                    exec_cursor, exec_time_ms = execute_and_return_time(exec_cursor, query, args)
 
             execution_time_ms.append(exec_time_ms)
 
-            statusmessage = cursor.statusmessage
-            if cursor.rowcount > 0:
-                rowcount += cursor.rowcount
+            if not fetch_size:
+                statusmessage = exec_cursor.statusmessage
+                query_rowcount = batch_rowcount if batch_args else exec_cursor.rowcount
+                if query_rowcount > 0:
+                    rowcount += query_rowcount
 
             query_result = []
+            n_rows = 0
+            query_truncated = False
             try:
-                for row in cursor.fetchall():
-                    # Ansible engine does not support decimals.
-                    # An explicit conversion is required on the module's side
-                    row = dict(row)
-                    for (key, val) in row.items():
-                        if isinstance(val, TYPES_NEED_TO_CONVERT):
-                            row[key] = convert_to_supported(val)
-
-                    query_result.append(row)
+                if fetch_size:
+                    rows = BatchFetcher(exec_cursor, fetch_size)
+                elif pipeline_results is None:
+                    rows = cursor.fetchall()
+
+                converter = RowConverter(exec_cursor, compact)
+                query_result, n_rows, query_truncated = collect_rows(rows, converter, max_rows,
+                                                                     max_result_bytes, writer)
+                truncated = truncated or query_truncated
+                columns = converter.get_columns()
+                if writer is not None:
+                    writer.finish(columns)
+
+                # The column names are returned even if there are no rows
+                elif compact and columns is not None:
+                    query_result = dict(columns=columns, rows=query_result)
 
             # Psycopg 3 doesn't fail with 'no results to fetch'
             # This exception will be triggered only in Psycopg 2
@@ -450,12 +907,34 @@ def main():
             except Exception as e:
                 module.fail_json(msg="Cannot fetch rows from cursor: %s" % to_native(e))
 
+            returned_rows += n_rows
+
+            if fetch_size:
+                # Named cursors can only run queries returning rows
+                # that cannot change anything
+                query_rowcount = rows.fetched
+                if query_truncated:
+                    query_rowcount += count_remaining_rows(cursor, FETCH_CURSOR_NAME)
+
+                exec_cursor.close()
+                statusmessage = 'SELECT %s' % query_rowcount
+                rowcount += query_rowcount
+
+            elif pipeline_results is not None:
+                exec_cursor.close()
+
             if query_result == []:
                 query_result = {}
 
-            query_all_results.append(query_result)
+            if return_results != 'last':
+                query_all_results.append(query_result)
+
+            if batch_args:
+                # statusmessage reflects only the last execution
+                if rowcount > 0 or not re.search(re.compile(r'(UPDATE|INSERT|DELETE)'), statusmessage or ''):
+                    changed = True
 
-            if 'SELECT' not in statusmessage and 'SHOW' not in statusmessage:
+            elif 'SELECT' not in statusmessage and 'SHOW' not in statusmessage:
                 if re.search(re.compile(r'(UPDATE|INSERT|DELETE)'), statusmessage):
                     s = statusmessage.split()
                     if len(s) == 3:
@@ -480,6 +959,13 @@ def main():
             db_connection.close()
             module.fail_json(msg="Cannot execute SQL '%s' %s: %s, query list: %s" % (query, args, to_native(e), query_list))
 
+    if output_fd is not None:
+        output_fd.close()
+        changed = True
+
+    if return_results == 'all':
+        query_result = {}
+
     if module.check_mode:
         db_connection.rollback()
     else:
@@ -494,9 +980,14 @@ def main():
         query_result=query_result,
         query_all_results=query_all_results,
         rowcount=rowcount,
+        returned_rows=returned_rows,
         execution_time_ms=execution_time_ms,
+        truncated=truncated,
     )
 
+    if output_file:
+        kw['output_file'] = output_file
+
     cursor.close()
     db_connection.close()
 
@@ -0,0 +1,633 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: postgresql_roles
+short_description: Reconcile a set of PostgreSQL roles in one transaction
+description:
+- Takes the whole desired set of roles at once and brings the cluster to that state.
+- Reads C(pg_roles) and C(pg_auth_members) once, computes the minimal list of
+  C(CREATE ROLE), C(ALTER ROLE), C(GRANT), C(REVOKE) and C(DROP ROLE) statements
+  and applies them in a single transaction.
+- Either all the changes are applied or none of them.
+- Use this module instead of looping over M(community.postgresql.postgresql_user) and
+  M(community.postgresql.postgresql_membership) when managing hundreds or thousands of roles.
+version_added: '4.3.0'
+options:
+  roles:
+    description:
+    - List of desired roles.
+    - Roles that exist in the cluster but are not listed here are not touched.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+        - Role name.
+        required: true
+        type: str
+      state:
+        description:
+        - If C(present), the role is created when it does not exist and its attributes are updated.
+        - If C(absent), the role is dropped when it exists.
+          Memberships of the role are removed together with it.
+        type: str
+        default: present
+        choices: [ absent, present ]
+      role_attr_flags:
+        description:
+        - Comma-separated list of role attributes, the same as
+          I(role_attr_flags) of M(community.postgresql.postgresql_user).
+        - New roles are created with C(CREATE ROLE), so they have C(NOLOGIN)
+          unless C(LOGIN) is listed here.
+        - Attributes that are not listed are not changed.
+        type: str
+        default: ''
+      password:
+        description:
+        - Password of the role.
+        - It is set when the role is created. Passwords of existing roles
+          are checked and changed only if I(update_password=always).
+        - An empty string means that the role must have no password.
+        type: str
+      conn_limit:
+        description:
+        - Role connection limit.
+        type: int
+      groups:
+        description:
+        - Exact list of groups (other roles) the role must be a member of.
+        - Groups that the role is a member of but that are not listed are revoked.
+        - If omitted, memberships of the role are not changed.
+        - Use an empty list to remove the role from all groups.
+        type: list
+        elements: str
+      configuration:
+        description:
+        - Role-specific configuration parameters, the same as
+          I(configuration) of M(community.postgresql.postgresql_user).
+        - If omitted, the configuration of the role is not changed.
+        type: dict
+  update_password:
+    description:
+    - If C(on_create), I(password) is only set for new roles.
+    - If C(always), passwords of all the existing roles that have I(password) set
+      are checked in bulk and changed if they differ.
+      This requires access to C(pg_authid).
+    - Plain text passwords are compared with the stored C(SCRAM-SHA-256) verifiers
+      the same way as M(community.postgresql.postgresql_user) does it,
+      use I(scram_cache) to avoid recomputing them on every run.
+    type: str
+    default: on_create
+    choices: [ always, on_create ]
+  scram_cache:
+    description:
+    - Path to a local file on the managed host that caches successful password checks
+      against C(SCRAM-SHA-256) verifiers.
+    - See the option with the same name of M(community.postgresql.postgresql_user) for details.
+    type: path
+  reset_unspecified_configuration:
+    description:
+    - If C(true), configuration parameters of a role that are not included in its
+      I(configuration) are reset.
+    - Applies only to roles that have I(configuration) set.
+    type: bool
+    default: false
+  quote_configuration_values:
+    description:
+    - Automatically quote the values of configuration parameters.
+    - See the option with the same name of M(community.postgresql.postgresql_user) for details.
+    type: bool
+    default: true
+  login_db:
+    description:
+    - Name of database to connect to.
+    type: str
+  session_role:
+    description:
+    - Switch to session_role after connecting.
+      The specified session_role must be a role that the current login_user is a member of.
+    - Permissions checking for SQL commands is carried out as though
+      the session_role were the one that had logged in originally.
+    type: str
+  trust_input:
+    description:
+    - If C(false), check whether role names, groups, role attributes, configuration parameters
+      and I(session_role) are potentially dangerous.
+    - It makes sense to use C(false) only when SQL injections via the parameters are possible.
+    type: bool
+    default: true
+notes:
+- Statements are sent to the server in batches to reduce the number of round trips.
+- If any statement fails, the whole transaction is rolled back and the module fails.
+- C(DROP ROLE) fails if the role still owns objects or has privileges,
+  use M(community.postgresql.postgresql_owner) with I(reassign_owned_by) first.
+seealso:
+- module: community.postgresql.postgresql_user
+- module: community.postgresql.postgresql_membership
+- name: PostgreSQL role attributes reference
+  description: Complete reference of the PostgreSQL role attributes documentation.
+  link: https://www.postgresql.org/docs/current/role-attributes.html
+
+attributes:
+  check_mode:
+    support: full
+  idempotent:
+    support: full
+
+author:
+- Ansible PostgreSQL community (@ansible-collections)
+
+extends_documentation_fragment:
+- community.postgresql.postgres
+'''
+
+EXAMPLES = r'''
+- name: Reconcile application roles
+  community.postgresql.postgresql_roles:
+    login_db: postgres
+    roles:
+    - name: app_read
+    - name: app_write
+      groups:
+      - app_read
+    - name: alice
+      role_attr_flags: LOGIN
+      password: "{{ alice_password }}"
+      conn_limit: 10
+      groups:
+      - app_write
+      configuration:
+        work_mem: 16MB
+    - name: bob
+      state: absent
+
+# app_roles is a list of dicts with the same keys as the roles option,
+# for example, loaded from a file with include_vars
+- name: Reconcile all application roles defined in the app_roles variable
+  community.postgresql.postgresql_roles:
+    login_db: postgres
+    roles: "{{ app_roles }}"
+'''
+
+RETURN = r'''
+queries:
+  description:
+  - List of executed queries.
+  - Passwords are not shown.
+  returned: success
+  type: list
+  sample: ['CREATE ROLE "alice" LOGIN', 'GRANT "app_write" TO "alice"']
+changes:
+  description: Structured list of the changes.
+  returned: success
+  type: dict
+  contains:
+    created:
+      description: Names of created roles.
+      type: list
+      sample: ['alice']
+    dropped:
+      description: Names of dropped roles.
+      type: list
+      sample: ['bob']
+    altered:
+      description:
+      - Changed attributes of existing roles.
+      - Each value can contain C(role_attr_flags) and C(conn_limit)
+        with C(before) and C(after) values, C(configuration)
+        with C(set) and C(reset) parameters, and C(password) set to C(true)
+        when the password has been changed.
+      type: dict
+      sample: {"alice": {"conn_limit": {"before": -1, "after": 10}}}
+    granted:
+      description: Dict of granted groups and roles.
+      type: dict
+      sample: {"app_write": ["alice"]}
+    revoked:
+      description: Dict of revoked groups and roles.
+      type: dict
+      sample: {"app_read": ["alice"]}
+password_check_stats:
+  description:
+  - Statistics of plain text password checks against C(SCRAM-SHA-256) verifiers.
+  - C(checked) is the number of checks, C(cache_hits) is the number of checks answered
+    from I(scram_cache) and C(duration_ms) is the time spent on them in milliseconds.
+  returned: if I(update_password=always) and passwords have been checked against SCRAM verifiers
+  type: dict
+  sample: {"checked": 1000, "cache_hits": 998, "duration_ms": 25.4}
+'''
+
+import traceback
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_native
+from ansible_collections.community.postgresql.plugins.module_utils.database import \
+    check_input
+from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
+    PRIV_TO_AUTHID_COLUMN,
+    InvalidFlagsError,
+    PgMembership,
+    ScramVerifier,
+    compare_user_configurations,
+    connect_to_db,
+    ensure_required_libs,
+    get_conn_params,
+    get_passwd_encryption,
+    get_server_version,
+    need_to_change_role_attr_flags,
+    parse_role_attrs,
+    parse_user_configuration,
+    pg_cursor_args,
+    postgres_common_argument_spec,
+    user_should_we_change_password,
+)
+
+# Number of statements sent to the server in one round trip
+STATEMENTS_PER_BATCH = 500
+
+# Savepoint to roll back to when a batch fails
+BATCH_SAVEPOINT = 'ansible_roles_batch'
+
+
+# ===========================================
+# PostgreSQL module specific support methods.
+#
+
+
+def quote_role(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def get_roles_snapshot(cursor, with_passwords=False):
+    """Get attributes of all the roles in one query.
+
+    The rolconfig column of pg_roles contains the role settings
+    from pg_db_role_setting that are not tied to a database.
+
+    Kwargs:
+        with_passwords (bool) -- read the roles from pg_authid
+            to get the stored passwords (default False)
+
+    Returns a dict with the role names as keys and pg_roles rows as values.
+    """
+    if with_passwords:
+        cursor.execute("SELECT a.*, r.rolconfig FROM pg_catalog.pg_authid a "
+                       "JOIN pg_catalog.pg_roles r ON r.oid = a.oid")
+    else:
+        cursor.execute("SELECT * FROM pg_catalog.pg_roles")
+    return dict((row['rolname'], row) for row in cursor.fetchall())
+
+
+def diff_role_attr_flags(role_attr_flags, current_role_attrs):
+    """Get role attributes that need to be changed.
+
+    Args:
+        role_attr_flags (str) -- space-separated flags returned by parse_role_attrs
+        current_role_attrs (dict) -- pg_roles row of the role
+
+    Returns a tuple of two sorted lists, the current and the desired flags.
+    """
+    before = []
+    after = []
+    if not need_to_change_role_attr_flags(role_attr_flags, current_role_attrs):
+        return before, after
+
+    for flag in role_attr_flags.split(' '):
+        name = flag[2:] if flag.startswith('NO') else flag
+        value = not flag.startswith('NO')
+        if current_role_attrs[PRIV_TO_AUTHID_COLUMN[name]] != value:
+            before.append(name if current_role_attrs[PRIV_TO_AUTHID_COLUMN[name]] else 'NO%s' % name)
+            after.append(flag)
+
+    return sorted(before), sorted(after)
+
+
+def config_statements(role, config_updates, quote_values):
+    """Get ALTER ROLE SET / RESET statements for a role."""
+    statements = []
+    for key in config_updates['reset']:
+        statements.append('ALTER ROLE %s RESET "%s"' % (quote_role(role), key))
+
+    for key, value in sorted(config_updates['update'].items()):
+        if quote_values:
+            statements.append('ALTER ROLE %s SET "%s" TO \'%s\'' % (quote_role(role), key, value))
+        else:
+            statements.append('ALTER ROLE %s SET "%s" TO %s' % (quote_role(role), key, value))
+
+    return statements
+
+
+def plan_changes(module, snapshot, roles, srv_version, reset_unspec_config, quote_values,
+                 cursor=None, scram_verifier=None):
+    """Compare the desired roles with the snapshot.
+
+    Args:
+        module (AnsibleModule) -- object of AnsibleModule class
+        snapshot (dict) -- result of get_roles_snapshot()
+        roles (list) -- desired roles, the value of the roles option
+        srv_version (int) -- server version
+        reset_unspec_config (bool) -- reset configuration parameters that are not listed
+        quote_values (bool) -- quote configuration values
+
+    Kwargs:
+        cursor (cursor) -- psycopg cursor object, if passed, passwords of
+            existing roles are compared with the rolpassword values of the snapshot
+        scram_verifier (ScramVerifier) -- object used to check SCRAM verifiers
+
+    Returns a tuple of the list of (statement, params) tuples
+    that must be executed before memberships are changed,
+    the list of DROP ROLE statements and the changes dict.
+    """
+    statements = []
+    drops = []
+    changes = dict(created=[], dropped=[], altered={}, granted={}, revoked={})
+
+    # Read once for all the roles, not once per compared password
+    passwd_encryption = None
+    if cursor is not None and any(role['password'] for role in roles):
+        passwd_encryption = get_passwd_encryption(cursor)
+
+    for role in roles:
+        name = role['name']
+        current = snapshot.get(name)
+
+        if role['state'] == 'absent':
+            if current is not None:
+                drops.append('DROP ROLE %s' % quote_role(name))
+                changes['dropped'].append(name)
+            continue
+
+        try:
+            flags = parse_role_attrs(role['role_attr_flags'], srv_version)
+        except InvalidFlagsError as e:
+            module.fail_json(msg='Role %s: %s' % (name, to_native(e)), exception=traceback.format_exc())
+
+        configuration = role['configuration']
+
+        if current is None:
+            query = ['CREATE ROLE %s' % quote_role(name)]
+            params = None
+            if flags:
+                query.append(' '.join(sorted(flags.split(' '))))
+
+            if role['conn_limit'] is not None:
+                query.append('CONNECTION LIMIT %d' % role['conn_limit'])
+
+            if role['password']:
+                query.append('PASSWORD %(password)s')
+                params = {'password': role['password']}
+
+            statements.append((' '.join(query), params))
+
+            if configuration:
+                config_updates = compare_user_configurations({}, configuration, False)
+                statements.extend((q, None) for q in config_statements(name, config_updates, quote_values))
+
+            changes['created'].append(name)
+            continue
+
+        altered = {}
+        alter = []
+
+        before, after = diff_role_attr_flags(flags, current)
+        if after:
+            alter.extend(after)
+            altered['role_attr_flags'] = dict(before=before, after=after)
+
+        if role['conn_limit'] is not None and role['conn_limit'] != current['rolconnlimit']:
+            alter.append('CONNECTION LIMIT %d' % role['conn_limit'])
+            altered['conn_limit'] = dict(before=current['rolconnlimit'], after=role['conn_limit'])
+
+        if alter:
+            statements.append(('ALTER ROLE %s %s' % (quote_role(name), ' '.join(alter)), None))
+
+        if cursor is not None and role['password'] is not None \
+                and user_should_we_change_password(cursor, current, name, role['password'],
+                                                   'ENCRYPTED', scram_verifier, passwd_encryption):
+            if role['password'] == '':
+                statements.append(('ALTER ROLE %s PASSWORD NULL' % quote_role(name), None))
+            else:
+                statements.append(('ALTER ROLE %s PASSWORD %%(password)s' % quote_role(name),
+                                   {'password': role['password']}))
+            altered['password'] = True
+
+        if configuration is not None:
+            current_config = parse_user_configuration(module, current['rolconfig'])
+            config_updates = compare_user_configurations(current_config, configuration, reset_unspec_config)
+            if config_updates['reset'] or config_updates['update']:
+                statements.extend((q, None) for q in config_statements(name, config_updates, quote_values))
+                altered['configuration'] = dict(set=config_updates['update'], reset=config_updates['reset'])
+
+        if altered:
+            changes['altered'][name] = altered
+
+    return statements, drops, changes
+
+
+class PgRoles(object):
+    def __init__(self, module, cursor):
+        self.module = module
+        self.cursor = cursor
+        self.executed_queries = []
+
+    def execute(self, statements):
+        """Execute statements sending up to STATEMENTS_PER_BATCH of them at once.
+
+        Statements with parameters are executed separately
+        so that their values are never put into the query text.
+
+        Args:
+            statements (list) -- list of (statement, params) tuples
+        """
+        batch = []
+        for query, params in statements:
+            self.executed_queries.append(query)
+            if params is not None:
+                self.__exec(batch)
+                batch = []
+                self.__exec([query], params)
+            else:
+                batch.append(query)
+                if len(batch) >= STATEMENTS_PER_BATCH:
+                    self.__exec(batch)
+                    batch = []
+
+        self.__exec(batch)
+
+    def __exec(self, queries, params=None):
+        if not queries:
+            return
+
+        if params is not None or len(queries) == 1:
+            self.__exec_one(queries[0], params)
+            return
+
+        # The savepoint allows to find the failed statement of the batch
+        self.__exec_one('SAVEPOINT %s' % BATCH_SAVEPOINT)
+        try:
+            self.cursor.execute('; '.join(queries))
+        except Exception:
+            self.__exec_one('ROLLBACK TO SAVEPOINT %s' % BATCH_SAVEPOINT)
+            for query in queries:
+                self.__exec_one(query)
+
+    def __exec_one(self, query, params=None):
+        try:
+            if params is not None:
+                self.cursor.execute(query, params)
+            else:
+                self.cursor.execute(query)
+        except Exception as e:
+            self.module.fail_json(msg="Cannot execute SQL '%s': %s" % (query, to_native(e)))
+
+    def match_memberships(self, roles, dropped):
+        """Make roles with the groups option members of exactly these groups.
+
+        Returns a tuple of the granted and revoked dicts.
+        """
+        role_groups = dict((r['name'], [g.strip() for g in r['groups']]) for r in roles
+                           if r['state'] == 'present' and r['groups'] is not None)
+        if not role_groups:
+            return {}, {}
+
+        groups = set()
+        for name, role_group_list in role_groups.items():
+            for group in role_group_list:
+                if group in dropped:
+                    self.module.fail_json(msg="Role %s cannot be a member of %s, "
+                                              "the group is going to be dropped" % (name, group))
+                groups.add(group)
+
+        pg_membership = PgMembership(self.module, self.cursor, sorted(groups), list(role_groups))
+        pg_membership.match_roles(role_groups)
+        self.executed_queries.extend(pg_membership.executed_queries)
+
+        return pg_membership.granted, pg_membership.revoked
+
+
+# ===========================================
+# Module execution.
+#
+
+
+def main():
+    argument_spec = postgres_common_argument_spec()
+    argument_spec.update(
+        roles=dict(type='list', elements='dict', required=True, options=dict(
+            name=dict(type='str', required=True),
+            state=dict(type='str', default='present', choices=['absent', 'present']),
+            role_attr_flags=dict(type='str', default=''),
+            password=dict(type='str', no_log=True),
+            conn_limit=dict(type='int'),
+            groups=dict(type='list', elements='str'),
+            configuration=dict(type='dict'),
+        )),
+        update_password=dict(type='str', default='on_create', choices=['always', 'on_create'], no_log=False),
+        scram_cache=dict(type='path'),
+        reset_unspecified_configuration=dict(type='bool', default=False),
+        quote_configuration_values=dict(type='bool', default=True),
+        login_db=dict(type='str'),
+        session_role=dict(type='str'),
+        trust_input=dict(type='bool', default=True),
+    )
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+
+    roles = module.params['roles']
+    update_password = module.params['update_password']
+    reset_unspec_config = module.params['reset_unspecified_configuration']
+    quote_configuration_values = module.params['quote_configuration_values']
+    session_role = module.params['session_role']
+    trust_input = module.params['trust_input']
+
+    seen = set()
+    for role in roles:
+        role['name'] = role['name'].strip()
+        if role['name'] in seen:
+            module.fail_json(msg="Role %s is listed more than once" % role['name'])
+        seen.add(role['name'])
+
+        if role['configuration'] is not None:
+            configuration = {}
+            for key, value in role['configuration'].items():
+                value = to_native(value)
+                if quote_configuration_values:
+                    if '"' in key or '\'' in key:
+                        module.fail_json(msg="The key of a configuration may not contain single or double quotes")
+                    value = value.replace("'", "''")
+                configuration[key] = value
+            role['configuration'] = configuration
+
+        if not trust_input:
+            # Check input for potentially dangerous elements:
+            check_input(module, role['name'], role['role_attr_flags'], role['groups'], role['configuration'])
+
+    if not trust_input:
+        check_input(module, session_role)
+
+    # Ensure psycopg libraries are available before connecting to DB:
+    ensure_required_libs(module)
+    conn_params = get_conn_params(module, module.params, warn_db_default=False)
+    db_connection, dummy = connect_to_db(module, conn_params, autocommit=False)
+    cursor = db_connection.cursor(**pg_cursor_args)
+
+    srv_version = get_server_version(db_connection)
+
+    ##############
+    # Create the object and do main job:
+
+    scram_verifier = ScramVerifier(module, module.params['scram_cache'])
+    try:
+        snapshot = get_roles_snapshot(cursor, with_passwords=update_password == 'always')
+    except Exception as e:
+        module.fail_json(msg="Cannot read the roles: %s" % to_native(e))
+
+    statements, drops, changes = plan_changes(module, snapshot, roles, srv_version,
+                                              reset_unspec_config, quote_configuration_values,
+                                              cursor if update_password == 'always' else None,
+                                              scram_verifier)
+
+    pg_roles = PgRoles(module, cursor)
+    pg_roles.execute(statements)
+    changes['granted'], changes['revoked'] = pg_roles.match_memberships(roles, set(changes['dropped']))
+    pg_roles.execute((q, None) for q in drops)
+
+    changed = bool(pg_roles.executed_queries)
+
+    # Rollback if it's possible and check_mode:
+    if module.check_mode:
+        db_connection.rollback()
+    else:
+        db_connection.commit()
+
+    cursor.close()
+    db_connection.close()
+
+    scram_verifier.save()
+
+    return_dict = dict(
+        changed=changed,
+        queries=pg_roles.executed_queries,
+        changes=changes,
+    )
+    if scram_verifier.stats['checked']:
+        return_dict['password_check_stats'] = scram_verifier.stats
+
+    module.exit_json(**return_dict)
+
+
+if __name__ == '__main__':
+    main()
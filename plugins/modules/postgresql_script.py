@@ -76,6 +76,24 @@ options:
     - Overrides the list of schemas to search for db objects in.
     type: list
     elements: str
+  split_statements:
+    description:
+    - If C(true), the file is read incrementally and split into statements
+      that are executed one by one instead of sending the whole file content
+      as one query.
+    - The splitter understands quoted strings and identifiers, dollar quotes,
+      comments, C(BEGIN ATOMIC ... END) function bodies, and C(COPY ... FROM stdin)
+      statements followed by data terminated by a line containing C(\\.).
+    - Every statement is executed in its own transaction unless the script
+      contains explicit C(BEGIN) and C(COMMIT) statements.
+    - The I(statements) return value contains the line number, status message,
+      row count, and execution time of every executed statement.
+      If a statement fails, the error message contains the statement and its line number.
+    - I(named_args) are passed to every statement except C(COPY ... FROM stdin).
+    - Mutually exclusive with I(positional_args).
+    type: bool
+    default: false
+    version_added: '4.3.0'
 
 seealso:
 - module: community.postgresql.postgresql_db
@@ -123,6 +141,14 @@ EXAMPLES = r'''
       id_val: 1
       story_val: test
 
+# Run a large migration script statement by statement
+# reporting the execution time of every statement
+- name: Run migration script
+  community.postgresql.postgresql_script:
+    login_db: test_db
+    path: /var/lib/pgsql/migration.sql
+    split_statements: true
+
 - block:
   # Assuming that the the file contains
   # SELECT * FROM test_array_table WHERE arr_col1 = %s AND arr_col2 = %s
@@ -214,8 +240,21 @@ rowcount:
     returned: changed
     type: int
     sample: 5
+statements:
+    description:
+    - List of dictionaries describing every executed statement
+      containing the C(line) number the statement starts at in the file,
+      C(statusmessage), C(rowcount), and C(execution_time_ms).
+    returned: if I(split_statements=true)
+    type: list
+    elements: dict
+    sample: [{"line": 1, "statusmessage": "CREATE TABLE", "rowcount": -1, "execution_time_ms": 2.4311}]
+    version_added: '4.3.0'
 '''
 
+import re
+import time
+
 from ansible.module_utils.common.text.converters import to_native
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.community.postgresql.plugins.module_utils.database import \
@@ -224,9 +263,11 @@ from ansible_collections.community.postgresql.plugins.module_utils.postgres impo
     HAS_PSYCOPG,
     PSYCOPG_VERSION,
     TYPES_NEED_TO_CONVERT,
+    RowConverter,
     connect_to_db,
     convert_elements_to_pg_arrays,
     convert_to_supported,
+    copy_from_stdin,
     ensure_required_libs,
     get_conn_params,
     pg_cursor_args,
@@ -241,6 +282,272 @@ if HAS_PSYCOPG and PSYCOPG_VERSION < LooseVersion("3.0"):
 elif HAS_PSYCOPG:
     from psycopg import ProgrammingError as PsycopgProgrammingError
 
+# ===========================================
+# PostgreSQL module specific support methods.
+#
+
+DOLLAR_QUOTE_RE = re.compile(r'\$(?:[^\W\d]\w*)?\$')
+WORD_RE = re.compile(r'[\w$]+')
+COPY_FROM_STDIN_RE = re.compile(r'^COPY\b.*\bFROM\s+STDIN\b', re.IGNORECASE | re.DOTALL)
+ROUTINE_KEYWORDS = ('function', 'procedure')
+
+
+def is_create_routine(words):
+    """Check if the first words of a statement are
+    CREATE [OR REPLACE] FUNCTION|PROCEDURE.
+    """
+    if words[:1] != ['create']:
+        return False
+    if words[1:3] == ['or', 'replace']:
+        return words[3:4] != [] and words[3] in ROUTINE_KEYWORDS
+    return words[1:2] != [] and words[1] in ROUTINE_KEYWORDS
+
+
+def is_ident_char(c):
+    return c.isalnum() or c in ('_', '$')
+
+
+def strip_leading_comments(statement):
+    while True:
+        statement = statement.lstrip()
+        if statement.startswith('--'):
+            statement = statement.partition('\n')[2]
+        elif statement.startswith('/*'):
+            statement = statement.partition('*/')[2]
+        else:
+            return statement
+
+
+def iter_copy_data(numbered_lines):
+    """Yield data lines of a COPY ... FROM STDIN statement
+    until a line containing \\. or the end of the script.
+
+    Args:
+        numbered_lines (iterator) -- Tuples (line number, line) of the script.
+    """
+    for dummy, line in numbered_lines:
+        if line.rstrip('\r\n') == '\\.':
+            return
+        yield line
+
+
+def split_sql_statements(lines):
+    """Split lines of an SQL script into statements.
+
+    The splitting follows the rules psql uses: semicolons inside
+    quoted strings and identifiers, dollar quotes, comments, parentheses,
+    and BEGIN ATOMIC ... END function bodies don't end a statement.
+    Data of COPY ... FROM STDIN statements is read until a line containing \\.
+
+    Args:
+        lines (iterable) -- Script lines including line endings.
+
+    Yields tuples (statement, line number, copy data), where copy data
+    is an iterator over the data lines of COPY ... FROM STDIN statements,
+    otherwise None. The data lines are read from the script lazily,
+    when the iterator is consumed, which must happen before the next
+    statement is requested.
+    """
+    buf = []
+    start_line = None
+    state = None
+    dollar_tag = None
+    comment_depth = 0
+    paren_depth = 0
+    begin_depth = 0
+    # The first words of the statement and the previous word
+    # to recognize BEGIN ATOMIC in CREATE FUNCTION/PROCEDURE
+    words = []
+    prev_word = None
+    copy_statement = None
+
+    # Shared with the copy data iterators
+    numbered_lines = enumerate(lines, 1)
+
+    for line_nr, line in numbered_lines:
+        seg_start = 0
+        i = 0
+        n = len(line)
+        while i < n:
+            c = line[i]
+
+            if state == 'comment':
+                if line.startswith('*/', i):
+                    comment_depth -= 1
+                    if comment_depth == 0:
+                        state = None
+                    i += 2
+                elif line.startswith('/*', i):
+                    comment_depth += 1
+                    i += 2
+                else:
+                    i += 1
+                continue
+
+            if state == 'dollar':
+                end = line.find(dollar_tag, i)
+                if end == -1:
+                    i = n
+                else:
+                    i = end + len(dollar_tag)
+                    state = None
+                continue
+
+            if state in ("'", '"', 'E'):
+                quote = '"' if state == '"' else "'"
+                if state == 'E' and c == '\\':
+                    i += 2
+                elif c == quote:
+                    # Doubled quotes are escaped quotes
+                    if line.startswith(quote * 2, i):
+                        i += 2
+                    else:
+                        state = None
+                        i += 1
+                else:
+                    i += 1
+                continue
+
+            # Outside of quotes and comments
+            if c.isspace():
+                i += 1
+                continue
+
+            if line.startswith('--', i):
+                break
+
+            if line.startswith('/*', i):
+                state = 'comment'
+                comment_depth = 1
+                i += 2
+                continue
+
+            if start_line is None:
+                start_line = line_nr
+
+            if c == "'":
+                if i > 0 and line[i - 1] in 'eE' and (i < 2 or not is_ident_char(line[i - 2])):
+                    state = 'E'
+                else:
+                    state = "'"
+                i += 1
+
+            elif c == '"':
+                state = '"'
+                i += 1
+
+            elif c == '$' and (i == 0 or not is_ident_char(line[i - 1])) and DOLLAR_QUOTE_RE.match(line, i):
+                dollar_tag = DOLLAR_QUOTE_RE.match(line, i).group()
+                state = 'dollar'
+                i += len(dollar_tag)
+
+            elif c.isalnum() or c == '_':
+                word = WORD_RE.match(line, i).group()
+                lower_word = word.lower()
+                if len(words) < 4:
+                    words.append(lower_word)
+                # The same as psql does to handle BEGIN ATOMIC ... END
+                # bodies of CREATE [OR REPLACE] FUNCTION/PROCEDURE,
+                # CASE ... END can be nested in them
+                if lower_word == 'atomic' and prev_word == 'begin' and is_create_routine(words):
+                    begin_depth += 1
+                elif lower_word == 'case' and begin_depth > 0:
+                    begin_depth += 1
+                elif lower_word == 'end' and begin_depth > 0:
+                    begin_depth -= 1
+                prev_word = lower_word
+                i += len(word)
+
+            elif c == '(':
+                paren_depth += 1
+                i += 1
+
+            elif c == ')':
+                paren_depth = max(paren_depth - 1, 0)
+                i += 1
+
+            elif c == ';' and paren_depth == 0 and begin_depth == 0:
+                buf.append(line[seg_start:i + 1])
+                statement = ''.join(buf).strip()
+                buf = []
+                seg_start = i + 1
+                paren_depth = 0
+                words = []
+                prev_word = None
+                i += 1
+
+                if COPY_FROM_STDIN_RE.match(strip_leading_comments(statement)):
+                    # The data starts on the next line
+                    copy_statement = statement
+                    seg_start = n
+                    break
+
+                yield statement, start_line, None
+                start_line = None
+
+            else:
+                i += 1
+
+        if copy_statement is not None:
+            copy_data = iter_copy_data(numbered_lines)
+            yield copy_statement, start_line, copy_data
+            # Skip the data the caller didn't consume
+            for dummy in copy_data:
+                pass
+            copy_statement = None
+            start_line = None
+            continue
+
+        buf.append(line[seg_start:])
+
+    if start_line is not None:
+        # The last statement without a semicolon
+        yield ''.join(buf).strip(), start_line, None
+
+
+def exec_script_statements(module, cursor, lines, args):
+    """Execute statements of a script one by one.
+
+    Returns a tuple (last executed query, its rows, list of statement details).
+    """
+    statements = []
+    query = ''
+    query_result = []
+    for statement, line_nr, copy_data in split_sql_statements(lines):
+        query = statement
+        try:
+            start_time = time.perf_counter()
+            if copy_data is not None:
+                copy_from_stdin(cursor, statement, copy_data)
+            elif args:
+                query = cursor.mogrify(statement, args)
+                cursor.execute(statement, args)
+            else:
+                cursor.execute(statement)
+
+            exec_time_ms = round((time.perf_counter() - start_time) * 1000, 4)
+        except Exception as e:
+            module.fail_json(msg="Cannot execute SQL statement at line %s '%s' %s: %s" % (
+                line_nr, statement, args, to_native(e)), statements=statements)
+
+        statements.append(dict(
+            line=line_nr,
+            statusmessage=cursor.statusmessage,
+            rowcount=cursor.rowcount,
+            execution_time_ms=exec_time_ms,
+        ))
+
+        query_result = []
+        if cursor.description is not None:
+            try:
+                converter = RowConverter(cursor)
+                query_result = [converter.convert(row) for row in cursor.fetchall()]
+            except Exception as e:
+                module.fail_json(msg="Cannot fetch rows from cursor: %s" % to_native(e))
+
+    return query, query_result, statements
+
+
 # ===========================================
 # Module execution.
 #
@@ -263,11 +570,13 @@ def main():
         encoding=dict(type='str'),
         trust_input=dict(type='bool', default=True),
         search_path=dict(type='list', elements='str'),
+        split_statements=dict(type='bool', default=False),
     )
 
     module = AnsibleModule(
         argument_spec=argument_spec,
-        mutually_exclusive=(('positional_args', 'named_args'),),
+        mutually_exclusive=(('positional_args', 'named_args'),
+                            ('positional_args', 'split_statements')),
         supports_check_mode=False,
     )
 
@@ -278,14 +587,19 @@ def main():
     session_role = module.params["session_role"]
     trust_input = module.params["trust_input"]
     search_path = module.params["search_path"]
+    split_statements = module.params["split_statements"]
 
     if not trust_input:
         # Check input for potentially dangerous elements:
         check_input(module, session_role)
 
     try:
-        with open(path, 'rb') as f:
-            script_content = to_native(f.read())
+        if split_statements:
+            # The file is read line by line while executing
+            script_file = open(path, 'r', encoding='utf-8', errors='surrogateescape')
+        else:
+            with open(path, 'rb') as f:
+                script_content = to_native(f.read())
 
     except Exception as e:
         module.fail_json(msg="Cannot read file '%s' : %s" % (path, to_native(e)))
@@ -314,6 +628,27 @@ def main():
     if args:
         args = convert_elements_to_pg_arrays(args)
 
+    if split_statements:
+        with script_file:
+            current_query_txt, query_result, statements = exec_script_statements(module, cursor, script_file, args)
+
+        if query_result == []:
+            query_result = {}
+
+        kw = dict(
+            changed=True,
+            query=current_query_txt,
+            statusmessage=statements[-1]['statusmessage'] if statements else '',
+            query_result=query_result,
+            rowcount=statements[-1]['rowcount'] if statements else 0,
+            statements=statements,
+        )
+
+        cursor.close()
+        db_connection.close()
+
+        module.exit_json(**kw)
+
     # Execute script content:
     try:
         current_query_txt = cursor.mogrify(script_content, args)
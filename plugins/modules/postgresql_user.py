@@ -171,6 +171,20 @@ options:
     type: bool
     default: true
     version_added: '3.11.0'
+  scram_cache:
+    description:
+      - Path to a local file on the managed host that caches successful password checks
+        against C(SCRAM-SHA-256) verifiers.
+      - Checking a plain text I(password) against a SCRAM verifier takes one PBKDF2 computation
+        with thousands of iterations. With this option, passwords that have not changed since
+        the last run are checked without it.
+      - Entries are SHA-256 hashes of the user name, the stored verifier and the password.
+        They allow to check password guesses much faster than the verifier itself,
+        so keep the file as protected as the passwords. It is created with C(0600) permissions.
+      - The least recently used entries are evicted when the file contains 10000 entries.
+      - Several users can share one file. The file is not written in check mode.
+    type: path
+    version_added: '4.3.0'
 notes:
 - The module creates a user (role) with login privilege by default.
   Use C(NOLOGIN) I(role_attr_flags) to change this behaviour.
@@ -302,19 +316,21 @@ queries:
   returned: success
   type: list
   sample: ['CREATE USER "alice"', 'GRANT CONNECT ON DATABASE "acme" TO "alice"']
+password_check_stats:
+  description:
+  - Statistics of plain text password checks against C(SCRAM-SHA-256) verifiers.
+  - C(checked) is the number of checks, C(cache_hits) is the number of checks answered
+    from I(scram_cache) and C(duration_ms) is the time spent on them in milliseconds.
+  returned: if the password has been checked against a SCRAM verifier
+  type: dict
+  sample: {"checked": 1, "cache_hits": 1, "duration_ms": 0.05}
+  version_added: '4.3.0'
 '''
 
-import hmac
-import itertools
-import re
 import traceback
-from base64 import b64decode
-from hashlib import md5, sha256
 
-from ansible.module_utils.common.text.converters import to_bytes, to_native, to_text
+from ansible.module_utils.common.text.converters import to_native
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.community.postgresql.plugins.module_utils import \
-    saslprep
 from ansible_collections.community.postgresql.plugins.module_utils.database import (
     SQLParseError,
     check_input,
@@ -323,14 +339,21 @@ from ansible_collections.community.postgresql.plugins.module_utils.database impo
 from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
     HAS_PSYCOPG,
     PSYCOPG_VERSION,
+    InvalidFlagsError,
+    ScramVerifier,
+    compare_user_configurations,
     connect_to_db,
     ensure_required_libs,
     get_comment,
     get_conn_params,
     get_server_version,
+    need_to_change_role_attr_flags,
+    parse_role_attrs,
+    parse_user_configuration,
     pg_cursor_args,
     postgres_common_argument_spec,
     set_comment,
+    user_should_we_change_password,
 )
 from ansible_collections.community.postgresql.plugins.module_utils.version import \
     LooseVersion
@@ -340,25 +363,6 @@ if HAS_PSYCOPG and PSYCOPG_VERSION < LooseVersion("3.0"):
 elif HAS_PSYCOPG:
     import psycopg
 
-try:
-    # pbkdf2_hmac is missing on python 2.6, we can safely assume,
-    # that postresql 10 capable instance have at least python 2.7 installed
-    from hashlib import pbkdf2_hmac
-    pbkdf2_found = True
-except ImportError:
-    pbkdf2_found = False
-
-
-FLAGS = ('SUPERUSER', 'CREATEROLE', 'CREATEDB', 'INHERIT', 'LOGIN', 'REPLICATION')
-FLAGS_BY_VERSION = {'BYPASSRLS': 90500}
-
-SCRAM_SHA256_REGEX = r'^SCRAM-SHA-256\$(\d+):([A-Za-z0-9+\/=]+)\$([A-Za-z0-9+\/=]+):([A-Za-z0-9+\/=]+)$'
-
-# map to cope with idiosyncrasies of SUPERUSER and LOGIN
-PRIV_TO_AUTHID_COLUMN = dict(SUPERUSER='rolsuper', CREATEROLE='rolcreaterole',
-                             CREATEDB='rolcreatedb', INHERIT='rolinherit', LOGIN='rolcanlogin',
-                             REPLICATION='rolreplication', BYPASSRLS='rolbypassrls')
-
 executed_queries = []
 
 # This is a special list for debugging.
@@ -370,10 +374,6 @@ executed_queries = []
 debug_info = []
 
 
-class InvalidFlagsError(Exception):
-    pass
-
-
 class InvalidPrivsError(Exception):
     pass
 
@@ -412,104 +412,6 @@ def user_add(cursor, user, password, role_attr_flags, encrypted, expires, conn_l
     return True
 
 
-def get_passwd_encryption(cursor):
-    cursor.execute("SHOW password_encryption")
-    return cursor.fetchone()["password_encryption"]
-
-
-def user_should_we_change_password(cursor, current_role_attrs, user, password, encrypted):
-    """Check if we should change the user's password.
-
-    Compare the proposed password with the existing one, comparing
-    hashes if encrypted. If we can't access it assume yes.
-    """
-
-    if current_role_attrs is None:
-        # on some databases, E.g. AWS RDS instances, there is no access to
-        # the pg_authid relation to check the pre-existing password, so we
-        # just assume password is different
-        return True
-
-    # Do we actually need to do anything?
-    pwchanging = False
-    if password is not None:
-        current_password = current_role_attrs['rolpassword']
-        # Handle SQL_ASCII encoded databases
-        if isinstance(current_password, bytes):
-            current_password = current_password.decode('ascii')
-
-        # Empty password means that the role shouldn't have a password, which
-        # means we need to check if the current password is None.
-        if password == '':
-            if current_password is not None:
-                pwchanging = True
-        # If the provided password is a SCRAM hash, compare it directly to the current password
-        elif re.match(SCRAM_SHA256_REGEX, password):
-            if password != current_password:
-                pwchanging = True
-
-        # SCRAM hashes are represented as a special object, containing hash data:
-        # `SCRAM-SHA-256$<iteration count>:<salt>$<StoredKey>:<ServerKey>`
-        # for reference, see https://www.postgresql.org/docs/current/catalog-pg-authid.html
-        elif current_password is not None \
-                and pbkdf2_found \
-                and re.match(SCRAM_SHA256_REGEX, current_password):
-
-            r = re.match(SCRAM_SHA256_REGEX, current_password)
-            try:
-                # extract SCRAM params from rolpassword
-                it = int(r.group(1))
-                salt = b64decode(r.group(2))
-                server_key = b64decode(r.group(4))
-                # we'll never need `storedKey` as it is only used for server auth in SCRAM
-                # storedKey = b64decode(r.group(3))
-
-                # from RFC5802 https://tools.ietf.org/html/rfc5802#section-3
-                # SaltedPassword  := Hi(Normalize(password), salt, i)
-                # ServerKey       := HMAC(SaltedPassword, "Server Key")
-                normalized_password = saslprep.saslprep(to_text(password))
-                salted_password = pbkdf2_hmac('sha256', to_bytes(normalized_password), salt, it)
-
-                server_key_verifier = hmac.new(salted_password, digestmod=sha256)
-                server_key_verifier.update(b'Server Key')
-
-                if server_key_verifier.digest() != server_key:
-                    pwchanging = True
-            except Exception:
-                # We assume the password is not scram encrypted
-                # or we cannot check it properly, e.g. due to missing dependencies
-                pwchanging = True
-
-        # When the provided password looks like a MD5-hash, value of
-        # 'encrypted' is ignored.
-        elif is_pg_passwd_md5(password) or encrypted == 'UNENCRYPTED':
-            if password != current_password:
-                pwchanging = True
-        elif encrypted == 'ENCRYPTED':
-            default_pw_encryption = get_passwd_encryption(cursor)
-
-            if default_pw_encryption == 'md5':
-                hashed_password = 'md5{0}'.format(md5(to_bytes(password) + to_bytes(user)).hexdigest())
-                if hashed_password != current_password:
-                    pwchanging = True
-            elif default_pw_encryption == 'scram-sha-256':
-                # https://github.com/ansible-collections/community.postgresql/issues/688
-                # When the current password is not none and is not
-                # hashed as scram-sha-256 / not explicitly declared as plain text
-                # (if we are here, these conditions should be met)
-                # but the default password encryption is scram-sha-256, update the password.
-                # Can be relevant when migrating from older version of postgres.
-                pwchanging = True
-
-    return pwchanging
-
-
-def is_pg_passwd_md5(password):
-    # 32: MD5 hashes are represented as a sequence of 32 hexadecimal digits
-    #  3: The size of the 'md5' prefix
-    return True if password.startswith('md5') and len(password) == 32 + 3 else False
-
-
 def get_role_attrs(db_connection, module, cursor, user):
     current_role_attrs = None
 
@@ -540,27 +442,6 @@ def get_role_attrs(db_connection, module, cursor, user):
     return current_role_attrs
 
 
-def need_to_change_role_attr_flags(role_attr_flags, current_role_attrs):
-    # Compare the desired role_attr_flags and current ones.
-    # If they don't match, return True which means
-    # they need to be updated, False otherwise.
-
-    role_attr_flags_changing = False
-    if role_attr_flags:
-        role_attr_flags_dict = {}
-        for r in role_attr_flags.split(' '):
-            if r.startswith('NO'):
-                role_attr_flags_dict[r.replace('NO', '', 1)] = False
-            else:
-                role_attr_flags_dict[r] = True
-
-        for role_attr_name, role_attr_value in role_attr_flags_dict.items():
-            if current_role_attrs[PRIV_TO_AUTHID_COLUMN[role_attr_name]] != role_attr_value:
-                role_attr_flags_changing = True
-
-    return role_attr_flags_changing
-
-
 def need_to_change_role_expiration(cursor, expires, current_role_attrs):
     expires_changing = False
 
@@ -605,7 +486,8 @@ def exec_alter_user(module, cursor, statement, params=None):
     return changed
 
 
-def user_alter(db_connection, module, user, password, role_attr_flags, encrypted, expires, no_password_changes, conn_limit):
+def user_alter(db_connection, module, user, password, role_attr_flags, encrypted, expires, no_password_changes, conn_limit,
+               scram_verifier=None):
     """Change user password and/or attributes. Return True if changed, False otherwise."""
     changed = False
 
@@ -625,7 +507,8 @@ def user_alter(db_connection, module, user, password, role_attr_flags, encrypted
         current_role_attrs = get_role_attrs(db_connection, module, cursor, user)
 
         # Does password need to changed?
-        pwchanging = user_should_we_change_password(cursor, current_role_attrs, user, password, encrypted)
+        pwchanging = user_should_we_change_password(cursor, current_role_attrs, user, password, encrypted,
+                                                    scram_verifier)
 
         # Do role attributes need to changed?
         role_attr_flags_changing = need_to_change_role_attr_flags(role_attr_flags, current_role_attrs)
@@ -705,48 +588,6 @@ def user_delete(cursor, user, module):
     return True, None
 
 
-def parse_role_attrs(role_attr_flags, srv_version):
-    """
-    Parse role attributes string for user creation.
-    Format:
-
-        attributes[,attributes,...]
-
-    Where:
-
-        attributes := CREATEDB,CREATEROLE,NOSUPERUSER,...
-        [ "[NO]SUPERUSER","[NO]CREATEROLE", "[NO]CREATEDB",
-                            "[NO]INHERIT", "[NO]LOGIN", "[NO]REPLICATION",
-                            "[NO]BYPASSRLS" ]
-
-    Note: "[NO]BYPASSRLS" role attribute introduced in 9.5
-    Note: "[NO]CREATEUSER" role attribute is deprecated.
-
-    """
-    flags = frozenset(role.upper() for role in role_attr_flags.split(',') if role)
-
-    valid_flags = frozenset(itertools.chain(FLAGS, get_valid_flags_by_version(srv_version)))
-    valid_flags = frozenset(itertools.chain(valid_flags, ('NO%s' % flag for flag in valid_flags)))
-
-    if not flags.issubset(valid_flags):
-        raise InvalidFlagsError('Invalid role_attr_flags specified: %s' %
-                                ' '.join(flags.difference(valid_flags)))
-
-    return ' '.join(flags)
-
-
-def get_valid_flags_by_version(srv_version):
-    """
-    Some role attributes were introduced after certain versions. We want to
-    compile a list of valid flags against the current Postgres version.
-    """
-    return [
-        flag
-        for flag, version_introduced in FLAGS_BY_VERSION.items()
-        if srv_version >= version_introduced
-    ]
-
-
 def add_comment(cursor, user, comment, check_mode):
     """Add comment on user."""
     current_comment = get_comment(cursor, 'role', user)
@@ -759,39 +600,6 @@ def add_comment(cursor, user, comment, check_mode):
         return False
 
 
-def compare_user_configurations(current, desired, reset_unspec_config):
-    """Compares two configurations and returns a list of values to reset as well as a dict of parameters to update."""
-    reset = []
-    update = desired.copy()
-
-    # check each item in the current configuration
-    for key, value in current.items():
-        # we already have the correct setting
-        if key in desired and value == desired[key]:
-            # so we can remove it from the list
-            del update[key]
-        # if the key is not in the list of settings we want, and we reset unspecified parameters
-        elif key not in desired and reset_unspec_config:
-            # we will reset it on the database
-            reset.append(key)
-        # if the setting is not in the db or has the wrong value, it will get updated
-
-    return {"reset": reset, "update": update}
-
-
-def parse_user_configuration(module, configs):
-    """Parses configuration from a list of 'key=value' strings like returned from the database to a dict."""
-    if configs is not None:
-        try:
-            # parses a list of "key=value" strings to a dict
-            return {t[0]: t[1] for t in map(lambda s: s.split("=", 1), configs)}
-        except IndexError:
-            module.fail_json(
-                msg="Expecting a list of strings where each string has the format 'key=value'.")
-    else:
-        return {}
-
-
 def user_configuration(cursor, module, user, configuration, reset_unspec_config, quote_values):
     """Updates the user's configuration parameters if necessary."""
     current_config_query = "SELECT rolconfig FROM pg_roles WHERE rolname = %(user)s;"
@@ -872,6 +680,7 @@ def main():
         configuration=dict(type='dict', default={}),
         reset_unspecified_configuration=dict(type='bool', default=False),
         quote_configuration_values=dict(type='bool', default=True),
+        scram_cache=dict(type='path'),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -924,12 +733,14 @@ def main():
 
     kw = dict(user=user)
     changed = False
+    scram_verifier = ScramVerifier(module, module.params['scram_cache'])
 
     if state == "present":
         if user_exists(cursor, user):
             try:
                 changed = user_alter(db_connection, module, user, password,
-                                     role_attr_flags, encrypted, expires, no_password_changes, conn_limit)
+                                     role_attr_flags, encrypted, expires, no_password_changes, conn_limit,
+                                     scram_verifier)
             except SQLParseError as e:
                 module.fail_json(msg=to_native(e), exception=traceback.format_exc())
         else:
@@ -978,8 +789,12 @@ def main():
     cursor.close()
     db_connection.close()
 
+    scram_verifier.save()
+
     kw['changed'] = changed
     kw['queries'] = executed_queries
+    if scram_verifier.stats['checked']:
+        kw['password_check_stats'] = scram_verifier.stats
     if debug_info:
         kw['debug_info'] = debug_info
     module.exit_json(**kw)
@@ -49,9 +49,28 @@ options:
     type: bool
     default: true
     version_added: '0.2.0'
+  include_sizes:
+    description:
+    - If C(false), C(size) and C(total_size) of tables and indexes are not collected.
+    - Computing sizes requires accessing the files of every relation,
+      disabling it speeds up the collection in databases with many relations.
+    type: bool
+    default: true
+    version_added: '4.3.0'
+  state_file:
+    description:
+    - Path to a file on the managed host where a snapshot of the cumulative statistics counters
+      of the collected objects is saved.
+    - If the file contains a snapshot saved by the previous run, the module returns
+      the counter changes and rates since that run in I(deltas) instead of
+      I(tables), I(indexes), and I(functions), only for objects whose counters have changed.
+    - The snapshot is not saved in check mode.
+    - Use a separate file for every I(login_db), I(schema), and I(filter) combination.
+    type: path
+    version_added: '4.3.0'
 
 notes:
-- C(size) and C(total_size) returned values are presented in bytes.
+- C(size) and C(total_size) returned values are presented in bytes, they are returned only if I(include_sizes=true).
 - For tracking function statistics the PostgreSQL C(track_functions) parameter must be enabled.
   See U(https://www.postgresql.org/docs/current/runtime-config-statistics.html) for more information.
 
@@ -88,27 +107,70 @@ EXAMPLES = r'''
   community.postgresql.postgresql_user_obj_stat_info:
     login_db: acme
     filter: tables, indexes
+
+- name: Get counter changes of objects in the acme database since the previous run of this task
+  community.postgresql.postgresql_user_obj_stat_info:
+    login_db: acme
+    state_file: /var/tmp/acme_stat.json
+  register: stat
+
+- name: Show tables that were scanned sequentially
+  ansible.builtin.debug:
+    msg: "{{ item.key }}: {{ item.value.seq_scan_per_sec }} seq scans/s"
+  loop: "{{ stat.deltas.tables.public | default({}) | dict2items | selectattr('value.seq_scan', 'defined') }}"
+
+- name: Collect statistics of user tables in the acme database without sizes
+  community.postgresql.postgresql_user_obj_stat_info:
+    login_db: acme
+    filter: tables
+    include_sizes: false
 '''
 
 RETURN = r'''
 indexes:
   description: User index statistics.
-  returned: success
+  returned: success and I(state_file) is not set
   type: dict
   sample: {"public": {"test_id_idx": {"idx_scan": 0, "idx_tup_fetch": 0, "idx_tup_read": 0, "relname": "test", "size": 8192, ...}}}
 tables:
   description: User table statistics.
-  returned: success
+  returned: success and I(state_file) is not set
   type: dict
   sample: {"public": {"test": {"analyze_count": 3, "n_dead_tup": 0, "n_live_tup": 0, "seq_scan": 2, "size": 0, "total_size": 8192, ...}}}
 functions:
   description: User function statistics.
-  returned: success
+  returned: success and I(state_file) is not set
   type: dict
   sample: {"public": {"inc": {"calls": 1, "funcid": 26722, "self_time": 0.23, "total_time": 0.23}}}
+deltas:
+  description:
+  - Changes of cumulative counters of tables, indexes, and functions since the snapshot
+    saved in I(state_file), and their per second rates (C(<counter>_per_sec)).
+  - Contains only objects and counters that have changed.
+  - If a counter has been reset, the change is counted from zero.
+  - Empty if there was no previous snapshot.
+  returned: success and I(state_file) is set
+  type: dict
+  version_added: '4.3.0'
+  sample: {"tables": {"public": {"test": {"seq_scan": 12, "seq_scan_per_sec": 0.04, "n_tup_ins": 300, "n_tup_ins_per_sec": 1.0}}},
+           "indexes": {"public": {"test_id_idx": {"idx_scan": 5, "idx_scan_per_sec": 0.017}}}, "functions": {}}
+interval:
+  description:
+  - Number of seconds since the snapshot saved in I(state_file).
+  - C(null) if there was no previous snapshot.
+  returned: success and I(state_file) is set
+  type: float
+  version_added: '4.3.0'
+  sample: 300.02
 '''
 
+import json
+import os
+import tempfile
+import time
+
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_native
 from ansible_collections.community.postgresql.plugins.module_utils.database import \
     check_input
 from ansible_collections.community.postgresql.plugins.module_utils.postgres import (
@@ -120,6 +182,23 @@ from ansible_collections.community.postgresql.plugins.module_utils.postgres impo
     postgres_common_argument_spec,
 )
 
+# Cumulative counters saved to state_file, other columns
+# are identifiers, timestamps or current values (like n_live_tup):
+SNAPSHOT_COUNTERS = {
+    'functions': ('calls', 'total_time', 'self_time'),
+    'indexes': ('idx_scan', 'idx_tup_read', 'idx_tup_fetch'),
+    'tables': ('seq_scan', 'seq_tup_read', 'idx_scan', 'idx_tup_fetch',
+               'n_tup_ins', 'n_tup_upd', 'n_tup_del', 'n_tup_hot_upd', 'n_tup_newpage_upd',
+               'vacuum_count', 'autovacuum_count', 'analyze_count', 'autoanalyze_count'),
+}
+
+# Keys containing object OIDs:
+SNAPSHOT_OID_KEYS = {
+    'functions': 'funcid',
+    'indexes': 'indexrelid',
+    'tables': 'relid',
+}
+
 # ===========================================
 # PostgreSQL module specific support methods.
 #
@@ -139,11 +218,13 @@ class PgUserObjStatInfo():
         info (dict): Statistics dictionary.
         obj_func_mapping (dict): Mapping of object types to corresponding functions.
         schema (str): Name of a schema to restrict stat collecting.
+        include_sizes (bool): Collect sizes of tables and indexes.
     """
 
-    def __init__(self, module, cursor):
+    def __init__(self, module, cursor, include_sizes=True):
         self.module = module
         self.cursor = cursor
+        self.include_sizes = include_sizes
         self.info = {
             'functions': {},
             'indexes': {},
@@ -205,10 +286,15 @@ class PgUserObjStatInfo():
 
     def get_idx_stat(self):
         """Get index statistics and fill out self.info dictionary."""
-        query = "SELECT * FROM pg_stat_user_indexes"
+        query = "SELECT s.* FROM pg_stat_user_indexes AS s"
+        if self.include_sizes:
+            # Sizes are computed by OID in the same query
+            # to avoid a round trip per index:
+            query = ("SELECT s.*, pg_relation_size(s.indexrelid) AS size "
+                     "FROM pg_stat_user_indexes AS s")
         qp = None
         if self.schema:
-            query = "SELECT * FROM pg_stat_user_indexes WHERE schemaname = %s"
+            query += " WHERE s.schemaname = %s"
             qp = (self.schema,)
 
         result = exec_sql(self, query, query_params=qp, add_to_executed=False)
@@ -223,10 +309,16 @@ class PgUserObjStatInfo():
 
     def get_tbl_stat(self):
         """Get table statistics and fill out self.info dictionary."""
-        query = "SELECT * FROM pg_stat_user_tables"
+        query = "SELECT s.* FROM pg_stat_user_tables AS s"
+        if self.include_sizes:
+            # Sizes are computed by OID in the same query
+            # to avoid round trips per table:
+            query = ("SELECT s.*, pg_relation_size(s.relid) AS size, "
+                     "pg_total_relation_size(s.relid) AS total_size "
+                     "FROM pg_stat_user_tables AS s")
         qp = None
         if self.schema:
-            query = "SELECT * FROM pg_stat_user_tables WHERE schemaname = %s"
+            query += " WHERE s.schemaname = %s"
             qp = (self.schema,)
 
         result = exec_sql(self, query, query_params=qp, add_to_executed=False)
@@ -257,26 +349,6 @@ class PgUserObjStatInfo():
                 if key not in (schema_key, name_key):
                     self.info[info_key][elem[schema_key]][elem[name_key]][key] = val
 
-            if info_key in ('tables', 'indexes'):
-                schemaname = elem[schema_key]
-                if self.schema:
-                    schemaname = self.schema
-
-                relname = '%s.%s' % (schemaname, elem[name_key])
-
-                result = exec_sql(self, "SELECT pg_relation_size (%s)",
-                                  query_params=(relname,),
-                                  add_to_executed=False)
-
-                self.info[info_key][elem[schema_key]][elem[name_key]]['size'] = result[0]["pg_relation_size"]
-
-                if info_key == 'tables':
-                    result = exec_sql(self, "SELECT pg_total_relation_size (%s)",
-                                      query_params=(relname,),
-                                      add_to_executed=False)
-
-                    self.info[info_key][elem[schema_key]][elem[name_key]]['total_size'] = result[0]["pg_total_relation_size"]
-
     def set_schema(self, schema):
         """If schema exists, sets self.schema, otherwise fails."""
         query = ("SELECT 1 as schema_exists FROM information_schema.schemata "
@@ -290,6 +362,93 @@ class PgUserObjStatInfo():
             self.module.fail_json(msg="Schema '%s' does not exist" % (schema))
 
 
+def make_snapshot(info, timestamp):
+    """Make a snapshot of cumulative counters keyed by object OIDs.
+
+    Args:
+        info (dict): Statistics dictionary returned by PgUserObjStatInfo.collect().
+        timestamp (float): Time of the collection.
+
+    Returns:
+        Snapshot dictionary.
+    """
+    snapshot = {'timestamp': timestamp}
+
+    for obj_type, counters in SNAPSHOT_COUNTERS.items():
+        snapshot[obj_type] = {}
+        for objects in info[obj_type].values():
+            for obj in objects.values():
+                snapshot[obj_type][str(obj[SNAPSHOT_OID_KEYS[obj_type]])] = dict(
+                    (c, obj[c]) for c in counters if obj.get(c) is not None)
+
+    return snapshot
+
+
+def get_deltas(info, snapshot, prev_snapshot):
+    """Compare counters with the previous snapshot.
+
+    Args:
+        info (dict): Statistics dictionary returned by PgUserObjStatInfo.collect().
+        snapshot (dict): Snapshot made by make_snapshot() from info.
+        prev_snapshot (dict): Previous snapshot.
+
+    Returns:
+        Tuple of the deltas dictionary and the interval in seconds.
+    """
+    interval = snapshot['timestamp'] - prev_snapshot['timestamp']
+    deltas = {}
+
+    for obj_type in SNAPSHOT_COUNTERS:
+        deltas[obj_type] = {}
+        prev_objects = prev_snapshot.get(obj_type, {})
+
+        for schema, objects in info[obj_type].items():
+            for name, obj in objects.items():
+                oid = str(obj[SNAPSHOT_OID_KEYS[obj_type]])
+                prev = prev_objects.get(oid, {})
+
+                obj_deltas = {}
+                for counter, val in snapshot[obj_type][oid].items():
+                    delta = val - prev.get(counter, 0)
+                    if delta < 0:
+                        # The counter has been reset:
+                        delta = val
+
+                    if delta:
+                        obj_deltas[counter] = delta
+                        if interval > 0:
+                            obj_deltas['%s_per_sec' % counter] = round(delta / interval, 3)
+
+                if obj_deltas:
+                    deltas[obj_type].setdefault(schema, {})[name] = obj_deltas
+
+    return deltas, round(interval, 3)
+
+
+def read_snapshot(module, path):
+    """Read the snapshot from the file, return None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError) as e:
+        module.fail_json(msg="Cannot read state file %s: %s" % (path, to_native(e)))
+
+
+def write_snapshot(module, path, snapshot):
+    """Write the snapshot to the file replacing it atomically."""
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+    except (IOError, OSError) as e:
+        module.fail_json(msg="Cannot write state file %s: %s" % (path, to_native(e)))
+
+    module.atomic_move(tmp_path, path)
+
+
 # ===========================================
 # Module execution.
 #
@@ -308,6 +467,8 @@ def main():
         session_role=dict(type='str'),
         schema=dict(type='str'),
         trust_input=dict(type="bool", default=True),
+        include_sizes=dict(type="bool", default=True),
+        state_file=dict(type="path"),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -330,14 +491,29 @@ def main():
 
     ############################
     # Create object and do work:
-    pg_obj_info = PgUserObjStatInfo(module, cursor)
+    pg_obj_info = PgUserObjStatInfo(module, cursor, module.params["include_sizes"])
 
     info_dict = pg_obj_info.collect(filter_, schema)
+    timestamp = time.time()
 
     # Clean up:
     cursor.close()
     db_connection.close()
 
+    if module.params["state_file"]:
+        state_file = module.params["state_file"]
+        snapshot = make_snapshot(info_dict, timestamp)
+        prev_snapshot = read_snapshot(module, state_file)
+
+        deltas, interval = {}, None
+        if prev_snapshot is not None:
+            deltas, interval = get_deltas(info_dict, snapshot, prev_snapshot)
+
+        if not module.check_mode:
+            write_snapshot(module, state_file, snapshot)
+
+        info_dict = dict(deltas=deltas, interval=interval)
+
     # Return information:
     module.exit_json(**info_dict)
 
@@ -0,0 +1,17 @@
+-- Statements are split and executed one by one
+CREATE TABLE test_split (id int, story text);
+
+INSERT INTO test_split (id, story) VALUES (1, 'first; with a semicolon');
+
+COPY test_split (id, story) FROM stdin;
+2	second
+3	third
+\.
+
+CREATE FUNCTION test_split_func() RETURNS int AS $$
+BEGIN
+  RETURN 1;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT id, story FROM test_split ORDER BY id;
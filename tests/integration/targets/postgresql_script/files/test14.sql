@@ -0,0 +1,4 @@
+SELECT 1;
+
+SELECT id
+  FROM test_split_nonexistent;
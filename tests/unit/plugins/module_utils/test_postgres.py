@@ -4,6 +4,12 @@
 from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
+import hashlib
+import hmac
+import os
+from base64 import b64encode
+from datetime import timedelta
+from decimal import Decimal
 from os import environ
 
 import ansible_collections.community.postgresql.plugins.module_utils.postgres as pg
@@ -139,6 +145,9 @@ def m_psycopg2():
         def set_isolation_level(self, isolevel):
             pass
 
+        def close(self):
+            pass
+
     class Extras():
         def __init__(self):
             self.DictCursor = True
@@ -152,12 +161,18 @@ def m_psycopg2():
             self.__version__ = "2.9.6"
             self.extras = Extras()
             self.extensions = Extensions()
+            self.passed_options = None
 
         def connect(self, host=None, port=None, user=None,
-                    password=None, sslmode=None, sslrootcert=None, connect_params=None):
+                    password=None, sslmode=None, sslrootcert=None, connect_params=None,
+                    options=None):
             if user == 'Exception':
                 raise Exception()
 
+            if options is not None and host == 'pooler':
+                raise Exception('unsupported startup parameter: options')
+
+            self.passed_options = options
             return DbConnection()
 
     return DummyPsycopg2()
@@ -231,6 +246,198 @@ class TestEnsureReqLibs():
         assert 'psycopg2 must be at least 2.4.3' in m_ansible_module.err_msg
 
 
+class TestPgMembership():
+
+    """Namespace for testing PgMembership class."""
+
+    class Cursor():
+        """Cursor of a database with roles g1, g2, r1, r2, r3, r1 is a member of g1."""
+
+        roles = ('g1', 'g2', 'r1', 'r2', 'r3')
+        memberships = (('r1', 'g1'),)
+
+        def __init__(self):
+            self.queries = []
+            self.res = []
+
+        def execute(self, query, params=None):
+            self.queries.append(query)
+            if 'pg_auth_members' in query:
+                self.res = [{'member': m, 'groupname': g} for (m, g) in self.memberships
+                            if m in params['roles']]
+            elif 'FROM pg_roles' in query:
+                self.res = [{'rolname': r} for r in params['roles'] if r in self.roles]
+            else:
+                self.res = []
+
+        def fetchall(self):
+            return self.res
+
+        def mogrify(self, query, params):
+            return query
+
+    def test_memberships_loaded_in_one_query(self):
+        cursor = self.Cursor()
+        membership = pg.PgMembership(None, cursor, ['g1', 'g2'], ['r1', 'r2', 'r3'])
+
+        assert len(cursor.queries) == 3
+        assert membership.memberof == {'r1': set(['g1']), 'r2': set(), 'r3': set()}
+
+    def test_grant(self):
+        cursor = self.Cursor()
+        membership = pg.PgMembership(None, cursor, ['g1', 'g2'], ['r1', 'r2', 'r3'])
+
+        assert membership.grant() is True
+        assert membership.executed_queries == ['GRANT "g2" TO "r1"',
+                                               'GRANT "g1", "g2" TO "r2", "r3"']
+        assert membership.granted == {'g1': ['r2', 'r3'], 'g2': ['r1', 'r2', 'r3']}
+
+    def test_revoke(self):
+        cursor = self.Cursor()
+        membership = pg.PgMembership(None, cursor, ['g1', 'g2'], ['r1', 'r2'])
+
+        assert membership.revoke() is True
+        assert membership.executed_queries == ['REVOKE "g1" FROM "r1"']
+        assert membership.revoked == {'g1': ['r1'], 'g2': []}
+
+    def test_match(self):
+        cursor = self.Cursor()
+        membership = pg.PgMembership(None, cursor, ['g2'], ['r1', 'r2'])
+
+        assert membership.match() is True
+        assert membership.executed_queries == ['REVOKE "g1" FROM "r1"',
+                                               'GRANT "g2" TO "r1", "r2"']
+        assert membership.revoked == {'g1': ['r1']}
+        assert membership.granted == {'g2': ['r1', 'r2']}
+
+
+def make_scram_verifier(password, salt=b'0123456789abcdef', iterations=4096):
+    """Build a SCRAM-SHA-256 verifier the same way PostgreSQL does it."""
+    salted_password = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    client_key = hmac.new(salted_password, b'Client Key', hashlib.sha256).digest()
+    stored_key = hashlib.sha256(client_key).digest()
+    server_key = hmac.new(salted_password, b'Server Key', hashlib.sha256).digest()
+    return 'SCRAM-SHA-256$%d:%s$%s:%s' % (iterations, b64encode(salt).decode(),
+                                          b64encode(stored_key).decode(), b64encode(server_key).decode())
+
+
+class TestScramVerifier():
+
+    """Namespace for testing ScramVerifier class."""
+
+    class Module():
+        def __init__(self, check_mode=False):
+            self.check_mode = check_mode
+            self.warnings = []
+
+        def warn(self, msg):
+            self.warnings.append(msg)
+
+    def test_matches_without_cache(self):
+        verifier = pg.ScramVerifier(None)
+        stored = make_scram_verifier('secret')
+
+        assert verifier.matches('alice', 'secret', stored) is True
+        assert verifier.matches('alice', 'other', stored) is False
+        assert verifier.stats['checked'] == 2
+        assert verifier.stats['cache_hits'] == 0
+
+        with pytest.raises(ValueError):
+            verifier.matches('alice', 'secret', 'md5abc')
+
+    def test_cache_hits_and_file(self, tmp_path):
+        cache_path = str(tmp_path / 'scram_cache.json')
+        stored = make_scram_verifier('secret')
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path)
+        assert verifier.matches('alice', 'secret', stored) is True
+        verifier.save()
+
+        assert oct(os.stat(cache_path).st_mode & 0o777) == oct(0o600)
+        with open(cache_path) as f:
+            assert 'secret' not in f.read()
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path)
+        assert verifier.matches('alice', 'secret', stored) is True
+        assert verifier.stats['cache_hits'] == 1
+        # The cache key includes the role and the verifier:
+        assert verifier.matches('bob', 'secret', stored) is True
+        assert verifier.matches('alice', 'secret', make_scram_verifier('secret', salt=b'fedcba9876543210')) is True
+        assert verifier.stats['cache_hits'] == 1
+        # Failed checks are not cached:
+        assert verifier.matches('alice', 'other', stored) is False
+        assert len(verifier.cache) == 3
+
+    def test_cache_file_permissions(self, tmp_path):
+        cache_path = tmp_path / 'scram_cache.json'
+        cache_path.write_text(u'{"version": 1, "entries": []}')
+        os.chmod(str(cache_path), 0o644)
+
+        verifier = pg.ScramVerifier(self.Module(), str(cache_path))
+        verifier.matches('alice', 'secret', make_scram_verifier('secret', iterations=16))
+        old_umask = os.umask(0)
+        try:
+            verifier.save()
+        finally:
+            os.umask(old_umask)
+
+        assert oct(os.stat(str(cache_path)).st_mode & 0o777) == oct(0o600)
+        assert os.listdir(str(tmp_path)) == ['scram_cache.json']
+
+    def test_cache_lru_eviction(self, tmp_path):
+        cache_path = str(tmp_path / 'scram_cache.json')
+        stored = make_scram_verifier('secret', iterations=16)
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path, cache_size=2)
+        verifier.matches('r1', 'secret', stored)
+        verifier.matches('r2', 'secret', stored)
+        # Use r1, so r2 becomes the least recently used entry:
+        verifier.matches('r1', 'secret', stored)
+        verifier.matches('r3', 'secret', stored)
+        verifier.save()
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path, cache_size=2)
+        verifier.matches('r1', 'secret', stored)
+        verifier.matches('r3', 'secret', stored)
+        verifier.matches('r2', 'secret', stored)
+        assert verifier.stats['cache_hits'] == 2
+
+    def test_cache_not_written_on_hits(self, tmp_path):
+        cache_path = str(tmp_path / 'scram_cache.json')
+        stored = make_scram_verifier('secret', iterations=16)
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path)
+        verifier.matches('alice', 'secret', stored)
+        verifier.save()
+        inode = os.stat(cache_path).st_ino
+
+        verifier = pg.ScramVerifier(self.Module(), cache_path)
+        assert verifier.matches('alice', 'secret', stored) is True
+        assert verifier.stats['cache_hits'] == 1
+        assert verifier.cache_modified is False
+        verifier.save()
+
+        # The file is not replaced:
+        assert os.stat(cache_path).st_ino == inode
+
+    def test_cache_not_written_in_check_mode(self, tmp_path):
+        cache_path = str(tmp_path / 'scram_cache.json')
+        verifier = pg.ScramVerifier(self.Module(check_mode=True), cache_path)
+        verifier.matches('alice', 'secret', make_scram_verifier('secret', iterations=16))
+        verifier.save()
+
+        assert not os.path.exists(cache_path)
+
+    def test_broken_cache_file(self, tmp_path):
+        cache_path = tmp_path / 'scram_cache.json'
+        cache_path.write_text(u'garbage')
+        module = self.Module()
+
+        verifier = pg.ScramVerifier(module, str(cache_path))
+        assert len(module.warnings) == 1
+        assert verifier.matches('alice', 'secret', make_scram_verifier('secret', iterations=16)) is True
+
+
 @pytest.fixture(scope='class')
 def m_ansible_module():
     """Return an object of dummy AnsibleModule class."""
@@ -301,6 +508,42 @@ class TestConnectToDb():
         # The default behaviour, normal in this case:
         assert 'Database name has not been passed' in m_ansible_module.warn_msg
 
+    def test_session_role_startup_options(self, m_ansible_module, monkeypatch, m_psycopg2):
+        """Test connect_to_db(), session_role is passed through startup options."""
+        monkeypatch.setattr(pg, 'psycopg', m_psycopg2)
+        monkeypatch.setattr(pg, 'psycopg2', m_psycopg2)
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("2.9.6"))
+
+        m_ansible_module.params['session_role'] = 'test role'
+        conn_params = pg.get_conn_params(m_ansible_module, m_ansible_module.params)
+        session_stats = {}
+        db_connection, dummy = pg.connect_to_db(m_ansible_module, conn_params,
+                                                session_stats=session_stats)
+
+        assert type(db_connection) is DbConnection
+        assert m_psycopg2.passed_options == '-c role=test\\ role'
+        assert session_stats == {'method': 'startup_options', 'round_trips': 0}
+        # The passed dictionary must not be changed:
+        assert 'options' not in conn_params
+
+    def test_session_role_startup_options_rejected(self, m_ansible_module, monkeypatch, m_psycopg2):
+        """Test connect_to_db(), fallback when startup options are rejected."""
+        monkeypatch.setattr(pg, 'psycopg', m_psycopg2)
+        monkeypatch.setattr(pg, 'psycopg2', m_psycopg2)
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("2.9.6"))
+
+        m_ansible_module.params['session_role'] = 'test_role'
+        m_ansible_module.params['login_host'] = 'pooler'
+        conn_params = pg.get_conn_params(m_ansible_module, m_ansible_module.params)
+        session_stats = {}
+        db_connection, dummy = pg.connect_to_db(m_ansible_module, conn_params,
+                                                session_stats=session_stats)
+
+        assert type(db_connection) is DbConnection
+        assert m_psycopg2.passed_options is None
+        assert session_stats == {'method': 'statement', 'round_trips': 1}
+        m_ansible_module.params['login_host'] = ''
+
     def test_fail_on_conn_true(self, m_ansible_module, monkeypatch, m_psycopg2):
         """
         Test connect_to_db(), fail_on_conn arg passed as True (the default behavior).
@@ -349,6 +592,71 @@ class TestConnectToDb():
         assert m_ansible_module.err_msg == ''
 
 
+class TestOpenConnection():
+
+    """Namespace for testing open_connection() function.
+
+    Unlike connect_to_db(), it must raise exceptions
+    instead of invoking fail_json().
+    """
+
+    def test_session_init_error(self, monkeypatch, m_psycopg2):
+        monkeypatch.setattr(pg, 'psycopg', m_psycopg2)
+        monkeypatch.setattr(pg, 'psycopg2', m_psycopg2)
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("2.9.6"))
+
+        def execute(self, query):
+            raise Exception('role "test_role" does not exist')
+
+        monkeypatch.setattr(Cursor, 'execute', execute)
+
+        with pytest.raises(pg.SessionInitError, match='Could not switch role'):
+            pg.open_connection({'host': 'pooler'}, session_role='test_role')
+
+    def test_connection_error(self, monkeypatch, m_psycopg2):
+        monkeypatch.setattr(pg, 'psycopg', m_psycopg2)
+        monkeypatch.setattr(pg, 'psycopg2', m_psycopg2)
+
+        with pytest.raises(Exception):
+            pg.open_connection({'user': 'Exception'})
+
+
+class TestSessionStartupOptions():
+
+    """Namespace for testing session initialization helpers."""
+
+    @pytest.mark.parametrize('value, expected', [
+        ('role', 'role'),
+        ('my role', 'my\\ role'),
+        ('my\\role', 'my\\\\role'),
+    ])
+    def test_escape_startup_option(self, value, expected):
+        assert pg.escape_startup_option(value) == expected
+
+    @pytest.mark.parametrize('msg, expected', [
+        ('unsupported startup parameter: options', True),
+        ('ERROR:  Unsupported startup parameter in options: role', True),
+        ("unsupported options startup parameter: only '-c config=val' and '--config=val' are allowed", True),
+        ('unsupported startup parameter: application_name', False),
+        ('FATAL:  password authentication failed for user "test_role"', False),
+        ('FATAL:  role "test_role" does not exist', False),
+        ('FATAL:  invalid value for parameter "role": "test_role"', False),
+        ('invalid connection option "options"', False),
+    ])
+    def test_startup_options_rejected(self, msg, expected):
+        assert pg._startup_options_rejected(Exception(msg)) is expected
+
+    def test_get_session_startup_options_psycopg3(self, monkeypatch):
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("3.1.8"))
+        assert pg.get_session_startup_options('test_role') == ['-c role=test_role', '-c datestyle=iso']
+        assert pg.get_session_init_queries('test_role') == ['SET ROLE "test_role"', 'SET datestyle TO iso']
+
+    def test_get_session_startup_options_psycopg2(self, monkeypatch):
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("2.9.6"))
+        assert pg.get_session_startup_options() == []
+        assert pg.get_session_init_queries() == []
+
+
 class TestGetConnParams():
 
     """Namespace for testing get_conn_params() function."""
@@ -364,3 +672,66 @@ class TestGetConnParams():
         monkeypatch.setattr(pg, 'psycopg', m_psycopg2)
         assert pg.get_conn_params(m_ansible_module, INPUT_DICT, warn_db_default=False) == EXPECTED_DICT
         assert m_ansible_module.warn_msg == ''
+
+
+class TestRowConverter():
+
+    """Namespace for testing RowConverter class."""
+
+    class Cursor():
+        # (name, type_code) pairs as in cursor.description:
+        description = [('id', 23), ('num', 1700), ('dur', 1186)]
+
+    def test_convert_dict(self):
+        converter = pg.RowConverter(self.Cursor())
+        row = {'id': 1, 'num': Decimal('1.5'), 'dur': timedelta(seconds=3)}
+
+        assert converter.convert(row) == {'id': 1, 'num': 1.5, 'dur': '0:00:03'}
+        assert converter.columns == ['id', 'num', 'dur']
+
+    def test_convert_compact(self):
+        converter = pg.RowConverter(self.Cursor(), compact=True)
+        row = {'id': 1, 'num': Decimal('1.5'), 'dur': timedelta(seconds=3)}
+
+        assert converter.convert(row) == [1, 1.5, '0:00:03']
+
+    def test_convert_only_columns_of_listed_types(self):
+        converter = pg.RowConverter(self.Cursor())
+        # Values of columns whose types don't need
+        # conversion are returned as is:
+        row = {'id': Decimal('1'), 'num': None, 'dur': None}
+
+        assert converter.convert(row) == {'id': Decimal('1'), 'num': None, 'dur': None}
+
+    def test_get_columns(self):
+        converter = pg.RowConverter(self.Cursor(), compact=True)
+        # Known before any row is converted:
+        assert converter.get_columns() == ['id', 'num', 'dur']
+
+        class NoRowsCursor():
+            description = None
+
+        assert pg.RowConverter(NoRowsCursor()).get_columns() is None
+
+
+class TestCopyFromStdin():
+
+    """Namespace for testing copy_from_stdin() function."""
+
+    def test_copy_from_stdin_psycopg2(self, monkeypatch):
+        class Cursor():
+            def copy_expert(self, query, file_obj):
+                self.query = query
+                self.data = []
+                while True:
+                    chunk = file_obj.read(4)
+                    if not chunk:
+                        break
+                    self.data.append(chunk)
+
+        monkeypatch.setattr(pg, 'PSYCOPG_VERSION', LooseVersion("2.9.6"))
+        cursor = Cursor()
+        pg.copy_from_stdin(cursor, 'COPY t FROM STDIN', ['1\ta\n', '2\tbc\n', '3\n'])
+
+        assert cursor.query == 'COPY t FROM STDIN'
+        assert cursor.data == ['1\ta\n', '2\tbc', '\n3\n']
@@ -12,7 +12,10 @@ from ansible_collections.community.postgresql.plugins.modules.postgresql_alter_s
     check_pg_version,
     check_problematic_params,
     convert_ret_vals,
+    get_settings,
     normalize_bool_val,
+    normalize_params,
+    set_params,
     str_contains_float,
     to_int,
     ValueBool,
@@ -35,6 +38,8 @@ def m_ansible_module():
             self.err_msg = None
             self.warn_msg = None
 
+            self.check_mode = False
+
         def fail_json(self, msg):
             self.err_msg = msg
 
@@ -44,6 +49,39 @@ def m_ansible_module():
     return DummyAnsibleModule()
 
 
+@pytest.fixture(scope='function')
+def m_cursor():
+    """Return an object of dummy cursor class
+    that returns pg_catalog.pg_settings entries
+    and records the executed queries.
+    """
+    class DummyCursor():
+        def __init__(self):
+            self.queries = []
+            self.settings = [
+                {"name": "work_mem", "setting": "4096", "unit": "kB", "context": "user",
+                 "vartype": "integer", "enumvals": None, "boot_val": "4096",
+                 "min_val": "64", "max_val": "2147483647", "pending_restart": False},
+                {"name": "wal_compression", "setting": "off", "unit": None, "context": "superuser",
+                 "vartype": "enum", "enumvals": ["pglz", "lz4", "zstd", "on", "off"], "boot_val": "off",
+                 "min_val": None, "max_val": None, "pending_restart": False},
+                {"name": "shared_buffers", "setting": "16384", "unit": "8kB", "context": "postmaster",
+                 "vartype": "integer", "enumvals": None, "boot_val": "16384",
+                 "min_val": "16", "max_val": "1073741823", "pending_restart": False},
+            ]
+            self.names = []
+
+        def execute(self, query, params=()):
+            self.queries.append(query)
+            if params:
+                self.names = params[0]
+
+        def fetchall(self):
+            return [row for row in self.settings if row["name"] in self.names]
+
+    return DummyCursor()
+
+
 @pytest.mark.parametrize('_input,expected', [
     ('1', 1),
     ('01', 1),
@@ -385,3 +423,48 @@ def test_value_time_fail(m_ansible_module, value):
 def test_value_string(m_ansible_module, param_name, value, expected_normalized):
     obj = ValueString(m_ansible_module, param_name, value, None, 140000)
     assert obj.normalized == expected_normalized
+
+
+@pytest.mark.parametrize('_input,expected', [
+    ({'work_mem': 1024}, {'work_mem': '1024'}),
+    ({'fsync': True}, {'fsync': 'True'}),
+    ({'random_page_cost': 1.1}, {'random_page_cost': '1.1'}),
+    ({'shared_preload_libraries': ['pg_stat_statements', 'auto_explain']},
+     {'shared_preload_libraries': 'pg_stat_statements, auto_explain'}),
+]
+)
+def test_normalize_params(_input, expected):
+    assert normalize_params(_input) == expected
+
+
+def test_get_settings(m_ansible_module, m_cursor):
+    settings = get_settings(m_ansible_module, m_cursor, ['work_mem', 'shared_buffers'])
+    assert len(m_cursor.queries) == 1
+    assert sorted(settings) == ['shared_buffers', 'work_mem']
+    assert settings['work_mem']['unit'] == 'kB'
+    assert 'name' not in settings['work_mem']
+
+
+def test_get_settings_fail(m_ansible_module, m_cursor):
+    get_settings(m_ansible_module, m_cursor, ['work_mem', 'blah'])
+    assert m_ansible_module.err_msg == 'Parameters blah do not exist'
+
+
+def test_set_params(m_ansible_module, m_cursor):
+    params = {'work_mem': '8MB', 'wal_compression': 'off', 'shared_buffers': '256MB'}
+    pg_params, changed_params = set_params(m_ansible_module, m_cursor, params, 160000)
+    assert sorted(pg_params) == sorted(params)
+    assert changed_params == ['work_mem', 'shared_buffers']
+    # One query to fetch the settings, the changed parameters only, and one reload
+    assert m_cursor.queries[1:] == [
+        "ALTER SYSTEM SET work_mem = '8MB'",
+        "ALTER SYSTEM SET shared_buffers = '256MB'",
+        "SELECT pg_reload_conf()",
+    ]
+
+
+def test_set_params_unchanged(m_ansible_module, m_cursor):
+    params = {'work_mem': '4096kB'}
+    pg_params, changed_params = set_params(m_ansible_module, m_cursor, params, 160000)
+    assert changed_params == []
+    assert len(m_cursor.queries) == 1
@@ -16,13 +16,14 @@ if sys.version_info[0] == 3:
     from plugins.modules.postgresql_pg_hba import tokenize, TokenizerException, handle_address_field, \
         handle_netmask_field, handle_db_and_user_strings, PgHbaRuleValueError, PgHbaValueError, parse_auth_options, \
         parse_hba_file, PgHbaRuleError, PgHbaRule, from_rule_list, PG_HBA_HDR_MAP, search_rule, update_rules, \
-        sort_rules, render_rule_list, rule_list_to_dict_list, rule_list_from_hba_file
+        sort_rules, render_rule_list, rule_list_to_dict_list, rule_list_from_hba_file, map_hba_file_errors, \
+        check_hba_file, validate_hba_file
 elif sys.version_info[0] == 2:
     from ansible_collections.community.postgresql.plugins.modules.postgresql_pg_hba import tokenize, \
         TokenizerException, handle_address_field, handle_netmask_field, handle_db_and_user_strings, \
         PgHbaRuleValueError, PgHbaValueError, parse_auth_options, parse_hba_file, PgHbaRuleError, PgHbaRule, \
         from_rule_list, PG_HBA_HDR_MAP, search_rule, update_rules, sort_rules, render_rule_list, \
-        rule_list_to_dict_list, rule_list_from_hba_file
+        rule_list_to_dict_list, rule_list_from_hba_file, map_hba_file_errors, check_hba_file, validate_hba_file
 
 VALID_PG_HBA = \
     r'''local   all             all                                     trust
@@ -728,3 +729,163 @@ def test_update_rules():
     assert changed
     assert len(rules) == 2
     assert rules[0].method == "md5"
+
+
+def test_update_rules_keeps_order():
+    # it seems that test breaks for Python 2.7 and in 2024, I'm not going to work around that
+    # if you still run 2.7, that is your problem
+    try:
+        import ipaddress
+    except ImportError:
+        return
+    ipaddress.ip_address("0.0.0.0")  # otherwise flake complains
+    rules = rule_list_from_hba_file("# comment\nlocal all all ident\nhost all all 10.0.0.0/8 md5\n"
+                                    "local all all trust\nhost all all ::1/128 md5")
+
+    new_rules = [
+        {"contype": "host", "databases": "all", "users": "all", "address": "192.168.0.0/16", "method": "md5",
+         "state": "present"},
+        {"contype": "host", "databases": "all", "users": "all", "address": "172.16.0.0/12", "method": "md5",
+         "state": "present"},
+        # only the first of the duplicate rules is removed
+        {"contype": "local", "databases": "all", "users": "all", "method": "ident", "state": "absent"},
+        {"contype": "host", "databases": "all", "users": "all", "address": "10.0.0.0/8", "method": "trust",
+         "state": "present"},
+        {"comment": "# comment", "state": "absent"},
+        {"comment": "# new comment", "state": "present"},
+    ]
+    changed, msgs, diff_before, diff_after = update_rules(new_rules, rules, prepend_rules=True)
+    assert changed
+    assert render_rule_list(rules, " ") == '''# new comment
+host all all 172.16.0.0/12 md5
+host all all 192.168.0.0/16 md5
+host all all 10.0.0.0/8 trust
+local all all trust
+host all all ::1/128 md5'''
+
+    # the remaining duplicate is found now
+    changed, msgs, diff_before, diff_after = update_rules(
+        [{"contype": "local", "databases": "all", "users": "all", "method": "trust", "state": "absent"}], rules)
+    assert changed
+    assert len(rules) == 5
+    assert diff_before == ["local all all trust"]
+
+
+def test_rule_sort_key():
+    # it seems that test breaks for Python 2.7 and in 2024, I'm not going to work around that
+    # if you still run 2.7, that is your problem
+    try:
+        import ipaddress
+    except ImportError:
+        return
+    ipaddress.ip_address("0.0.0.0")  # otherwise flake complains
+    rules = rule_list_from_hba_file(VALID_PG_HBA + "\n# comment\ninclude some.conf")
+    rules.append(PgHbaRule(tokens="COMMENT", comment="# new comment"))
+
+    # the key sort has to agree with the comparison of every pair of rules
+    sort_rules(rules)
+    for i in range(len(rules) - 1):
+        assert not rules[i + 1] < rules[i]
+    assert rules[0].comment == "# comment"
+    assert rules[1].comment == "# new comment"
+    assert rules[-1].line == "include some.conf"
+
+
+def test_update_rules_remove_unlisted_rules():
+    # it seems that test breaks for Python 2.7 and in 2024, I'm not going to work around that
+    # if you still run 2.7, that is your problem
+    try:
+        import ipaddress
+    except ImportError:
+        return
+    ipaddress.ip_address("0.0.0.0")  # otherwise flake complains
+    rules = rule_list_from_hba_file("# comment\nlocal all all ident\nhost all all 10.0.0.0/8 md5\n"
+                                    "host all all ::1/128 md5\ninclude some.conf")
+
+    new_rules = [
+        {"contype": "host", "databases": "all", "users": "all", "address": "10.0.0.0/8", "method": "md5",
+         "state": "present"},
+        {"contype": "host", "databases": "all", "users": "all", "address": "192.168.0.0/16", "method": "md5",
+         "state": "present"},
+        {"contype": "local", "databases": "all", "users": "all", "method": "ident", "state": "absent"},
+    ]
+    changed, msgs, diff_before, diff_after = update_rules(new_rules, rules, remove_unlisted_rules=True)
+    assert changed
+    assert diff_before == ["local all all ident", "host all all ::1/128 md5"]
+    assert render_rule_list(rules, " ") == '''# comment
+host all all 10.0.0.0/8 md5
+include some.conf
+host all all 192.168.0.0/16 md5'''
+
+    changed, msgs, diff_before, diff_after = update_rules(new_rules, rules, remove_unlisted_rules=True)
+    assert not changed
+
+
+def test_map_hba_file_errors():
+    # it seems that test breaks for Python 2.7 and in 2024, I'm not going to work around that
+    # if you still run 2.7, that is your problem
+    try:
+        import ipaddress
+    except ImportError:
+        return
+    ipaddress.ip_address("0.0.0.0")  # otherwise flake complains
+    rules = rule_list_from_hba_file("# comment\nlocal all all \\\n  ident\nhost all all 10.0.0.0/8 ldap\n"
+                                    "include some.conf")
+
+    errors = map_hba_file_errors(rules, [
+        {'line_number': 4, 'error': 'ldap error', 'file_name': None},
+        {'line_number': 2, 'error': 'ident error', 'file_name': None},
+        {'line_number': 1, 'error': 'included error', 'file_name': 'some.conf'},
+    ])
+    assert errors == [
+        {'line_number': 4, 'rule': 'host all all 10.0.0.0/8 ldap', 'error': 'ldap error'},
+        {'line_number': 2, 'rule': 'local all all \\\n  ident', 'error': 'ident error'},
+        {'line_number': 1, 'rule': '', 'error': 'included error', 'file_name': 'some.conf'},
+    ]
+
+
+class FakeConnection(object):
+    def __init__(self, server_version):
+        self.server_version = server_version
+        self.info = self
+
+
+class FakeDictCursor(object):
+    """Returns dict rows like the cursors of connect_to_db with psycopg 3."""
+
+    def __init__(self, rows, server_version=160000):
+        self.rows = rows
+        self.connection = FakeConnection(server_version)
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeModule(object):
+    def fail_json(self, **kwargs):
+        raise Exception(kwargs['msg'])
+
+
+def test_check_hba_file_dict_rows(tmp_path):
+    hba_file = str(tmp_path / 'pg_hba.conf')
+    check_hba_file(FakeDictCursor([{'hba_file': hba_file}]), FakeModule(), hba_file)
+
+    with pytest.raises(Exception, match='only works for the pg_hba file of the server'):
+        check_hba_file(FakeDictCursor([{'hba_file': hba_file}]), FakeModule(), str(tmp_path / 'other.conf'))
+
+
+@pytest.mark.parametrize('server_version', [150000, 160000])
+def test_validate_hba_file_dict_rows(server_version):
+    rules = rule_list_from_hba_file("local all all ident\nhost all all 10.0.0.0/8 ldap")
+    cursor = FakeDictCursor([{'line_number': 2, 'error': 'ldap error', 'file_name': None}], server_version)
+
+    errors = validate_hba_file(cursor, rules)
+    assert errors == [{'line_number': 2, 'rule': 'host all all 10.0.0.0/8 ldap', 'error': 'ldap error'}]
+    assert 'AS file_name' in cursor.queries[0]
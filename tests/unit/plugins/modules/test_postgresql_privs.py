@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+import pytest
+
+if sys.version_info[0] == 3:
+    from plugins.modules.postgresql_privs import acl_needs_change
+elif sys.version_info[0] == 2:
+    from ansible_collections.community.postgresql.plugins.modules.postgresql_privs import acl_needs_change
+
+ACL = {
+    ('postgres', 'postgres', 'SELECT', False),
+    ('postgres', 'alice', 'SELECT', True),
+    ('postgres', 'alice', 'UPDATE', False),
+    ('bob', 'alice', 'UPDATE', True),
+    ('postgres', '', 'SELECT', False),
+}
+
+
+@pytest.mark.parametrize('grantees,privs,state,grant_option,expected', [
+    (['alice'], ['SELECT'], 'present', None, False),
+    (['alice'], ['SELECT', 'UPDATE'], 'present', None, False),
+    (['alice'], ['SELECT', 'DELETE'], 'present', None, True),
+    (['alice', 'carol'], ['SELECT'], 'present', None, True),
+    (['alice'], ['SELECT'], 'present', True, False),
+    (['alice'], ['SELECT'], 'present', False, True),
+    # UPDATE is grantable because of the grant by bob
+    (['alice'], ['UPDATE'], 'present', True, False),
+    ([''], ['SELECT'], 'present', False, False),
+    ([''], ['UPDATE'], 'present', None, True),
+    (['alice'], ['DELETE'], 'absent', None, False),
+    (['alice'], ['DELETE', 'UPDATE'], 'absent', None, True),
+    (['carol'], ['SELECT'], 'absent', None, False),
+    ([''], ['SELECT'], 'absent', None, True),
+])
+def test_acl_needs_change(grantees, privs, state, grant_option, expected):
+    assert acl_needs_change(ACL, grantees, privs, state, grant_option) == expected
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import sys
+
+if sys.version_info[0] == 3:
+    from plugins.modules.postgresql_roles import diff_role_attr_flags, plan_changes
+elif sys.version_info[0] == 2:
+    from ansible_collections.community.postgresql.plugins.modules.postgresql_roles import diff_role_attr_flags, \
+        plan_changes
+
+
+def make_role(name, **kwargs):
+    role = dict(name=name, state='present', role_attr_flags='', password=None,
+                conn_limit=None, groups=None, configuration=None)
+    role.update(kwargs)
+    return role
+
+
+def make_current(name, **kwargs):
+    row = dict(rolname=name, rolsuper=False, rolcreaterole=False, rolcreatedb=False,
+               rolinherit=True, rolcanlogin=False, rolreplication=False, rolbypassrls=False,
+               rolconnlimit=-1, rolconfig=None)
+    row.update(kwargs)
+    return row
+
+
+def test_diff_role_attr_flags():
+    current = make_current('alice', rolcanlogin=True)
+    assert diff_role_attr_flags('', current) == ([], [])
+    assert diff_role_attr_flags('LOGIN', current) == ([], [])
+    assert diff_role_attr_flags('NOLOGIN CREATEDB', current) == (['LOGIN', 'NOCREATEDB'], ['CREATEDB', 'NOLOGIN'])
+
+
+def test_plan_changes(mocker):
+    module = mocker.MagicMock()
+    snapshot = {
+        'alice': make_current('alice', rolcanlogin=True, rolconfig=['work_mem=4MB']),
+        'bob': make_current('bob'),
+        'carol': make_current('carol', rolconnlimit=5),
+    }
+    roles = [
+        make_role('alice', role_attr_flags='LOGIN', configuration={'work_mem': '16MB'}),
+        make_role('bob', state='absent'),
+        make_role('carol', conn_limit=5),
+        make_role('dave', role_attr_flags='login,createdb', password='secret', conn_limit=2),
+        make_role('eve', state='absent'),
+    ]
+
+    statements, drops, changes = plan_changes(module, snapshot, roles, 160000, False, True)
+
+    assert statements == [
+        ('ALTER ROLE "alice" SET "work_mem" TO \'16MB\'', None),
+        ('CREATE ROLE "dave" CREATEDB LOGIN CONNECTION LIMIT 2 PASSWORD %(password)s', {'password': 'secret'}),
+    ]
+    assert drops == ['DROP ROLE "bob"']
+    assert changes['created'] == ['dave']
+    assert changes['dropped'] == ['bob']
+    assert changes['altered'] == {'alice': {'configuration': {'set': {'work_mem': '16MB'}, 'reset': []}}}
+    module.fail_json.assert_not_called()
+
+
+def test_plan_changes_reset_configuration(mocker):
+    module = mocker.MagicMock()
+    snapshot = {'alice': make_current('alice', rolconfig=['work_mem=4MB', 'search_path=public'])}
+
+    roles = [make_role('alice', configuration={'work_mem': '4MB'})]
+    statements, drops, changes = plan_changes(module, snapshot, roles, 160000, False, True)
+    assert statements == []
+    assert changes['altered'] == {}
+
+    statements, drops, changes = plan_changes(module, snapshot, roles, 160000, True, True)
+    assert statements == [('ALTER ROLE "alice" RESET "search_path"', None)]
+    assert changes['altered']['alice']['configuration'] == {'set': {}, 'reset': ['search_path']}
+
+
+def test_plan_changes_reads_password_encryption_once(mocker):
+    module = mocker.MagicMock()
+    cursor = mocker.MagicMock()
+    cursor.fetchone.return_value = {'password_encryption': 'md5'}
+    snapshot = dict((name, make_current(name, rolpassword='md5' + '0' * 32)) for name in ('alice', 'bob', 'carol'))
+
+    roles = [make_role(name, password='secret') for name in sorted(snapshot)]
+    statements, drops, changes = plan_changes(module, snapshot, roles, 160000, False, True, cursor=cursor)
+
+    cursor.execute.assert_called_once_with('SHOW password_encryption')
+    assert sorted(changes['altered']) == ['alice', 'bob', 'carol']
@@ -0,0 +1,114 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import io
+
+import pytest
+
+from ansible_collections.community.postgresql.plugins.modules.postgresql_script import (
+    split_sql_statements,
+    strip_leading_comments,
+)
+
+
+def split(script):
+    # Copy data must be consumed before the next statement is requested
+    return [(stmt, line, list(data) if data is not None else None)
+            for stmt, line, data in split_sql_statements(io.StringIO(script))]
+
+
+@pytest.mark.parametrize('script, expected', [
+    ('SELECT 1; SELECT 2', [('SELECT 1;', 1, None), ('SELECT 2', 1, None)]),
+    ("SELECT 'a;b''c';", [("SELECT 'a;b''c';", 1, None)]),
+    ("SELECT E'a\\';b';", [("SELECT E'a\\';b';", 1, None)]),
+    ('SELECT 1 AS "a;""b";', [('SELECT 1 AS "a;""b";', 1, None)]),
+    ('SELECT $$a;\nb$$, $tag$;$tag$;', [('SELECT $$a;\nb$$, $tag$;$tag$;', 1, None)]),
+    ('SELECT $1, a$b$ FROM t;', [('SELECT $1, a$b$ FROM t;', 1, None)]),
+    ('-- a; comment\n\nSELECT 1; -- another;\n', [('-- a; comment\n\nSELECT 1;', 3, None)]),
+    ('/* a /* nested; */ ; */ SELECT 1;', [('/* a /* nested; */ ; */ SELECT 1;', 1, None)]),
+    ('SELECT (1;\n2);', [('SELECT (1;\n2);', 1, None)]),
+    ('   \n-- only a comment\n', []),
+])
+def test_split_sql_statements(script, expected):
+    assert split(script) == expected
+
+
+def test_split_sql_statements_begin_atomic():
+    script = ('BEGIN;\n'
+              'CREATE FUNCTION f(a int) RETURNS int LANGUAGE sql\n'
+              'BEGIN ATOMIC\n'
+              '  SELECT CASE WHEN a > 0 THEN 1 ELSE 0 END;\n'
+              'END;\n'
+              'COMMIT;\n')
+
+    assert [(stmt, line) for stmt, line, dummy in split(script)] == [
+        ('BEGIN;', 1),
+        ('CREATE FUNCTION f(a int) RETURNS int LANGUAGE sql\nBEGIN ATOMIC\n'
+         '  SELECT CASE WHEN a > 0 THEN 1 ELSE 0 END;\nEND;', 2),
+        ('COMMIT;', 6),
+    ]
+
+
+@pytest.mark.parametrize('script, expected', [
+    ('ALTER TABLE t RENAME COLUMN a TO begin; SELECT 1; SELECT 2;',
+     ['ALTER TABLE t RENAME COLUMN a TO begin;', 'SELECT 1;', 'SELECT 2;']),
+    ('SELECT CASE WHEN true THEN 1 END; SELECT 2;',
+     ['SELECT CASE WHEN true THEN 1 END;', 'SELECT 2;']),
+    ('CREATE TABLE atomic (begin int); SELECT 1;',
+     ['CREATE TABLE atomic (begin int);', 'SELECT 1;']),
+    ('CREATE OR REPLACE PROCEDURE p() LANGUAGE sql BEGIN ATOMIC SELECT 1; SELECT 2; END; SELECT 3;',
+     ['CREATE OR REPLACE PROCEDURE p() LANGUAGE sql BEGIN ATOMIC SELECT 1; SELECT 2; END;', 'SELECT 3;']),
+])
+def test_split_sql_statements_begin_outside_routines(script, expected):
+    assert [stmt for stmt, dummy, dummy in split(script)] == expected
+
+
+def test_split_sql_statements_copy():
+    script = ('CREATE TABLE t (id int, s text);\n'
+              '/* load */ COPY t (id, s) FROM stdin;\n'
+              '1\ta;b\n'
+              '2\t$$\n'
+              '\\.\n'
+              'SELECT 1;\n')
+
+    assert split(script) == [
+        ('CREATE TABLE t (id int, s text);', 1, None),
+        ('/* load */ COPY t (id, s) FROM stdin;', 2, ['1\ta;b\n', '2\t$$\n']),
+        ('SELECT 1;', 6, None),
+    ]
+
+
+def test_split_sql_statements_copy_lazy():
+    script = ('COPY t FROM stdin;\n'
+              '1\n'
+              '2\n'
+              '\\.\n'
+              'COPY t FROM stdin;\n'
+              '3\n')
+    read = []
+
+    def lines():
+        for line in io.StringIO(script):
+            read.append(line)
+            yield line
+
+    statements = split_sql_statements(lines())
+
+    stmt, line, data = next(statements)
+    assert (stmt, line) == ('COPY t FROM stdin;', 1)
+    # The data lines are read only when the data is consumed
+    assert len(read) == 1
+    assert next(data) == '1\n'
+    assert len(read) == 2
+
+    # Data not consumed by the caller is skipped, the last block ends with the script
+    stmt, line, data = next(statements)
+    assert (stmt, line, list(data)) == ('COPY t FROM stdin;', 5, ['3\n'])
+    assert list(statements) == []
+
+
+def test_strip_leading_comments():
+    assert strip_leading_comments('-- a\n /* b */ COPY t FROM stdin;') == 'COPY t FROM stdin;'